@@ -1,12 +1,93 @@
+from functools import lru_cache
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from django.urls import reverse
-from .models import Asset, Category, Equipment, FaultReport
+from django.urls import get_script_prefix, reverse
+from django.db.models import Prefetch
+from django.utils.translation import get_language, gettext_lazy as _
+from . import transitions
+from .models import Asset, Category, Equipment, FaultReport, FaultReportTranslation
+
+# Erstattes med objektets id i _row_url
+_ID_MARKØR = 987654321
+
+
+@lru_cache(maxsize=64)
+def _url_template(name, language, prefix):
+    return reverse(name, args=[_ID_MARKØR])
+
+
+def _row_url(name, pk):
+    """reverse(name, args=[pk]), men URL'en slås kun op én gang pr. navn og sprog i stedet for pr. række."""
+    return _url_template(name, get_language(), get_script_prefix()).replace(str(_ID_MARKØR), str(pk))
+
+
+def estimated_row_count(model):
+    """
+    Antal rækker i modellens tabel ifølge databasens statistik (SQLite: sqlite_stat1
+    efter ANALYZE, PostgreSQL: pg_class.reltuples). None hvis der ingen statistik er.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            # Første tal er antal rækker i indekset; delvise indeks har færre, så tag det største
+            antal = [int(stat.split()[0]) for (stat,) in cursor.fetchall() if stat]
+            return max(antal) if antal else None
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            række = cursor.fetchone()
+            return række[0] if række and række[0] >= 0 else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Til store tabeller: uden filtre bruges statistikkens rækkeantal i stedet for
+    COUNT(*). Med filtre, eller når tabellen er lille, tælles der præcist.
+    """
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimat = estimated_row_count(self.object_list.model)
+            if estimat and estimat >= self.threshold:
+                return estimat
+        return super().count
+
+
+class CurrentStatusFilter(admin.SimpleListFilter):
+    """Filtrerer på with_current_status()-annotationen."""
+    title = _("Forløb")
+    parameter_name = 'current_status'
+
+    def lookups(self, request, model_admin):
+        return [(str(code), label) for code, label in FaultReport.CURRENT_STATUS_CHOICES]
+
+    def queryset(self, request, queryset):
+        if not (self.value() or '').isdigit():
+            return queryset
+        return queryset.filter(current_status_code=int(self.value()))
+
+
+def thumbnail_preview(obj):
+    """Miniature til changelists (aldrig det fulde billede)."""
+    if obj.image_thumbnail:
+        return format_html('<img src="{}" alt="" style="max-height:48px">', obj.image_thumbnail.url)
+    return ""
+thumbnail_preview.short_description = _("Billede")
 
 @admin.register(Asset)
 class AssetAdmin(admin.ModelAdmin):
     list_display = (
-        'VPID', 'name', 'last_inspection_date',
+        thumbnail_preview, 'VPID', 'name', 'last_inspection_date',
         'last_service_date', 'qr_print_button', 'open_in_assets'
     )
     list_filter = ('category', 'is_active', 'last_inspection_date', 'last_service_date')
@@ -15,11 +96,11 @@ class AssetAdmin(admin.ModelAdmin):
     actions = None
 
     def qr_print_button(self, obj):
-        return format_html('<a href="{}" target="_blank">Print QR</a>', reverse('admin:qr_print', args=[obj.id]))
+        return format_html('<a href="{}" target="_blank">Print QR</a>', _row_url('print_qr', obj.id))
     qr_print_button.short_description = "Print QR-kode"
 
     def open_in_assets(self, obj):
-        return format_html('<a href="{}" target="_blank">Åbn</a>', reverse('asset_detail', args=[obj.id]))
+        return format_html('<a href="{}" target="_blank">Åbn</a>', _row_url('edit_asset', obj.id))
     open_in_assets.short_description = "Åbn i aktiver"
 
 @admin.register(Equipment)
@@ -27,13 +108,29 @@ class EquipmentAdmin(admin.ModelAdmin):
     list_display = ('name', 'description')  # Rettet fra 'Navn', 'Beskrivelse'
     search_fields = ('name',)  # Rettet fra 'Navn'
 
+class FaultReportTranslationInline(admin.TabularInline):
+    model = FaultReportTranslation
+    fields = ('language', 'text')
+    readonly_fields = ('language', 'text')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(FaultReport)
 class FaultReportAdmin(admin.ModelAdmin):
     list_display = (
-        'title', 'asset', 'priority', 'current_status',
-        'created_at', 'assigned_to', 'sprog'  # Tilføjet 'sprog'
+        thumbnail_preview, 'title', 'asset', 'priority', 'current_status',
+        'created_at', 'assigned_to', 'sprog',  # Tilføjet 'sprog'
+        'translated_description'
     )
-    list_filter = ('priority', 'status', 'assigned_to', 'sprog')  # Tilføjet 'sprog'
+    list_select_related = ('asset', 'assigned_to')
+    inlines = [FaultReportTranslationInline]
+    list_filter = ('priority', CurrentStatusFilter, 'status', 'assigned_to', 'sprog')  # Tilføjet 'sprog'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # Sparer en COUNT(*) over hele tabellen, når der er filtreret
+    actions = ['complete_selected']
     search_fields = ('title', 'vpid', 'description', 'original_description')
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
@@ -51,6 +148,30 @@ class FaultReportAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Hent kun oversættelsen på brugerens aktive sprog (én ekstra query pr. side)
+        language = (get_language() or 'da')[:2]
+        return super().get_queryset(request).with_current_status().prefetch_related(
+            Prefetch('translations', queryset=FaultReportTranslation.objects.filter(language=language))
+        )
+
+    def current_status(self, obj):
+        return obj.current_status
+    current_status.short_description = _("Forløb")
+    current_status.admin_order_field = 'current_status_code'
+
+    def complete_selected(self, request, queryset):
+        result = transitions.apply_transition('complete', queryset.values_list('pk', flat=True), request.user)
+        self.message_user(
+            request, f"{len(result['updated'])} rapporter afsluttet, {len(result['rejected'])} var allerede afsluttet"
+        )
+    complete_selected.short_description = _("Afslut valgte rapporter")
+    complete_selected.allowed_permissions = ('change',)
+
+    def translated_description(self, obj):
+        return obj.description_in(get_language())
+    translated_description.short_description = _("Beskrivelse")
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name',)
@@ -1,6 +1,53 @@
+import threading
+from datetime import timedelta
 from django.apps import AppConfig
+from django.conf import settings
 
 class AssetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assets'
     verbose_name = "Aktiver"  # Dette navn vises i admin-siden
+
+    def ready(self):
+        import translator
+        from . import signals  # noqa: F401 (registrerer signal-receivers)
+        from django.core.signals import request_started
+        from .translation_cache import DatabaseTranslationCache
+        from .translation_memory import load_translation_memory
+        from .translation_worker import start_worker
+
+        # Oversættelsescache: LRU i processen + tabel i databasen
+        cache_settings = getattr(settings, 'TRANSLATION_CACHE', {})
+        translator.cache.maks_størrelse = cache_settings.get('LRU_SIZE', translator.cache.maks_størrelse)
+        translator.cache.maks_alder = cache_settings.get('LRU_MAX_AGE', translator.cache.maks_alder)
+        translator.cache.persistent = DatabaseTranslationCache(
+            maks_rækker=cache_settings.get('MAX_ENTRIES', 50000),
+            maks_alder=timedelta(days=cache_settings.get('MAX_AGE_DAYS', 180)),
+        )
+
+        # Translation memory: fuzzy genbrug af tidligere oversættelser, bygget ved første opslag
+        tm_settings = getattr(settings, 'TRANSLATION_MEMORY', {})
+        translator.hukommelse.aktiv = tm_settings.get('ENABLED', True)
+        translator.hukommelse.tærskel = tm_settings.get('THRESHOLD', translator.hukommelse.tærskel)
+        translator.hukommelse.maks_poster = tm_settings.get('MAX_ENTRIES', translator.hukommelse.maks_poster)
+        translator.hukommelse.indlæser = lambda: load_translation_memory(translator.hukommelse.maks_poster)
+
+        # LibreTranslate-backup: URL, timeouts og kredsløbsafbryder
+        lt_settings = getattr(settings, 'LIBRETRANSLATE', {})
+        if lt_settings:
+            translator.backup = translator.LibreTranslateBackup(
+                url=lt_settings.get('URL', 'https://translate.argosopentech.com/'),
+                api_key=lt_settings.get('API_KEY'),
+                connect_timeout=lt_settings.get('CONNECT_TIMEOUT', 2.0),
+                read_timeout=lt_settings.get('READ_TIMEOUT', 5.0),
+                fejl_grænse=lt_settings.get('FAILURE_THRESHOLD', 3),
+                pause=lt_settings.get('COOL_DOWN', 60.0),
+            )
+
+        # Indlæs Argos-modellerne i baggrunden, så første fejlrapport ikke venter på dem
+        if getattr(settings, 'TRANSLATOR_PRELOAD', False):
+            threading.Thread(target=translator.motor.indlæs, name='argos-preload', daemon=True).start()
+
+        # Baggrundsoversættelse: workeren startes ved første request (ikke under manage.py-kommandoer);
+        # ASYNC og AUTOSTART læses først da, så de kan slås fra med override_settings
+        request_started.connect(start_worker, dispatch_uid='assets.translation_worker')
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import F, Q
+from .models import Asset, AssetTombstone, CatalogVersion
+
+ASSETS = 'assets'
+# Højeste version af en tombstone, der er ryddet op; klienter med et ældre token skal synkronisere forfra
+ASSETS_PRUNED = 'assets_pruned'
+
+
+def current_version(key=ASSETS):
+    """Katalogets nuværende version (ét opslag i det unikke indeks)."""
+    version = CatalogVersion.objects.filter(key=key).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump(key=ASSETS):
+    """
+    Øger versionen og returnerer den nye. Kaldes når et aktiv ændres, oprettes
+    eller slettes. Rækken er låst til transaktionen slutter, så versionerne
+    bliver synlige i den rækkefølge de er uddelt.
+    """
+    with transaction.atomic():
+        if not CatalogVersion.objects.filter(key=key).update(version=F('version') + 1):
+            _, oprettet = CatalogVersion.objects.get_or_create(key=key, defaults={'version': 1})
+            if not oprettet:
+                CatalogVersion.objects.filter(key=key).update(version=F('version') + 1)
+        return CatalogVersion.objects.filter(key=key).values_list('version', flat=True).get()
+
+
+def parse_token(token):
+    """
+    Et sync-token er "<version>" (alt til og med versionen er sendt) eller
+    "<version>:<id>" (kun aktiver med den version op til id'et). None = fra starten.
+    """
+    if not token:
+        return None
+    version, _, asset_id = str(token).partition(':')
+    return int(version), int(asset_id) if asset_id else None
+
+
+def changes_since(token, limit):
+    """
+    Ændrede aktiver og slettede id'er siden `token`, sorteret efter (version, id).
+    Returnerer et dict med changed, deleted, token, more og reset.
+    """
+    since = parse_token(token)
+    reset = since is None or since[0] < current_version(ASSETS_PRUNED)
+    if reset:
+        since = (-1, None)
+    version, after_id = since
+    nu = current_version(ASSETS)
+
+    assets = Asset.objects.filter(sync_version__lte=nu)
+    if after_id is None:
+        assets = assets.filter(sync_version__gt=version)
+    else:
+        assets = assets.filter(
+            Q(sync_version__gt=version) | Q(sync_version=version, id__gt=after_id)
+        )
+    changed = list(
+        assets.order_by('sync_version', 'id').values('id', 'VPID', 'name', 'description', 'sync_version')[:limit + 1]
+    )
+    more = len(changed) > limit
+    if more:
+        changed = changed[:limit]
+        sidste = changed[-1]
+        til, ny_token = sidste['sync_version'], f"{sidste['sync_version']}:{sidste['id']}"
+    else:
+        til, ny_token = nu, str(nu)
+
+    deleted = [] if reset else list(
+        AssetTombstone.objects.filter(sync_version__gt=version, sync_version__lte=til)
+        .order_by('sync_version').values_list('asset_id', flat=True)
+    )
+    for asset in changed:
+        del asset['sync_version']
+    return {'changed': changed, 'deleted': deleted, 'token': ny_token, 'more': more, 'reset': reset}
+
+
+def prune_tombstones(older_than):
+    """Sletter tombstones ældre end `older_than`; klienter med ældre tokens synkroniserer derefter forfra."""
+    with transaction.atomic():
+        gamle = AssetTombstone.objects.filter(deleted_at__lt=older_than)
+        højeste = gamle.order_by('-sync_version').values_list('sync_version', flat=True).first()
+        if højeste is None:
+            return 0
+        CatalogVersion.objects.update_or_create(key=ASSETS_PRUNED, defaults={'version': højeste})
+        return gamle.delete()[0]
@@ -0,0 +1,121 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Én baggrundstråd er nok; billedbehandlingen må ikke konkurrere med requests om CPU
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-processing')
+
+
+def image_settings():
+    return {
+        'MAX_DIMENSION': 2048,   # Længste side på det gemte original-billede
+        'FORMAT': 'JPEG',        # 'JPEG' eller 'WEBP'
+        'QUALITY': 82,
+        'THUMBNAIL_SIZE': 320,   # Længste side på miniaturen
+        **getattr(settings, 'IMAGE_PROCESSING', {}),
+    }
+
+
+def _extension(fmt):
+    return 'webp' if fmt == 'WEBP' else 'jpg'
+
+
+def _encode(img, fmt, quality):
+    if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    if fmt == 'WEBP':
+        img.save(buffer, format='WEBP', quality=quality, method=4)
+    else:
+        img.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def thumbnail_name(image_name, fmt=None):
+    """Filnavnet miniaturen foreslås gemt under (storage kan vælge et andet)."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"{stem}_thumb.{_extension(fmt or image_settings()['FORMAT'])}"
+
+
+def needs_processing(instance):
+    """True hvis instansen har et billede uden miniature (den nulstilles når billedet skiftes, se signals.py)."""
+    return bool(instance.image) and not instance.image_thumbnail
+
+
+def process_image(model_label, pk):
+    """
+    Nedskalerer, roterer (EXIF) og genkoder billedet på én Asset/FaultReport
+    og laver en miniature ved siden af. Opdaterer kun rækken, hvis billedet
+    ikke er blevet skiftet ud imens.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', 'image', 'image_thumbnail').first()
+    if instance is None or not needs_processing(instance):
+        return False
+
+    cfg = image_settings()
+    fmt = cfg['FORMAT'].upper()
+    storage = instance.image.storage
+    original_name = instance.image.name
+
+    with instance.image.open('rb') as f:
+        img = Image.open(f)
+        source_format = img.format
+        orientation = img.getexif().get(0x0112, 1)
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    new_name = original_name
+    reencoded = max(img.size) > cfg['MAX_DIMENSION'] or orientation != 1 or source_format != fmt
+    if reencoded:
+        img.thumbnail((cfg['MAX_DIMENSION'], cfg['MAX_DIMENSION']), Image.LANCZOS)
+        stem = os.path.splitext(os.path.basename(original_name))[0]
+        new_name = storage.save(
+            instance.image.field.generate_filename(instance, f"{stem}.{_extension(fmt)}"),
+            ContentFile(_encode(img, fmt, cfg['QUALITY'])),
+        )
+
+    thumb = img.copy()
+    thumb.thumbnail((cfg['THUMBNAIL_SIZE'], cfg['THUMBNAIL_SIZE']), Image.LANCZOS)
+    thumb_field = instance.image_thumbnail.field
+    thumb_name = thumb_field.storage.save(
+        thumb_field.generate_filename(instance, thumbnail_name(new_name, fmt)),
+        ContentFile(_encode(thumb, fmt, cfg['QUALITY'])),
+    )
+
+    opdateret = model.objects.filter(pk=pk, image=original_name, image_thumbnail='').update(
+        image=new_name, image_thumbnail=thumb_name
+    )
+    if not opdateret:
+        # Billedet blev udskiftet (eller behandlet af en anden) imens; slip vores egne filer igen
+        if reencoded:
+            storage.delete(new_name)
+        thumb_field.storage.delete(thumb_name)
+        return False
+
+    if reencoded:
+        storage.delete(original_name)
+    logger.info("Billede behandlet: %s → %s (%dx%d), miniature %s", original_name, new_name, *img.size, thumb_name)
+    return True
+
+
+def _run(model_label, pk):
+    try:
+        process_image(model_label, pk)
+    except Exception:
+        logger.exception("Billedbehandling fejlede for %s %s", model_label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(instance):
+    """Sætter billedbehandling af instansen i kø i baggrundstråden."""
+    _executor.submit(_run, instance._meta.label, instance.pk)
@@ -0,0 +1,198 @@
+"""
+Live-opdateringer til mekanikernes arbejdskø som server-sent events (/api/mechanic/events/).
+
+Ændringer på fejlrapporter publiceres én gang til `feed` (fra signalerne,
+når transaktionen er committet), og feeden fordeler dem til de åbne
+forbindelser. Ingen klient spørger databasen.
+
+Strømmen serveres af sse_app, som vprepair/asgi.py sender stien til uden om
+Djangos handler: den holder en tråd pr. request, så længe svaret streames,
+mens en forbindelse her kun er to coroutines og en asyncio.Queue.
+
+Feeden lever i processen: kør sitet under ASGI i én proces, ellers ser
+mekanikerne kun ændringer fra deres egen proces.
+"""
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager, suppress
+from importlib import import_module
+from types import SimpleNamespace
+from django.conf import settings
+from django.contrib import auth
+from django.http.cookie import parse_cookie
+
+HIGH_PRIORITY = 1  # FaultReport.priority for "Høj"
+
+# Felterne der ændrer et kort i køen
+QUEUE_FIELDS = ('assigned_to_id', 'priority', 'started_at', 'completed_at', 'notes')
+
+
+def live_settings():
+    return {
+        'KEEPALIVE': 25,      # Sekunder mellem keepalive-kommentarer
+        'QUEUE_SIZE': 100,    # Ventende hændelser pr. forbindelse før klienten bedes hente siden forfra
+        'RETRY_MS': 5000,     # Browserens pause før den genforbinder
+        **getattr(settings, 'LIVE_QUEUE', {}),
+    }
+
+
+class ChangeFeed:
+    """Fordeler hændelser fra synkron kode (enhver tråd) til abonnenter på event loops."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._abonnenter = {}  # kø -> (loop, bruger-id)
+
+    @property
+    def subscriber_count(self):
+        return len(self._abonnenter)
+
+    def publish(self, event, users=None):
+        """Sender `event` (et dict) til abonnenterne for `users`, eller til alle hvis users er None."""
+        with self._lock:
+            modtagere = [
+                (kø, loop) for kø, (loop, user_id) in self._abonnenter.items()
+                if users is None or user_id in users
+            ]
+        for kø, loop in modtagere:
+            try:
+                loop.call_soon_threadsafe(_læg_i_kø, kø, event)
+            except RuntimeError:
+                pass  # Loopet er lukket; forbindelsen afmelder sig selv
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        """Kø med hændelser til `user_id`, så længe with-blokken kører."""
+        kø = asyncio.Queue(maxsize=live_settings()['QUEUE_SIZE'])
+        with self._lock:
+            self._abonnenter[kø] = (asyncio.get_running_loop(), user_id)
+        try:
+            yield kø
+        finally:
+            with self._lock:
+                del self._abonnenter[kø]
+
+
+def _læg_i_kø(kø, event):
+    try:
+        kø.put_nowait(event)
+    except asyncio.QueueFull:
+        # Klienten følger ikke med: smid det ventende væk og bed den hente køen forfra
+        while not kø.empty():
+            kø.get_nowait()
+        kø.put_nowait({'type': 'resync'})
+
+
+feed = ChangeFeed()
+
+
+def report_payload(report):
+    """Det et kort i køen viser; sproguafhængigt, så det kan sendes til alle."""
+    return {
+        'id': report.pk,
+        'vpid': report.vpid,
+        'title': report.title,
+        'priority': report.priority,
+        'status': report.get_current_status_code(),
+        'description': report.description or report.original_description or '',
+        'notes': report.notes,
+        'created_at': report.created_at.isoformat() if report.created_at else None,
+    }
+
+
+def queue_events(report, before, created):
+    """
+    Hændelserne en gemt rapport giver som (event, brugere): ny tildeling,
+    fjernet tildeling, ændret status/prioritet, og nye rapporter med høj
+    prioritet til alle. `before` er QUEUE_FIELDS før gemningen.
+    """
+    events = []
+    payload = report_payload(report)
+    if created:
+        if report.priority == HIGH_PRIORITY and not report.completed_at:
+            events.append(({'type': 'high_priority', 'report': payload}, None))
+        if report.assigned_to_id:
+            events.append(({'type': 'assigned', 'report': payload}, {report.assigned_to_id}))
+        return events
+    if before is None:
+        return events
+
+    tidligere = before['assigned_to_id']
+    if tidligere != report.assigned_to_id:
+        if tidligere:
+            events.append(({'type': 'unassigned', 'report': {'id': report.pk}}, {tidligere}))
+        if report.assigned_to_id:
+            events.append(({'type': 'assigned', 'report': payload}, {report.assigned_to_id}))
+    elif report.assigned_to_id and any(before[f] != getattr(report, f) for f in QUEUE_FIELDS):
+        events.append(({'type': 'updated', 'report': payload}, {report.assigned_to_id}))
+    return events
+
+
+def publish_updates(report_ids):
+    """Sender de ændrede kort til de tildelte mekanikere; til opdateringer med QuerySet.update() (ingen signaler)."""
+    if not feed.subscriber_count:
+        return
+    from .models import FaultReport
+
+    for report in FaultReport.objects.filter(pk__in=report_ids, assigned_to__isnull=False):
+        feed.publish({'type': 'updated', 'report': report_payload(report)}, {report.assigned_to_id})
+
+
+def format_event(event):
+    """Én SSE-besked: `event:` med typen og data som JSON på én linje."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(user_id):
+    """SSE-strømmen for én mekaniker; afmeldes når klienten lukker forbindelsen."""
+    cfg = live_settings()
+    yield f"retry: {cfg['RETRY_MS']}\n\n"
+    async with feed.subscribe(user_id) as kø:
+        yield format_event({'type': 'ready'})
+        while True:
+            try:
+                event = await asyncio.wait_for(kø.get(), cfg['KEEPALIVE'])
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+
+
+async def _user_id(scope):
+    """Den indloggede brugers id ud fra sessionscookien (samme tjek som AuthenticationMiddleware)."""
+    headers = dict(scope.get('headers') or [])
+    session_key = parse_cookie(headers.get(b'cookie', b'').decode('latin-1')).get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = await auth.aget_user(SimpleNamespace(session=session))
+    return user.pk if user.is_authenticated else None
+
+
+async def sse_app(scope, receive, send):
+    """ASGI-app for SSE-stien: 403 uden login, ellers strømmen indtil klienten lukker."""
+    user_id = await _user_id(scope)
+    if user_id is None:
+        await send({'type': 'http.response.start', 'status': 403, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': "Log ind for at se live-køen".encode()})
+        return
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),  # nginx må ikke buffere strømmen
+    ]})
+
+    async def skriv():
+        async for chunk in event_stream(user_id):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    skriver = asyncio.create_task(skriv())
+    try:
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    finally:
+        skriver.cancel()
+        with suppress(asyncio.CancelledError, OSError):
+            await skriver
@@ -0,0 +1,60 @@
+from collections import Counter
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+from django.utils import timezone
+from assets.models import MediaBlob
+from assets.storage import ContentAddressedStorage, media_blob_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Sletter billedfiler i den indholdsadresserede storage, som ingen rækker længere peger på. "
+        "Med --reconcile tælles referencerne først forfra ud fra databasen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=getattr(settings, 'MEDIA_GC_GRACE_HOURS', 24),
+            help="Slet kun filer der har været uden referencer mindst så længe"
+        )
+        parser.add_argument('--reconcile', action='store_true', help="Genberegn referencetællingen før oprydning")
+        parser.add_argument('--dry-run', action='store_true', help="Vis hvad der ville blive slettet")
+
+    def handle(self, *args, **options):
+        storage = media_blob_storage()
+        if not isinstance(storage, ContentAddressedStorage):
+            self.stdout.write("STORAGES['media_blobs'] er ikke indholdsadresseret; intet at rydde op.")
+            return
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        if options['reconcile']:
+            rettet = self._reconcile(cutoff, options['dry_run'])
+            self.stdout.write(f"{rettet} referencetællinger rettet.")
+
+        antal, frigjort = storage.collect_garbage(cutoff, dry_run=options['dry_run'])
+        verbum = "ville blive slettet" if options['dry_run'] else "slettet"
+        self.stdout.write(self.style.SUCCESS(
+            f"{antal} filer uden referencer {verbum} ({frigjort / (1024 * 1024):.1f} MB)."
+        ))
+
+    def _reconcile(self, cutoff, dry_run):
+        """Tæller referencer fra alle filfelter, der bruger storagen, og retter MediaBlob.refcount."""
+        referencer = Counter()
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage):
+                    names = model._base_manager.exclude(**{field.name: ''}).values_list(field.name, flat=True)
+                    referencer.update(names.iterator(chunk_size=2000))
+
+        rettet = 0
+        # Kun blobs der ikke er rørt siden cutoff: nyere uploads kan mangle deres række endnu
+        blobs = MediaBlob.objects.filter(updated_at__lt=cutoff).values_list('pk', 'name', 'refcount')
+        for pk, name, refcount in blobs.iterator(chunk_size=2000):
+            if referencer[name] != refcount:
+                rettet += 1
+                if not dry_run:
+                    MediaBlob.objects.filter(pk=pk, refcount=refcount).update(refcount=referencer[name])
+        return rettet
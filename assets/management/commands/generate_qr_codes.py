@@ -0,0 +1,39 @@
+import time
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from assets.models import Asset
+from assets.qr_labels import render_pngs
+from assets.qr_utils import qr_payload, qr_settings
+
+
+class Command(BaseCommand):
+    help = "Laver de manglende QR-billeder (Asset.qr_code) parallelt, fx efter import_assets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Aktiver pr. batch (standard: 500)")
+        parser.add_argument('--workers', type=int, help="Antal processer (standard: QR_LABELS['WORKERS'] / CPU-kerner; 0 = uden pulje)")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(generate_missing_qr_codes(
+            batch_size=options['batch_size'], workers=options['workers']
+        )))
+
+
+def generate_missing_qr_codes(batch_size=500, workers=None):
+    """Renderer QR-PNG'er i procespuljen og gemmer dem batchvis med bulk_update. Returnerer en statuslinje."""
+    mangler = Asset.objects.filter(Q(qr_code='') | Q(qr_code__isnull=True)).only('pk', 'VPID', 'qr_code')
+    size = qr_settings()['DEFAULT_SIZE']
+    start = time.perf_counter()
+    antal = 0
+    while True:
+        # Gemte aktiver falder ud af filteret, så vi tager altid de første igen
+        batch = list(mangler.order_by('pk')[:batch_size])
+        if not batch:
+            break
+        for asset, png in zip(batch, render_pngs([qr_payload(a.VPID) for a in batch], size, workers)):
+            asset.qr_code.save(f'qr_{asset.VPID}.png', ContentFile(png), save=False)
+        Asset.objects.bulk_update(batch, ['qr_code'])
+        antal += len(batch)
+    varighed = time.perf_counter() - start
+    return f"{antal} QR-koder genereret på {varighed:.1f} s ({antal / varighed if varighed else 0:.0f}/s)"
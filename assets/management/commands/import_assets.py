@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from assets import catalog
+from assets.models import Asset, Category
+from assets.management.commands.generate_qr_codes import generate_missing_qr_codes
+
+FELTER = ('VPID', 'name', 'description', 'category', 'location', 'is_active',
+          'last_inspection_date', 'last_service_date')
+OPDATERBARE = ['name', 'description', 'category', 'location', 'is_active',
+               'last_inspection_date', 'last_service_date', 'sync_version', 'modified_at']
+
+
+class Command(BaseCommand):
+    help = (
+        "Importerer aktiver fra CSV eller JSONL i store batches i én transaktion. "
+        "Dubletter på VPID springes over (eller opdateres med --update). "
+        "QR-billederne laves bagefter med --with-qr eller generate_qr_codes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (med overskriftslinje) eller JSONL med felterne " + ", ".join(FELTER))
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Standard: ud fra filendelsen")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rækker pr. bulk_create (standard: 2000)")
+        parser.add_argument('--update', action='store_true', help="Opdater aktiver hvis VPID allerede findes")
+        parser.add_argument('--with-qr', action='store_true', help="Generer de manglende QR-billeder efter importen")
+        parser.add_argument('--dry-run', action='store_true', help="Læs og valider filen, men rul tilbage")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        if not os.path.exists(options['path']):
+            raise CommandError(f"Filen findes ikke: {options['path']}")
+
+        self.kategorier = {name.lower(): pk for pk, name in Category.objects.values_list('pk', 'name')}
+        self.sete_vpid = set()
+        self.tællere = {'oprettet': 0, 'opdateret': 0, 'dubletter': 0, 'fejl': 0}
+        start = time.perf_counter()
+        læst = 0
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as f:
+            rækker = csv.DictReader(f) if fmt == 'csv' else (json.loads(line) for line in f if line.strip())
+            with transaction.atomic():
+                # Hele importen får én katalogversion (bulk_create går uden om Asset.save)
+                self.sync_version = catalog.bump(catalog.ASSETS)
+                batch = []
+                for linje, række in enumerate(rækker, start=2 if fmt == 'csv' else 1):
+                    læst += 1
+                    asset = self._asset(række, linje)
+                    if asset is not None:
+                        batch.append(asset)
+                    if len(batch) >= options['batch_size']:
+                        self._gem(batch, options['update'])
+                        batch = []
+                if batch:
+                    self._gem(batch, options['update'])
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+
+        varighed = time.perf_counter() - start
+        t = self.tællere
+        self.stdout.write(self.style.SUCCESS(
+            f"{læst} rækker læst på {varighed:.1f} s ({læst / varighed if varighed else 0:.0f} rækker/s): "
+            f"{t['oprettet']} oprettet, {t['opdateret']} opdateret, {t['dubletter']} dubletter sprunget over, "
+            f"{t['fejl']} fejl" + (" — rullet tilbage (--dry-run)" if options['dry_run'] else "")
+        ))
+
+        if options['with_qr'] and not options['dry_run']:
+            self.stdout.write(generate_missing_qr_codes())
+
+    def _asset(self, række, linje):
+        vpid = str(række.get('VPID') or række.get('vpid') or '').strip()
+        if not vpid:
+            self.tællere['fejl'] += 1
+            self.stderr.write(f"Linje {linje}: mangler VPID")
+            return None
+        if vpid in self.sete_vpid:
+            self.tællere['dubletter'] += 1
+            return None
+        self.sete_vpid.add(vpid)
+        try:
+            return Asset(
+                VPID=vpid,
+                name=str(række.get('name') or '').strip(),
+                description=str(række.get('description') or ''),
+                category_id=self._kategori(række.get('category')),
+                location=str(række.get('location') or '').strip(),
+                is_active=_bool(række.get('is_active'), default=True),
+                last_inspection_date=_dato(række.get('last_inspection_date')),
+                last_service_date=_dato(række.get('last_service_date')),
+                sync_version=self.sync_version,
+            )
+        except ValueError as e:
+            self.tællere['fejl'] += 1
+            self.stderr.write(f"Linje {linje} ({vpid}): {e}")
+            return None
+
+    def _kategori(self, navn):
+        navn = str(navn or '').strip()
+        if not navn:
+            return None
+        if navn.lower() not in self.kategorier:
+            self.kategorier[navn.lower()] = Category.objects.create(name=navn).pk
+        return self.kategorier[navn.lower()]
+
+    def _gem(self, batch, opdater):
+        """Opretter de nye aktiver med bulk_create; eksisterende VPID'er springes over eller opdateres."""
+        eksisterende = dict(Asset.objects.filter(VPID__in=[a.VPID for a in batch]).values_list('VPID', 'pk'))
+        nye = [a for a in batch if a.VPID not in eksisterende]
+        # bulk_create kalder ikke Asset.save(), så der skrives ingen QR-filer her
+        Asset.objects.bulk_create(nye, batch_size=len(batch))
+        self.tællere['oprettet'] += len(nye)
+
+        gamle = [a for a in batch if a.VPID in eksisterende]
+        if opdater and gamle:
+            nu = timezone.now()
+            for asset in gamle:
+                asset.pk = eksisterende[asset.VPID]
+                asset.modified_at = nu
+            Asset.objects.bulk_update(gamle, OPDATERBARE, batch_size=len(batch))
+            self.tællere['opdateret'] += len(gamle)
+        else:
+            self.tællere['dubletter'] += len(gamle)
+
+
+def _bool(værdi, default):
+    if værdi in (None, ''):
+        return default
+    if isinstance(værdi, bool):
+        return værdi
+    return str(værdi).strip().lower() in ('1', 'true', 'ja', 'yes', 'j', 'y')
+
+
+def _dato(værdi):
+    if værdi in (None, ''):
+        return None
+    return date.fromisoformat(str(værdi).strip())
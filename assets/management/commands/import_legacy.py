@@ -0,0 +1,208 @@
+import sqlite3
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.db.models import F
+from django.utils import timezone
+from assets import catalog, stats
+from assets.models import Asset, Equipment, FaultReport, LegacyImportProgress
+from assets.management.commands.generate_qr_codes import generate_missing_qr_codes
+
+# I den rækkefølge de skal importeres: rapporter og udstyrskoblinger peger på maskiner og udstyr
+TABELLER = ('Maskinliste', 'Udstyr', 'MaskineUdstyr', 'FaultReports')
+
+
+class Command(BaseCommand):
+    help = (
+        "Flytter data fra den gamle service_system.db (Maskinliste, Udstyr, MaskineUdstyr, "
+        "FaultReports) over i aktiver, udstyr og fejlrapporter. Læser tabellerne i batches "
+        "efter ID og gemmer hvor langt den er nået, så en afbrudt import fortsætter hvor "
+        "den slap, og en ny kørsel kun tager de nye rækker med."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(settings.BASE_DIR / 'service_system.db'),
+                            help="Den gamle database (standard: service_system.db i projektmappen)")
+        parser.add_argument('--tables', nargs='+', choices=TABELLER, default=TABELLER,
+                            help="Kun disse tabeller (standard: alle)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rækker pr. batch (standard: 2000)")
+        parser.add_argument('--with-qr', action='store_true', help="Generer de manglende QR-billeder bagefter")
+
+    def handle(self, *args, **options):
+        try:
+            self.legacy = sqlite3.connect(f"file:{options['path']}?mode=ro", uri=True)
+            findes = {navn for (navn,) in self.legacy.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        except sqlite3.Error as e:
+            raise CommandError(f"Kan ikke åbne {options['path']}: {e}")
+        mangler = [t for t in options['tables'] if t not in findes]
+        if mangler:
+            raise CommandError(f"Tabellerne findes ikke i {options['path']}: {', '.join(mangler)}")
+
+        self.batch_size = options['batch_size']
+        self._maskiner = self._udstyr = self._legacy_vpid = None
+        try:
+            for tabel in TABELLER:
+                if tabel in options['tables']:
+                    getattr(self, f'_import_{tabel.lower()}')()
+        finally:
+            self.legacy.close()
+
+        if options['with_qr']:
+            self.stdout.write(generate_missing_qr_codes())
+
+    # Tabellerne
+
+    def _import_maskinliste(self):
+        def gem(rækker):
+            eksisterende = set(Asset.objects.filter(VPID__in=[r[1] for r in rækker]).values_list('VPID', flat=True))
+            # bulk_create går uden om Asset.save(): ingen QR-filer, og versionen sættes her
+            sync_version = catalog.bump(catalog.ASSETS)
+            nye = [
+                Asset(VPID=vpid, name=(kaldenavn or '')[:100], description=beskrivelse or '',
+                      sync_version=sync_version)
+                for _, vpid, beskrivelse, kaldenavn in rækker if vpid and vpid not in eksisterende
+            ]
+            Asset.objects.bulk_create(nye, batch_size=self.batch_size)
+            return len(nye)
+
+        self._importer('Maskinliste', "trim(VPID), Beskrivelse, Kaldenavn", gem)
+        self._maskiner = None
+
+    def _import_udstyr(self):
+        def gem(rækker):
+            eksisterende = set(Equipment.objects.filter(name__in=[r[1] for r in rækker]).values_list('name', flat=True))
+            nye = {}
+            for _, navn, beskrivelse in rækker:
+                if navn and navn not in eksisterende:
+                    nye.setdefault(navn, Equipment(name=navn, description=beskrivelse or ''))
+            Equipment.objects.bulk_create(nye.values(), batch_size=self.batch_size)
+            return len(nye)
+
+        # Udstyr kendes på navnet, så det også kobles rigtigt efter en genoptaget import
+        self._importer('Udstyr', "trim(Navn), Beskrivelse", gem)
+        self._udstyr = None
+
+    def _import_maskineudstyr(self):
+        Through = Asset.equipment.through
+
+        def gem(rækker):
+            koblinger = [
+                Through(asset_id=self._aktiv_id(maskine), equipment_id=self._udstyr_id(udstyr))
+                for _, maskine, udstyr in rækker
+            ]
+            koblinger = [k for k in koblinger if k.asset_id and k.equipment_id]
+            Through.objects.bulk_create(koblinger, batch_size=self.batch_size, ignore_conflicts=True)
+            return len(koblinger)
+
+        # Tabellen har ingen ID-kolonne; rowid giver samme stabile rækkefølge
+        self._importer('MaskineUdstyr', "MaskineID, UdstyrID", gem, nøgle='rowid')
+
+    def _import_faultreports(self):
+        def gem(rækker):
+            rapporter, tidspunkter = [], []
+            for _, beskrivelse, maskine, reparation, afsluttet, rapporteret in rækker:
+                afsluttet = _tidspunkt(afsluttet)
+                oprettet = _tidspunkt(rapporteret) or afsluttet or timezone.now()
+                vpid = self._vpid(maskine)
+                tidspunkter.append((oprettet, afsluttet or oprettet))
+                rapporter.append(FaultReport(
+                    title=f"Rapport for {vpid}"[:100],
+                    description=beskrivelse or '',
+                    original_description=beskrivelse or '',
+                    vpid=vpid,
+                    asset_id=self._aktiv_id(maskine),
+                    notes=reparation or '',
+                    completed_at=afsluttet,
+                    repair_status=afsluttet is not None,
+                    # Sproget kendes ikke (de gamle rapporter blander dansk, engelsk, tysk og polsk),
+                    # så de holdes ude af oversættelseshukommelsen og -cachen
+                    translation_status=FaultReport.TRANSLATION_LEGACY,
+                ))
+            # bulk_create sender ingen signaler, så de gamle rapporter sendes ikke til oversættelse
+            FaultReport.objects.bulk_create(rapporter, batch_size=self.batch_size)
+            # auto_now/auto_now_add har sat nu; de historiske tidspunkter skrives bagefter i samme transaktion
+            for rapport, (oprettet, opdateret) in zip(rapporter, tidspunkter):
+                rapport.created_at, rapport.updated_at = oprettet, opdateret
+            FaultReport.objects.bulk_update(rapporter, ['created_at', 'updated_at'], batch_size=self.batch_size)
+            # Statistikken følger med i samme transaktion som batchen
+            stats.apply(stats.created(rapporter))
+            return len(rapporter)
+
+        self._importer('FaultReports', "Description, MachineID, RepairReport, CompletedAt, ReportedAt", gem)
+
+    # Fælles
+
+    def _importer(self, tabel, kolonner, gem, nøgle='ID'):
+        """
+        Læser `kolonner` fra `tabel` i ID-orden fra det sidst gemte ID og kalder
+        gem() med én batch ad gangen (rækkerne starter med ID'et). Batchen og det
+        nye ID gemmes i samme transaktion, så en afbrudt kørsel hverken mister
+        eller gentager rækker.
+        """
+        fremskridt, _ = LegacyImportProgress.objects.get_or_create(table=tabel)
+        (i_alt,) = self.legacy.execute(
+            f"SELECT COUNT(*) FROM {tabel} WHERE {nøgle} > ?", [fremskridt.last_id]
+        ).fetchone()
+        cursor = self.legacy.execute(
+            f"SELECT {nøgle}, {kolonner} FROM {tabel} WHERE {nøgle} > ? ORDER BY {nøgle}", [fremskridt.last_id]
+        )
+
+        start = sidst_vist = time.perf_counter()
+        læst = oprettet = 0
+        while rækker := cursor.fetchmany(self.batch_size):
+            with transaction.atomic():
+                antal = gem(rækker)
+                LegacyImportProgress.objects.filter(pk=fremskridt.pk).update(
+                    last_id=rækker[-1][0], imported=F('imported') + antal, updated_at=timezone.now()
+                )
+            # Med DEBUG=True gemmer Django ellers de sidste 9000 INSERTs i hukommelsen
+            reset_queries()
+            læst += len(rækker)
+            oprettet += antal
+            if time.perf_counter() - sidst_vist >= 1:
+                sidst_vist = time.perf_counter()
+                self.stdout.write(f"  {tabel}: {læst}/{i_alt} ({læst / (sidst_vist - start):.0f} rækker/s)")
+        cursor.close()
+
+        varighed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{tabel}: {læst} nye rækker læst på {varighed:.1f} s "
+            f"({læst / varighed if varighed else 0:.0f} rækker/s), {oprettet} importeret, "
+            f"{læst - oprettet} sprunget over"
+        ))
+
+    def _vpid(self, maskine):
+        """MachineID er i praksis VPID'en som tekst; ældre rækker kan have Maskinliste.ID."""
+        if isinstance(maskine, int):
+            return self._maskiner_fra_legacy().get(maskine, str(maskine))
+        return str(maskine or '').strip()
+
+    def _aktiv_id(self, maskine):
+        if self._maskiner is None:
+            self._maskiner = dict(Asset.objects.values_list('VPID', 'pk'))
+        return self._maskiner.get(self._vpid(maskine))
+
+    def _udstyr_id(self, udstyr):
+        if self._udstyr is None:
+            navne = dict(self.legacy.execute("SELECT ID, trim(Navn) FROM Udstyr"))
+            pk = dict(Equipment.objects.filter(name__in=set(navne.values())).values_list('name', 'pk'))
+            self._udstyr = {legacy_id: pk.get(navn) for legacy_id, navn in navne.items()}
+        return self._udstyr.get(udstyr)
+
+    def _maskiner_fra_legacy(self):
+        if self._legacy_vpid is None:
+            self._legacy_vpid = dict(self.legacy.execute("SELECT ID, trim(VPID) FROM Maskinliste"))
+        return self._legacy_vpid
+
+
+def _tidspunkt(værdi):
+    """De gamle tidsstempler er naive 'YYYY-MM-DD HH:MM:SS' i lokal tid."""
+    if not værdi:
+        return None
+    try:
+        tidspunkt = datetime.fromisoformat(str(værdi).strip())
+    except ValueError:
+        return None
+    return timezone.make_aware(tidspunkt) if timezone.is_naive(tidspunkt) else tidspunkt
@@ -0,0 +1,53 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import reset_queries, transaction
+from assets import stats
+from assets.models import Asset, FaultReport
+from assets.resolver import index
+
+
+class Command(BaseCommand):
+    help = (
+        "Kobler fejlrapporter uden aktiv til aktivet med deres VPID (samme normalisering "
+        "som ved indsendelse). Går rapporterne igennem i batches efter id; rapporter hvis "
+        "VPID ikke findes, springes over og kan kobles ved en senere kørsel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rapporter pr. batch (standard: 1000)")
+        parser.add_argument('--dry-run', action='store_true', help="Tæl kun, gem intet")
+
+    def handle(self, *args, **options):
+        index.invalidate()
+        rapporter = FaultReport.objects.filter(asset__isnull=True).exclude(vpid='').order_by('pk')
+        start = time.perf_counter()
+        sidste_pk = 0
+        læst = koblet = 0
+        felter = ('vpid', *stats.STAT_FIELDS)
+        while batch := list(rapporter.filter(pk__gt=sidste_pk).values('pk', *felter)[:options['batch_size']]):
+            sidste_pk = batch[-1]['pk']
+            koblinger = {
+                række['pk']: (række, asset_id)
+                for række in batch if (asset_id := index.resolve(række['vpid'])) is not None
+            }
+            if not options['dry_run'] and koblinger:
+                # Ét UPDATE med CASE pr. batch, og statistikken flyttes fra "intet aktiv" i samme transaktion
+                lokationer = dict(Asset.objects.filter(
+                    pk__in={asset_id for _, asset_id in koblinger.values()}).values_list('pk', 'location'))
+                with transaction.atomic():
+                    FaultReport.objects.bulk_update(
+                        [FaultReport(pk=pk, asset_id=asset_id) for pk, (_, asset_id) in koblinger.items()], ['asset']
+                    )
+                    stats.apply(stats.merge(*(
+                        stats.delta(række, {**række, 'asset_id': asset_id, 'asset__location': lokationer.get(asset_id, '')})
+                        for række, asset_id in koblinger.values()
+                    )))
+            reset_queries()
+            læst += len(batch)
+            koblet += len(koblinger)
+
+        varighed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{læst} rapporter uden aktiv gennemgået på {varighed:.1f} s: {koblet} "
+            f"{'kan kobles' if options['dry_run'] else 'koblet'}, {læst - koblet} med ukendt VPID"
+        ))
@@ -0,0 +1,37 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from assets.qr_labels import iter_label_sheets, label_queryset
+
+
+class Command(BaseCommand):
+    help = "Laver QR-etiketark (A4, HTML med SVG) til mange aktiver, fx før sæsonen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Aktiv-ID'er (standard: alle, der matcher filtrene)")
+        parser.add_argument('--category', help="Kategori-ID eller -navn")
+        parser.add_argument('--location', help="Lokation")
+        parser.add_argument('--active', dest='is_active', action='store_true', default=None, help="Kun aktive")
+        parser.add_argument('--inactive', dest='is_active', action='store_false', help="Kun inaktive")
+        parser.add_argument('--workers', type=int, help="Antal processer (standard: QR_LABELS['WORKERS'] / CPU-kerner; 0 = uden pulje)")
+        parser.add_argument('-o', '--output', help="Fil at skrive til (standard: stdout)")
+
+    def handle(self, *args, **options):
+        assets = label_queryset(
+            ids=options['ids'], category=options['category'],
+            location=options['location'], is_active=options['is_active'],
+        )
+        antal = assets.count()
+        start = time.perf_counter()
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in iter_label_sheets(assets, workers=options['workers']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output']:
+            varighed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f"{antal} etiketter skrevet til {options['output']} på {varighed:.1f} s"
+            ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from assets.image_processing import needs_processing, process_image
+from assets.models import Asset, FaultReport
+
+
+class Command(BaseCommand):
+    help = "Nedskalerer/genkoder eksisterende billeder og laver manglende miniaturer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['asset', 'faultreport'], help="Kun én model (standard: begge)")
+
+    def handle(self, *args, **options):
+        models = [Asset, FaultReport]
+        if options['model']:
+            models = [m for m in models if m._meta.model_name == options['model']]
+
+        for model in models:
+            behandlet = fejlet = 0
+            rows = model.objects.exclude(image='').only('pk', 'image', 'image_thumbnail').order_by('pk')
+            for instance in rows.iterator(chunk_size=200):
+                if not needs_processing(instance):
+                    continue
+                try:
+                    if process_image(model._meta.label, instance.pk):
+                        behandlet += 1
+                except Exception as e:
+                    fejlet += 1
+                    self.stderr.write(f"{model._meta.verbose_name} {instance.pk}: {e}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.verbose_name_plural}: {behandlet} billeder behandlet, {fejlet} fejlede."
+            ))
@@ -0,0 +1,22 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from assets import catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Sletter gamle tombstones for slettede aktiver. Tablets, der ikke har "
+        "synkroniseret siden, henter hele kataloget forfra."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'ASSET_SYNC', {}).get('TOMBSTONE_DAYS', 90),
+            help="Behold tombstones så mange dage"
+        )
+
+    def handle(self, *args, **options):
+        slettet = catalog.prune_tombstones(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"{slettet} tombstones slettet."))
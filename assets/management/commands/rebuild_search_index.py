@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from assets import search
+
+
+class Command(BaseCommand):
+    help = "Genopbygger FTS5-søgeindekset over aktiver (bruges af /api/assets/?search=)."
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError("Databasen har ikke FTS5-indekset; søgningen bruger icontains i stedet.")
+        start = time.perf_counter()
+        antal = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"{antal} aktiver indekseret på {time.perf_counter() - start:.1f} s"
+        ))
@@ -0,0 +1,77 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+import translator
+from assets.models import FaultReport
+from assets.translation_worker import save_translations, translation_rows, ui_languages
+
+
+class Command(BaseCommand):
+    help = (
+        "Genoversætter fejlrapporter i batches (fx efter en modelopgradering) til alle UI-sprog. "
+        "Som standard kun rapporter hvor oversættelsen fejlede eller mangler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Genoversæt alle rapporter med en original beskrivelse")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Antal rapporter pr. batch (standard: 200)")
+        parser.add_argument(
+            '--ignore-cache', action='store_true',
+            help="Spring oversættelsescachen over (nødvendigt efter en modelopgradering)"
+        )
+
+    def handle(self, *args, **options):
+        reports = FaultReport.objects.exclude(original_description__isnull=True).exclude(original_description='')
+        if not options['all']:
+            reports = reports.filter(
+                Q(description__startswith="[Oversættelse fejlede")
+                | Q(translation_status__in=[FaultReport.TRANSLATION_PENDING, FaultReport.TRANSLATION_FAILED])
+            )
+        # Id'erne hentes først, så opdateringerne ikke ændrer den forespørgsel der læses fra
+        ids = list(reports.order_by('pk').values_list('pk', flat=True))
+
+        start = time.perf_counter()
+        behandlet = fejlet = 0
+        størrelse = options['chunk_size']
+        for i in range(0, len(ids), størrelse):
+            chunk = list(
+                FaultReport.objects.filter(pk__in=ids[i:i + størrelse]).order_by('pk')
+                .only('id', 'original_description', 'sprog', 'description')
+            )
+            fejlet += self._oversæt_chunk(chunk, options['ignore_cache'])
+            behandlet += len(chunk)
+            if i + størrelse < len(ids):
+                self._rapporter(behandlet, fejlet, start)
+
+        self._rapporter(behandlet, fejlet, start, style=self.style.SUCCESS)
+
+    def _oversæt_chunk(self, chunk, ignore_cache):
+        resultater = translator.oversæt_batch_alle(
+            [r.original_description for r in chunk],
+            [r.sprog for r in chunk],
+            ui_languages(),
+            brug_cache=not ignore_cache,
+        )
+        fejlet = 0
+        for report, oversættelser in zip(chunk, resultater):
+            report.description = oversættelser['da']
+            if translator.er_fejlet(report.description):
+                report.translation_status = FaultReport.TRANSLATION_FAILED
+                fejlet += 1
+            else:
+                report.translation_status = FaultReport.TRANSLATION_DONE
+        with transaction.atomic():
+            FaultReport.objects.bulk_update(chunk, ['description', 'translation_status'])
+            save_translations([
+                række
+                for report, oversættelser in zip(chunk, resultater)
+                for række in translation_rows(report.pk, report.sprog, oversættelser)
+            ])
+        return fejlet
+
+    def _rapporter(self, behandlet, fejlet, start, style=None):
+        varighed = time.perf_counter() - start
+        hastighed = behandlet / varighed if varighed else 0
+        linje = f"{behandlet} rapporter genoversat ({fejlet} fejlede) på {varighed:.1f} s — {hastighed:.1f} rapporter/s"
+        self.stdout.write(style(linje) if style else linje)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from assets.models import FaultReport
+from assets.translation_worker import translate_report
+
+
+class Command(BaseCommand):
+    help = "Oversætter alle fejlrapporter der afventer oversættelse (uden om baggrundsworkeren)."
+
+    def handle(self, *args, **options):
+        ids = list(FaultReport.objects.filter(
+            translation_status=FaultReport.TRANSLATION_PENDING
+        ).order_by('created_at').values_list('pk', flat=True))
+        færdige = 0
+        for report_id in ids:
+            if translate_report(report_id):
+                færdige += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{færdige} af {len(ids)} afventende rapporter behandlet ({len(ids) - færdige} prøves igen senere)."
+        ))
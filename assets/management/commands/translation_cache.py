@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+import translator
+from assets.models import FaultReport, TranslationCacheEntry
+
+
+class Command(BaseCommand):
+    help = "Administrer oversættelsescachen: clear, prune, stats eller warm (fra eksisterende fejlrapporter)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['clear', 'prune', 'stats', 'warm'])
+        parser.add_argument(
+            '--retranslate', action='store_true',
+            help="Kør original_description gennem oversæt() i stedet for at genbruge den gemte oversættelse"
+        )
+
+    def handle(self, *args, **options):
+        persistent = translator.cache.persistent
+        action = options['action']
+
+        if action == 'clear':
+            slettet = persistent.clear()
+            translator.cache.ryd()
+            self.stdout.write(self.style.SUCCESS(f"Slettede {slettet} cachede oversættelser."))
+
+        elif action == 'prune':
+            slettet = persistent.prune()
+            self.stdout.write(self.style.SUCCESS(f"Fjernede {slettet} gamle/overskydende oversættelser."))
+
+        elif action == 'stats':
+            rækker = TranslationCacheEntry.objects.count()
+            hits = TranslationCacheEntry.objects.aggregate(total=Sum('hits'))['total'] or 0
+            self.stdout.write(f"Rækker i cache-tabellen: {rækker}")
+            self.stdout.write(f"Hits (persistent, i alt): {hits}")
+
+        elif action == 'warm':
+            self._warm(options['retranslate'])
+
+    def _warm(self, retranslate):
+        reports = (
+            FaultReport.objects.exclude(original_description__isnull=True)
+            .exclude(original_description='')
+            # Importerede rapporter har ukendt sprog og en uoversat beskrivelse
+            .exclude(translation_status=FaultReport.TRANSLATION_LEGACY)
+            .values_list('original_description', 'sprog', 'description')
+        )
+        gemt = 0
+        for original, sprog, description in reports.iterator(chunk_size=500):
+            if sprog == 'da':
+                continue
+            if retranslate:
+                result = translator.oversæt(original, fra_sprog=sprog, mål_sprog='da')
+            else:
+                if not description or translator.er_fejlet(description):
+                    continue
+                translator.cache.gem(translator.cache.nøgle(original, sprog, 'da'), description)
+                result = description
+            if not translator.er_fejlet(result):
+                gemt += 1
+        self.stdout.write(self.style.SUCCESS(f"Forvarmede cachen med {gemt} oversættelser."))
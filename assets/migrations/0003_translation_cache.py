@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_add_sprog_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64, verbose_name='Tekst-hash')),
+                ('source_language', models.CharField(max_length=5, verbose_name='Fra sprog')),
+                ('target_language', models.CharField(max_length=5, verbose_name='Til sprog')),
+                ('translated_text', models.TextField(verbose_name='Oversat tekst')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Hits')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oprettet')),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Sidst brugt')),
+            ],
+            options={
+                'verbose_name': 'Oversættelse i cache',
+                'verbose_name_plural': 'Oversættelser i cache',
+                'constraints': [models.UniqueConstraint(fields=('text_hash', 'source_language', 'target_language'), name='unique_translation_cache_key')],
+            },
+        ),
+    ]
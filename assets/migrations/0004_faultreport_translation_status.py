@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_translation_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faultreport',
+            name='translation_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Oversættelsesforsøg'),
+        ),
+        migrations.AddField(
+            model_name='faultreport',
+            name='translation_status',
+            field=models.CharField(choices=[('pending', 'Afventer'), ('done', 'Oversat'), ('failed', 'Fejlede')], default='done', max_length=10, verbose_name='Oversættelsesstatus'),
+        ),
+    ]
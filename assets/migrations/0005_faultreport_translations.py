@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_faultreport_translation_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaultReportTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=5, verbose_name='Sprog')),
+                ('text', models.TextField(verbose_name='Oversat beskrivelse')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='assets.faultreport', verbose_name='Fejlrapport')),
+            ],
+            options={
+                'verbose_name': 'Oversættelse af fejlrapport',
+                'verbose_name_plural': 'Oversættelser af fejlrapporter',
+                'constraints': [models.UniqueConstraint(fields=('report', 'language'), name='unique_report_translation_language')],
+            },
+        ),
+    ]
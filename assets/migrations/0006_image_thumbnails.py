@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_faultreport_translations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='thumbnails/assets/', verbose_name='Miniature'),
+        ),
+        migrations.AddField(
+            model_name='faultreport',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='thumbnails/fault_reports/', verbose_name='Miniature'),
+        ),
+    ]
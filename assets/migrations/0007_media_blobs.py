@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:41
+
+import assets.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Filnavn')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Størrelse (bytes)')),
+                ('refcount', models.IntegerField(default=0, verbose_name='Referencer')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oprettet')),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Sidst ændret')),
+            ],
+            options={
+                'verbose_name': 'Mediefil',
+                'verbose_name_plural': 'Mediefiler',
+            },
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='image',
+            field=models.ImageField(blank=True, storage=assets.storage.media_blob_storage, upload_to='assets/', verbose_name='Billede'),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, storage=assets.storage.media_blob_storage, upload_to='thumbnails/assets/', verbose_name='Miniature'),
+        ),
+        migrations.AlterField(
+            model_name='faultreport',
+            name='image',
+            field=models.ImageField(blank=True, storage=assets.storage.media_blob_storage, upload_to='fault_reports/', verbose_name='Billede'),
+        ),
+        migrations.AlterField(
+            model_name='faultreport',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, storage=assets.storage.media_blob_storage, upload_to='thumbnails/fault_reports/', verbose_name='Miniature'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+FTS_TABLE = 'assets_asset_fts'
+
+CREATE = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        VPID, name, description,
+        content='assets_asset', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # Triggerne holder indekset i sync, også ved bulk_create/bulk_update og QuerySet.update()
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, VPID, name, description) VALUES (new.id, new.VPID, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, VPID, name, description)
+        VALUES ('delete', old.id, old.VPID, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF VPID, name, description ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, VPID, name, description)
+        VALUES ('delete', old.id, old.VPID, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, VPID, name, description) VALUES (new.id, new.VPID, new.name, new.description);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _has_fts5(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_index(apps, schema_editor):
+    # Andre databaser (og SQLite uden FTS5) bruger den almindelige icontains-søgning
+    if _has_fts5(schema_editor):
+        for sql in CREATE:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0007_media_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
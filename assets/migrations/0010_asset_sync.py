@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0009_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asset_id', models.BigIntegerField(verbose_name='Aktiv-ID')),
+                ('VPID', models.CharField(max_length=100, verbose_name='VPID')),
+                ('sync_version', models.PositiveBigIntegerField(db_index=True, verbose_name='Synkroniseringsversion')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Slettet')),
+            ],
+            options={
+                'verbose_name': 'Slettet aktiv',
+                'verbose_name_plural': 'Slettede aktiver',
+            },
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Sidst ændret'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Katalogversionen da aktivet sidst blev ændret (bruges af /api/assets/changes/)', verbose_name='Synkroniseringsversion'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['sync_version', 'id'], name='asset_sync_version_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:55
+
+import logging
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_vpids(apps, schema_editor):
+    """
+    Gør VPID unik før indekset oprettes. For hver VPID beholdes aktivet med
+    laveste id; fejlrapporter og udstyr flyttes over til det, og dubletterne
+    omdøbes til "<VPID>~dup<id>" og deaktiveres (intet slettes).
+    """
+    Asset = apps.get_model('assets', 'Asset')
+    FaultReport = apps.get_model('assets', 'FaultReport')
+    CatalogVersion = apps.get_model('assets', 'CatalogVersion')
+    dubletter = (
+        Asset.objects.values('VPID').annotate(antal=Count('id')).filter(antal__gt=1).values_list('VPID', flat=True)
+    )
+    AssetEquipment = Asset.equipment.through
+    omdøbte = []
+    for vpid in list(dubletter):
+        beholdes, *andre = Asset.objects.filter(VPID=vpid).order_by('id')
+        for asset in andre:
+            FaultReport.objects.filter(asset=asset).update(asset=beholdes)
+            udstyr = set(AssetEquipment.objects.filter(asset=asset).values_list('equipment_id', flat=True))
+            udstyr -= set(AssetEquipment.objects.filter(asset=beholdes).values_list('equipment_id', flat=True))
+            AssetEquipment.objects.bulk_create(
+                [AssetEquipment(asset_id=beholdes.pk, equipment_id=e) for e in udstyr]
+            )
+            omdøbte.append(asset.pk)
+            # VPID'en afkortes, ikke endelsen, så navnene forbliver unikke
+            endelse = f"~dup{asset.pk}"
+            Asset.objects.filter(pk=asset.pk).update(VPID=vpid[:100 - len(endelse)] + endelse, is_active=False)
+    if omdøbte:
+        # Ny katalogversion, så tablets med et lokalt katalog henter de omdøbte aktiver
+        CatalogVersion.objects.get_or_create(key='assets')
+        CatalogVersion.objects.filter(key='assets').update(version=F('version') + 1)
+        version = CatalogVersion.objects.get(key='assets').version
+        Asset.objects.filter(pk__in=omdøbte).update(sync_version=version)
+        logger.warning("%d aktiver med dublet-VPID omdøbt til <VPID>~dup<id>", len(omdøbte))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0010_asset_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_vpids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='asset',
+            name='VPID',
+            field=models.CharField(max_length=100, unique=True, verbose_name='VPID'),
+        ),
+        migrations.AddIndex(
+            model_name='faultreport',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['assigned_to', '-priority', 'created_at'], name='report_open_by_mechanic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faultreport',
+            index=models.Index(fields=['-priority', '-created_at'], name='report_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faultreport',
+            index=models.Index(fields=['status', '-priority', '-created_at'], name='report_status_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faultreport',
+            index=models.Index(condition=models.Q(('translation_status', 'pending')), fields=['id'], name='report_translation_pending_idx'),
+        ),
+    ]
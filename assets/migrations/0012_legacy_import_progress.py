@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegacyImportProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=50, unique=True, verbose_name='Tabel')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Sidste ID')),
+                ('imported', models.PositiveBigIntegerField(default=0, verbose_name='Importeret')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Sidst ændret')),
+            ],
+            options={
+                'verbose_name': 'Legacy-import',
+                'verbose_name_plural': 'Legacy-importer',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0012_legacy_import_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faultreport',
+            name='client_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='Klientnøgle'),
+        ),
+    ]
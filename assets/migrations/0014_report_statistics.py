@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0013_faultreport_client_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'I alt'), ('priority', 'Prioritet'), ('asset', 'Aktiv'), ('location', 'Lokation'), ('mechanic', 'Mekaniker')], max_length=20, verbose_name='Dimension')),
+                ('key', models.CharField(blank=True, max_length=100, verbose_name='Nøgle')),
+                ('open_count', models.BigIntegerField(default=0, verbose_name='Åbne')),
+                ('started_count', models.BigIntegerField(default=0, verbose_name='Påbegyndt')),
+                ('start_seconds', models.BigIntegerField(default=0, verbose_name='Sekunder til start (sum)')),
+                ('completed_count', models.BigIntegerField(default=0, verbose_name='Afsluttet')),
+                ('complete_seconds', models.BigIntegerField(default=0, verbose_name='Sekunder til afslutning (sum)')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sidst ændret')),
+            ],
+            options={
+                'verbose_name': 'Rapportstatistik',
+                'verbose_name_plural': 'Rapportstatistik',
+                'indexes': [models.Index(fields=['dimension', '-open_count'], name='report_stat_open_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unique_report_statistic')],
+            },
+        ),
+    ]
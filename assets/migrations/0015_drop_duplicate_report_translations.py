@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import F, Q
+
+
+def drop_duplicates(apps, schema_editor):
+    """
+    Dansk står i FaultReport.description og kildesproget i original_description;
+    de samme tekster som FaultReportTranslation-rækker slettes, så der kun er én kilde.
+    """
+    FaultReportTranslation = apps.get_model('assets', 'FaultReportTranslation')
+    FaultReportTranslation.objects.filter(Q(language='da') | Q(language=F('report__sprog'))).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0014_report_statistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+    ]
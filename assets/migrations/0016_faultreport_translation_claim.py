@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0015_drop_duplicate_report_translations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faultreport',
+            name='translation_claim',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='faultreport',
+            name='translation_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0016_faultreport_translation_claim'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='faultreport',
+            name='translation_status',
+            field=models.CharField(choices=[('pending', 'Afventer'), ('done', 'Oversat'), ('failed', 'Fejlede'), ('legacy', 'Ikke oversat (importeret)')], default='done', max_length=10, verbose_name='Oversættelsesstatus'),
+        ),
+    ]
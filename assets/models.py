@@ -1,10 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Q, Value, When
 from django.utils.translation import gettext_lazy as _
 from django.core.files.base import ContentFile
-from io import BytesIO
-import qrcode
 from django.utils import timezone
 from django.contrib.auth.models import User
+from .storage import media_blob_storage
 
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name=_("Kategori"))
@@ -17,7 +17,7 @@ class Category(models.Model):
         return self.name
 
 class Asset(models.Model):
-    VPID = models.CharField(max_length=100, verbose_name=_("VPID"))
+    VPID = models.CharField(max_length=100, unique=True, verbose_name=_("VPID"))
     name = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Navn"))
     description = models.TextField(verbose_name=_("Beskrivelse"))
     category = models.ForeignKey(
@@ -28,7 +28,11 @@ class Asset(models.Model):
         verbose_name=_("Kategori")
     )
     location = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Lokation"))
-    image = models.ImageField(upload_to='assets/', blank=True, verbose_name=_("Billede"))
+    image = models.ImageField(upload_to='assets/', storage=media_blob_storage, blank=True, verbose_name=_("Billede"))
+    image_thumbnail = models.ImageField(
+        upload_to='thumbnails/assets/', storage=media_blob_storage, blank=True, editable=False,
+        verbose_name=_("Miniature")
+    )
     qr_code = models.ImageField(upload_to='qrcodes/', blank=True, null=True, verbose_name=_("QR-kode"))
     is_active = models.BooleanField(default=True, verbose_name=_("Aktiv"))
     last_inspection_date = models.DateField(
@@ -49,29 +53,36 @@ class Asset(models.Model):
         blank=True,
         help_text=_("Udstyr monteret på dette aktiv")
     )
+    modified_at = models.DateTimeField(auto_now=True, verbose_name=_("Sidst ændret"))
+    sync_version = models.PositiveBigIntegerField(
+        default=0, editable=False, verbose_name=_("Synkroniseringsversion"),
+        help_text=_("Katalogversionen da aktivet sidst blev ændret (bruges af /api/assets/changes/)")
+    )
 
     class Meta:
         verbose_name = _("Aktiv")
         verbose_name_plural = _("Aktiver")
+        indexes = [
+            models.Index(fields=['sync_version', 'id'], name='asset_sync_version_idx'),
+        ]
 
     def __str__(self):
         return f"{self.VPID} - {self.name}"
 
     def save(self, *args, **kwargs):
+        from . import catalog
+
         if not self.qr_code:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(self.VPID)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            self.qr_code.save(f'qr_{self.VPID}.png', ContentFile(buffer.getvalue()), save=False)
-        super().save(*args, **kwargs)
+            from .qr_utils import qr_payload, render_qr
+            png = render_qr(qr_payload(self.VPID), 'png').content
+            self.qr_code.save(f'qr_{self.VPID}.png', ContentFile(png), save=False)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'sync_version', 'modified_at'}
+        # Versionen tages i samme transaktion som gemningen, så en klient aldrig
+        # får et sync-token, der er nyere end en ændring den ikke kan se endnu
+        with transaction.atomic():
+            self.sync_version = catalog.bump(catalog.ASSETS)
+            super().save(*args, **kwargs)
 
 class Equipment(models.Model):
     name = models.CharField(max_length=100, verbose_name=_("Navn"))  # Rettet fra "Navn" → "name"
@@ -84,12 +95,42 @@ class Equipment(models.Model):
     def __str__(self):
         return self.name  # Rettet fra "Navn" → "name"
 
+class FaultReportQuerySet(models.QuerySet):
+    def with_current_status(self):
+        """Annoterer current_status_code (FaultReport.CURRENT_*), så status kan sorteres og filtreres i SQL."""
+        return self.annotate(current_status_code=Case(
+            When(completed_at__isnull=False, then=Value(FaultReport.CURRENT_DONE)),
+            When(started_at__isnull=False, then=Value(FaultReport.CURRENT_STARTED)),
+            When(assigned_to__isnull=False, then=Value(FaultReport.CURRENT_ASSIGNED)),
+            default=Value(FaultReport.CURRENT_NEW),
+            output_field=models.IntegerField(),
+        ))
+
 class FaultReport(models.Model):
     LANGUAGE_CHOICES = [
         ('de', _("Tysk")),
         ('pl', _("Polsk")),
         ('en', _("Engelsk")),
     ]
+    TRANSLATION_PENDING = 'pending'
+    TRANSLATION_DONE = 'done'
+    TRANSLATION_FAILED = 'failed'
+    # Importeret fra det gamle system: sproget kendes ikke, og beskrivelsen er aldrig oversat
+    TRANSLATION_LEGACY = 'legacy'
+    TRANSLATION_STATUS_CHOICES = [
+        (TRANSLATION_PENDING, _("Afventer")),
+        (TRANSLATION_DONE, _("Oversat")),
+        (TRANSLATION_FAILED, _("Fejlede")),
+        (TRANSLATION_LEGACY, _("Ikke oversat (importeret)")),
+    ]
+    # Forløbet udledt af tidsstemplerne (current_status); i rækkefølge, så det kan sorteres
+    CURRENT_NEW, CURRENT_ASSIGNED, CURRENT_STARTED, CURRENT_DONE = range(4)
+    CURRENT_STATUS_CHOICES = [
+        (CURRENT_NEW, _("Ny")),
+        (CURRENT_ASSIGNED, _("Tildelt")),
+        (CURRENT_STARTED, _("Igang")),
+        (CURRENT_DONE, _("Færdig")),
+    ]
 
     title = models.CharField(max_length=100, verbose_name=_("Titel"))
     description = models.TextField(verbose_name=_("Beskrivelse (oversat)"))
@@ -100,11 +141,25 @@ class FaultReport(models.Model):
         default='de',
         verbose_name=_("Originalt sprog")
     )
+    translation_status = models.CharField(
+        max_length=10,
+        choices=TRANSLATION_STATUS_CHOICES,
+        default=TRANSLATION_DONE,
+        verbose_name=_("Oversættelsesstatus")
+    )
+    translation_attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Oversættelsesforsøg"))
+    # Sat af den worker der er i gang med at oversætte rapporten (se translation_worker.claim_reports)
+    translation_claim = models.CharField(max_length=32, blank=True, default='', editable=False)
+    translation_claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Oprettet"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Opdateret"))
     status = models.CharField(max_length=100, blank=True, verbose_name=_("Status"))
     qr_code = models.CharField(max_length=100, blank=True, default="", verbose_name=_("QR-kode"))
-    image = models.ImageField(upload_to='fault_reports/', blank=True, verbose_name=_("Billede"))
+    image = models.ImageField(upload_to='fault_reports/', storage=media_blob_storage, blank=True, verbose_name=_("Billede"))
+    image_thumbnail = models.ImageField(
+        upload_to='thumbnails/fault_reports/', storage=media_blob_storage, blank=True, editable=False,
+        verbose_name=_("Miniature")
+    )
     repair_status = models.BooleanField(default=False, verbose_name=_("Reparationsstatus"))
     machine = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Maskine"))
     location = models.CharField(max_length=100, blank=True, default="", verbose_name=_("Lokation"))
@@ -155,11 +210,32 @@ class FaultReport(models.Model):
         default=False,
         verbose_name=_("Godkendt")
     )
+    # Tablettens idempotensnøgle for rapporter sendt via /api/reports/batch/, så en gentaget afsendelse ikke giver dubletter
+    client_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False, verbose_name=_("Klientnøgle")
+    )
+
+    objects = FaultReportQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Fejlrapport")
         verbose_name_plural = _("Fejlrapporter")
         ordering = ['-priority', '-created_at']
+        indexes = [
+            # mechanic_view: åbne rapporter for én mekaniker, sorteret efter prioritet og alder
+            models.Index(
+                fields=['assigned_to', '-priority', 'created_at'],
+                condition=Q(completed_at__isnull=True), name='report_open_by_mechanic_idx'
+            ),
+            # Standardsorteringen (admin, lister)
+            models.Index(fields=['-priority', '-created_at'], name='report_queue_idx'),
+            # Admin-filteret på status med standardsorteringen
+            models.Index(fields=['status', '-priority', '-created_at'], name='report_status_queue_idx'),
+            # Oversættelses-workeren genoptager afventende rapporter ved opstart
+            models.Index(
+                fields=['id'], condition=Q(translation_status='pending'), name='report_translation_pending_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.asset.VPID if self.asset else self.vpid}: {self.title} ({self.get_priority_display()})"
@@ -170,13 +246,177 @@ class FaultReport(models.Model):
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
 
+    def description_in(self, language):
+        """
+        Beskrivelsen på det givne sprog (fx get_language()). Dansk står kun i
+        `description` og rapportens eget sprog kun i `original_description`; de
+        øvrige sprog i `translations` (den forhentede, når den er prefetchet).
+        Falder tilbage til den danske beskrivelse.
+        """
+        language = (language or 'da')[:2]
+        if language == self.sprog and self.original_description:
+            return self.original_description
+        if language != 'da':
+            for translation in self.translations.all():
+                if translation.language == language:
+                    return translation.text
+        return self.description or self.original_description or ''
+
+    def get_current_status_code(self):
+        """Forløbet (CURRENT_*); bruger with_current_status()-annotationen når den findes."""
+        code = getattr(self, 'current_status_code', None)
+        if code is not None:
+            return code
+        if self.completed_at:
+            return self.CURRENT_DONE
+        if self.started_at:
+            return self.CURRENT_STARTED
+        if self.assigned_to_id:
+            return self.CURRENT_ASSIGNED
+        return self.CURRENT_NEW
+
     @property
     def current_status(self):
-        if self.completed_at:
-            return _("Færdig")
-        elif self.started_at:
-            return _("Igang")
-        elif self.assigned_to:
-            return _("Tildelt")
-        else:
-            return _("Ny")
+        return dict(self.CURRENT_STATUS_CHOICES)[self.get_current_status_code()]
+
+class FaultReportTranslation(models.Model):
+    """
+    Beskrivelsen af en fejlrapport oversat til ét af UI-sprogene (settings.LANGUAGES).
+    Ikke dansk (FaultReport.description) eller rapportens eget sprog (original_description).
+    """
+    report = models.ForeignKey(
+        'FaultReport', on_delete=models.CASCADE, related_name='translations', verbose_name=_("Fejlrapport")
+    )
+    language = models.CharField(max_length=5, verbose_name=_("Sprog"))
+    text = models.TextField(verbose_name=_("Oversat beskrivelse"))
+
+    class Meta:
+        verbose_name = _("Oversættelse af fejlrapport")
+        verbose_name_plural = _("Oversættelser af fejlrapporter")
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'language'], name='unique_report_translation_language'),
+        ]
+
+    def __str__(self):
+        return f"{self.language}: {self.text[:50]}"
+
+class TranslationCacheEntry(models.Model):
+    """Persistent oversættelsescache (andet lag bag LRU'en i translator.py)."""
+    text_hash = models.CharField(max_length=64, verbose_name=_("Tekst-hash"))
+    source_language = models.CharField(max_length=5, verbose_name=_("Fra sprog"))
+    target_language = models.CharField(max_length=5, verbose_name=_("Til sprog"))
+    translated_text = models.TextField(verbose_name=_("Oversat tekst"))
+    hits = models.PositiveIntegerField(default=0, verbose_name=_("Hits"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Oprettet"))
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name=_("Sidst brugt"))
+
+    class Meta:
+        verbose_name = _("Oversættelse i cache")
+        verbose_name_plural = _("Oversættelser i cache")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['text_hash', 'source_language', 'target_language'],
+                name='unique_translation_cache_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source_language}→{self.target_language}: {self.translated_text[:50]}"
+
+class MediaBlob(models.Model):
+    """Én fil i den indholdsadresserede mediestorage (assets/storage.py) med antal referencer."""
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name=_("SHA-256"))
+    name = models.CharField(max_length=255, unique=True, verbose_name=_("Filnavn"))
+    size = models.PositiveBigIntegerField(default=0, verbose_name=_("Størrelse (bytes)"))
+    refcount = models.IntegerField(default=0, verbose_name=_("Referencer"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Oprettet"))
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name=_("Sidst ændret"))
+
+    class Meta:
+        verbose_name = _("Mediefil")
+        verbose_name_plural = _("Mediefiler")
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
+
+class CatalogVersion(models.Model):
+    """Tæller der øges ved hver ændring af et katalog (fx aktiverne); bruges til billige ETags."""
+    key = models.CharField(max_length=50, unique=True, verbose_name=_("Katalog"))
+    version = models.PositiveBigIntegerField(default=0, verbose_name=_("Version"))
+
+    class Meta:
+        verbose_name = _("Katalogversion")
+        verbose_name_plural = _("Katalogversioner")
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
+
+class AssetTombstone(models.Model):
+    """Markerer et slettet aktiv, så tablets med et lokalt katalog også fjerner det."""
+    asset_id = models.BigIntegerField(verbose_name=_("Aktiv-ID"))
+    VPID = models.CharField(max_length=100, verbose_name=_("VPID"))
+    sync_version = models.PositiveBigIntegerField(db_index=True, verbose_name=_("Synkroniseringsversion"))
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name=_("Slettet"))
+
+    class Meta:
+        verbose_name = _("Slettet aktiv")
+        verbose_name_plural = _("Slettede aktiver")
+
+    def __str__(self):
+        return f"{self.VPID} (slettet {self.deleted_at:%Y-%m-%d})"
+
+class LegacyImportProgress(models.Model):
+    """Hvor langt import_legacy er nået i en tabel fra den gamle service_system.db."""
+    table = models.CharField(max_length=50, unique=True, verbose_name=_("Tabel"))
+    last_id = models.BigIntegerField(default=0, verbose_name=_("Sidste ID"))
+    imported = models.PositiveBigIntegerField(default=0, verbose_name=_("Importeret"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Sidst ændret"))
+
+    class Meta:
+        verbose_name = _("Legacy-import")
+        verbose_name_plural = _("Legacy-importer")
+
+    def __str__(self):
+        return f"{self.table}: {self.last_id}"
+
+class ReportStatistic(models.Model):
+    """
+    Løbende optælling af fejlrapporter for én dimension og nøgle (fx prioritet 1
+    eller én mekaniker) til dashboardet. Holdes ajour af assets/stats.py, når
+    rapporter oprettes eller skifter status, og rettes af reconcile_report_stats.
+    """
+    TOTAL = 'total'
+    PRIORITY = 'priority'
+    ASSET = 'asset'
+    LOCATION = 'location'
+    MECHANIC = 'mechanic'
+    DIMENSION_CHOICES = [
+        (TOTAL, _("I alt")),
+        (PRIORITY, _("Prioritet")),
+        (ASSET, _("Aktiv")),
+        (LOCATION, _("Lokation")),
+        (MECHANIC, _("Mekaniker")),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES, verbose_name=_("Dimension"))
+    key = models.CharField(max_length=100, blank=True, verbose_name=_("Nøgle"))
+    open_count = models.BigIntegerField(default=0, verbose_name=_("Åbne"))
+    started_count = models.BigIntegerField(default=0, verbose_name=_("Påbegyndt"))
+    start_seconds = models.BigIntegerField(default=0, verbose_name=_("Sekunder til start (sum)"))
+    completed_count = models.BigIntegerField(default=0, verbose_name=_("Afsluttet"))
+    complete_seconds = models.BigIntegerField(default=0, verbose_name=_("Sekunder til afslutning (sum)"))
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name=_("Sidst ændret"))
+
+    class Meta:
+        verbose_name = _("Rapportstatistik")
+        verbose_name_plural = _("Rapportstatistik")
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_report_statistic'),
+        ]
+        indexes = [
+            # Dashboardets top-lister: flest åbne rapporter pr. aktiv/mekaniker
+            models.Index(fields=['dimension', '-open_count'], name='report_stat_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.open_count} åbne"
@@ -0,0 +1,180 @@
+"""
+QR-rendering i en procespulje: etiketark til print (A4-sider med QR-kode,
+VPID og navn) og PNG'er til Asset.qr_code efter en masseimport.
+
+Siderne renderes parallelt og skrives ud én side ad gangen, så selv et par
+tusinde aktiver aldrig ligger i hukommelsen på én gang. Puljen bruges kun af
+management-kommandoerne; etiketarket i webappen renderes i requestets egen
+proces (workers=0), så en webserver-proces aldrig forker med åbne
+databaseforbindelser og tråde. Puljens processer startes med spawn og
+importerer dette modul uden at Django er sat op; derfor importeres modellerne
+inde i funktionerne.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from io import BytesIO
+from itertools import islice
+import segno
+from django.conf import settings
+
+_pool = None
+
+
+def label_settings():
+    return {
+        'COLUMNS': 3,        # Etiketter pr. række (70 x 37 mm-ark: 3 x 8)
+        'ROWS': 8,
+        'WORKERS': None,     # Processer i puljen (None = antal CPU-kerner, 0 = ingen pulje)
+        **getattr(settings, 'QR_LABELS', {}),
+    }
+
+
+def _new_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _get_pool(workers=None):
+    """
+    Den delte pulje, eller en midlertidig hvis der bedes om et bestemt antal
+    processer. workers=0 giver (None, 0): render i denne proces.
+    """
+    global _pool
+    delt = workers is None
+    if delt:
+        workers = label_settings()['WORKERS']
+        if workers is None:
+            workers = os.cpu_count()
+    if workers == 0:
+        return None, 0
+    if not delt:
+        return _new_pool(workers), workers
+    if _pool is None:
+        _pool = _new_pool(workers)
+    return _pool, workers
+
+
+def render_symbol(payload, fmt='png', size=370, border=4):
+    """Selve QR-koden som PNG- eller SVG-bytes, højst `size` pixels bred. Kun segno."""
+    qr = segno.make_qr(payload, error='l')  # Aldrig Micro QR; dem kan telefonernes scannere ikke læse
+    scale = max(1, size // qr.symbol_size(scale=1, border=border)[0])
+    buffer = BytesIO()
+    if fmt == 'svg':
+        qr.save(buffer, kind='svg', scale=scale, border=border, xmldecl=False, svgns=True)
+    else:
+        qr.save(buffer, kind='png', scale=scale, border=border)
+    return buffer.getvalue()
+
+
+def render_pngs(payloads, size=370, workers=None):
+    """Renderer mange PNG'er parallelt; giver bytes tilbage i samme rækkefølge som payloads."""
+    pool, workers = _get_pool(workers)
+    if pool is None:
+        yield from (render_symbol(payload, 'png', size) for payload in payloads)
+        return
+    try:
+        yield from pool.map(render_symbol, payloads, ['png'] * len(payloads), [size] * len(payloads),
+                            chunksize=max(1, len(payloads) // (4 * workers)))
+    finally:
+        if pool is not _pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def label_queryset(ids=None, category=None, location=None, is_active=None):
+    """Aktiverne der skal laves etiketter til, sorteret efter VPID."""
+    from .models import Asset
+
+    assets = Asset.objects.all()
+    if ids:
+        assets = assets.filter(pk__in=ids)
+    if category:
+        assets = assets.filter(category_id=category) if str(category).isdigit() else assets.filter(
+            category__name__iexact=category
+        )
+    if location:
+        assets = assets.filter(location__iexact=location)
+    if is_active is not None:
+        assets = assets.filter(is_active=is_active)
+    return assets.order_by('VPID', 'pk')
+
+
+def render_page(labels):
+    """Renderer én side som HTML ud fra (payload, VPID, navn). Kører i puljen, så den må kun bruge segno."""
+    celler = []
+    for payload, vpid, name in labels:
+        svg = segno.make_qr(payload, error='l').svg_inline(scale=1, border=2, omitsize=True)
+        celler.append(
+            f'<div class="label">{svg}<div class="caption"><strong>{escape(vpid)}</strong>'
+            f'<span>{escape(name)}</span></div></div>'
+        )
+    return f'<section class="sheet">{"".join(celler)}</section>\n'
+
+
+def _pages(assets, per_page):
+    from .qr_utils import qr_payload
+
+    rows = assets.values_list('VPID', 'name').iterator(chunk_size=per_page * 4)
+    while True:
+        page = [(qr_payload(vpid), vpid, name) for vpid, name in islice(rows, per_page)]
+        if not page:
+            return
+        yield page
+
+
+def _header(columns, rows, title):
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{escape(title)}</title>
+<style>
+    @page {{ size: A4; margin: 0; }}
+    body {{ margin: 0; font-family: Arial, sans-serif; }}
+    .sheet {{
+        width: 210mm; height: 297mm; box-sizing: border-box; padding: 8mm 0;
+        display: grid; grid-template-columns: repeat({columns}, 1fr); grid-template-rows: repeat({rows}, 1fr);
+        page-break-after: always; break-after: page;
+    }}
+    .label {{ display: flex; align-items: center; gap: 2mm; padding: 2mm 4mm; overflow: hidden; }}
+    .label svg {{ width: 28mm; height: 28mm; flex: none; }}
+    .caption {{ display: flex; flex-direction: column; font-size: 9pt; overflow: hidden; }}
+    .caption strong {{ font-size: 12pt; }}
+</style>
+</head>
+<body>
+"""
+
+
+def iter_label_sheets(assets, columns=None, rows=None, workers=None, title="QR-etiketter"):
+    """
+    Genererer HTML-dokumentet som strenge: først hovedet, derefter én side ad
+    gangen i rækkefølge. Højst to sider pr. proces er undervejs ad gangen.
+    workers=0 renderer siderne i denne proces uden pulje (webappen).
+    """
+    cfg = label_settings()
+    columns = columns or cfg['COLUMNS']
+    rows = rows or cfg['ROWS']
+    pool, workers = _get_pool(workers)
+    if pool is None:
+        yield _header(columns, rows, title)
+        for page in _pages(assets, columns * rows):
+            yield render_page(page)
+        yield "</body>\n</html>\n"
+        return
+    i_gang = deque()
+    try:
+        yield _header(columns, rows, title)
+        for page in _pages(assets, columns * rows):
+            i_gang.append(pool.submit(render_page, page))
+            if len(i_gang) >= 2 * workers:
+                yield i_gang.popleft().result()
+        while i_gang:
+            yield i_gang.popleft().result()
+        yield "</body>\n</html>\n"
+    finally:
+        for future in i_gang:
+            future.cancel()
+        if pool is not _pool:
+            pool.shutdown(wait=False, cancel_futures=True)
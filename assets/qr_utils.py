@@ -1,27 +1,66 @@
-import qrcode
-from io import BytesIO
-from django.shortcuts import render
-from django.http import HttpResponse
-from django.core.files.base import ContentFile
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils.http import http_date
 from .models import Asset
-import base64
+from .qr_labels import iter_label_sheets, label_queryset, render_symbol
+
+# Ændres hvis renderingen ændres, så klienternes ETags ikke længere matcher
+QR_RENDER_VERSION = 2
+QR_CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+RenderedQR = namedtuple('RenderedQR', 'content content_type etag')
+
+
+def qr_settings():
+    return {
+        'CACHE_SIZE': 1024,     # Antal renderede QR-koder i hukommelsen (pr. proces)
+        'DEFAULT_SIZE': 370,    # Standardbredde i pixels for PNG
+        'MAX_SIZE': 2048,
+        'MAX_AGE': 24 * 3600,   # Cache-Control max-age på billedsvarene
+        **getattr(settings, 'QR_CODES', {}),
+    }
+
+
+def qr_payload(vpid):
+    """Det QR-koden på et aktiv indeholder (samme som den gemte Asset.qr_code)."""
+    return vpid
+
+
+def qr_etag(payload, fmt, size):
+    """ETag for en QR-kode; kan beregnes uden at rendere."""
+    digest = hashlib.sha256(f"{QR_RENDER_VERSION}|{fmt}|{size}|{payload}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _render(payload, fmt, size):
+    return RenderedQR(render_symbol(payload, fmt, size), QR_CONTENT_TYPES[fmt], qr_etag(payload, fmt, size))
+
+
+_render_cached = lru_cache(maxsize=qr_settings()['CACHE_SIZE'])(_render)
+
+
+def render_qr(payload, fmt='png', size=None):
+    """
+    Renderer en QR-kode som PNG eller SVG (segno). Resultatet caches i
+    hukommelsen pr. (payload, format, størrelse).
+    """
+    if fmt not in QR_CONTENT_TYPES:
+        raise ValueError(f"Ukendt QR-format: {fmt}")
+    return _render_cached(payload, fmt, size or qr_settings()['DEFAULT_SIZE'])
+
 
 def generate_qr_code(data):
-    """Generer en QR-kode og returner som bytes."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    return buffer.getvalue()
+    """Generer en QR-kode og returner som PNG-bytes."""
+    return render_qr(data, 'png').content
+
 
 def qr_print_button(obj):
     """Knappen vises i admin-listen for at printe QR-kode."""
@@ -30,18 +69,62 @@ def qr_print_button(obj):
         reverse('print_qr', args=[obj.id])
     )
 
-def print_qr_view(request, asset_id):
-    """Vis en side med QR-kode for det valgte aktiv."""
+
+def qr_image_view(request, asset_id, fmt):
+    """QR-koden for et aktiv som billede (/qr/<id>.svg eller .png?size=...), med ETag/Last-Modified."""
+    if fmt not in QR_CONTENT_TYPES:
+        raise Http404
+    cfg = qr_settings()
     try:
-        asset = Asset.objects.get(id=asset_id)
-    except Asset.DoesNotExist:
-        return HttpResponse("Aktiv ikke fundet", status=404)
+        size = min(max(int(request.GET.get('size', cfg['DEFAULT_SIZE'])), 21), cfg['MAX_SIZE'])
+    except ValueError:
+        size = cfg['DEFAULT_SIZE']
+
+    række = Asset.objects.filter(pk=asset_id).values_list('VPID', 'modified_at').first()
+    if række is None:
+        raise Http404
+    vpid, modified_at = række
+    payload = qr_payload(vpid)
+    # Koden kan kun have ændret sig, når aktivet er ændret
+    last_modified = int(modified_at.timestamp())
 
-    qr_data = generate_qr_code(f"VPID: {asset.VPID}")
-    qr_base64 = base64.b64encode(qr_data).decode("utf-8")
+    # Klienten har allerede den aktuelle version: svar 304 uden at rendere
+    etag = qr_etag(payload, fmt, size)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        rendered = render_qr(payload, fmt, size)
+        response = HttpResponse(rendered.content, content_type=rendered.content_type)
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=cfg['MAX_AGE'])
+    return response
 
+
+def print_qr_view(request, asset_id):
+    """Vis en side med QR-kode for det valgte aktiv."""
+    asset = get_object_or_404(Asset.objects.only('id', 'VPID', 'name'), id=asset_id)
     return render(request, 'assets/print_qr.html', {
         'asset': asset,
-        'qr_code': qr_base64,
+        'qr_url': reverse('qr_image', args=[asset.id, 'svg']),
         'page_title': f"QR-kode for {asset.VPID} - {asset.name}"
     })
+
+
+@login_required
+def print_labels_view(request):
+    """
+    Etiketark (A4, HTML med SVG) for mange aktiver på én gang, fx
+    ?category=3&is_active=1 eller ?ids=1,2,3. Streames side for side og
+    renderes i denne proces; procespuljen er til print_labels-kommandoen.
+    """
+    ids = [int(i) for i in ','.join(request.GET.getlist('ids')).split(',') if i.strip().isdigit()]
+    is_active = request.GET.get('is_active')
+    assets = label_queryset(
+        ids=ids,
+        category=request.GET.get('category'),
+        location=request.GET.get('location'),
+        is_active=None if is_active in (None, '') else is_active in ('1', 'true', 'True'),
+    )
+    response = StreamingHttpResponse(iter_label_sheets(assets, workers=0), content_type='text/html; charset=utf-8')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
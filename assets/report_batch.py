@@ -0,0 +1,112 @@
+"""
+Flere fejlrapporter i ét kald (/api/reports/batch/), til tablets der har
+samlet rapporter op uden net.
+
+Hver rapport har en idempotensnøgle fra klienten (FaultReport.client_key).
+Nøgler vi allerede har modtaget, springes over og svarer med den eksisterende
+rapport, så klienten trygt kan sende køen igen efter et afbrudt kald. De nye
+rapporter oprettes med ét bulk_create i én transaktion, og beskrivelserne
+oversættes samlet som ét job. Billeder sendes som filer i samme multipart-kald
+(feltet image_<nøgle>), ligesom i /api/reports/.
+"""
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from . import stats
+from .models import FaultReport
+from .resolver import resolve_asset_id
+from .translation_worker import translate_reports, worker, worker_settings
+
+MAX_BATCH_REPORTS = 200
+MAX_KEY_LENGTH = 64
+SPROG = {kode for kode, _navn in FaultReport.LANGUAGE_CHOICES}
+
+
+def _valider(item):
+    """Returnerer (nøgle, fejlbesked); fejlbesked er None for en gyldig rapport."""
+    if not isinstance(item, dict):
+        return None, "Rapporten skal være et objekt"
+    key = item.get('key')
+    if not isinstance(key, str) or not 0 < len(key) <= MAX_KEY_LENGTH:
+        return None, f"Mangler 'key' (tekst på højst {MAX_KEY_LENGTH} tegn)"
+    if not isinstance(item.get('description', ''), str) or not isinstance(item.get('VPID', ''), str):
+        return key, "'description' og 'VPID' skal være tekst"
+    if item.get('sprog', 'de') not in SPROG:
+        return key, "Ukendt sprog"
+    return key, None
+
+
+def _opret(nye, billeder):
+    """Opretter de rapporter hvis nøgle ikke findes endnu; returnerer {nøgle: (pk, oprettet)}."""
+    from .views import save_uploaded_image  # views importerer dette modul
+    with transaction.atomic():
+        kendte = dict(FaultReport.objects.filter(client_key__in=list(nye)).values_list('client_key', 'pk'))
+        rapporter = [
+            FaultReport(
+                title=f"Rapport for {item.get('VPID', '')}"[:100],
+                description='',
+                original_description=item.get('description', ''),
+                vpid=item.get('VPID', ''),
+                asset_id=resolve_asset_id(item.get('VPID', '')),
+                sprog=item.get('sprog', 'de'),
+                translation_status=FaultReport.TRANSLATION_PENDING,
+                client_key=key,
+            )
+            for key, item in nye.items() if key not in kendte
+        ]
+        FaultReport.objects.bulk_create(rapporter)
+        # bulk_create sender ingen signaler
+        stats.apply_on_commit(stats.created(rapporter))
+        for report in rapporter:
+            billede = billeder.get(f"image_{report.client_key}")
+            if billede:
+                save_uploaded_image(billede, report)
+        if rapporter:
+            ids = [r.pk for r in rapporter]
+            if worker_settings()['ASYNC']:
+                transaction.on_commit(lambda: worker.enqueue_batch(ids))
+    if rapporter and not worker_settings()['ASYNC']:
+        translate_reports(ids, max_forsøg=1)
+    return {
+        **{key: (pk, False) for key, pk in kendte.items()},
+        **{r.client_key: (r.pk, True) for r in rapporter},
+    }
+
+
+def submit_batch(items, billeder=None):
+    """
+    Gemmer rapporterne og returnerer ét resultat pr. input i samme rækkefølge:
+    {'key', 'status': 'created' | 'duplicate' | 'error', 'report_id', 'status_url'}
+    (eller 'message' ved fejl). En nøgle der optræder flere gange, oprettes én gang.
+    `billeder` er request.FILES (eller et dict) med billedet til nøglen k som image_k.
+    """
+    billeder = billeder or {}
+    nye, valideret = {}, []
+    for item in items:
+        key, fejl = _valider(item)
+        valideret.append((key, fejl))
+        if fejl is None:
+            nye.setdefault(key, item)
+
+    if nye:
+        try:
+            gemt = _opret(nye, billeder)
+        except IntegrityError:
+            # En samtidig afsendelse af samme kø nåede først; nu er dens nøgler kendte
+            gemt = _opret(nye, billeder)
+    else:
+        gemt = {}
+
+    resultater, svaret = [], set()
+    for key, fejl in valideret:
+        if fejl is not None:
+            resultater.append({'key': key, 'status': 'error', 'message': fejl})
+            continue
+        pk, oprettet = gemt[key]
+        resultater.append({
+            'key': key,
+            'status': 'created' if oprettet and key not in svaret else 'duplicate',
+            'report_id': pk,
+            'status_url': reverse('report_translation_status', args=[pk]),
+        })
+        svaret.add(key)
+    return resultater
@@ -0,0 +1,84 @@
+"""
+VPID → Asset-opslag for fejlrapporter, fra et indeks i processens hukommelse.
+
+Rapporterne kommer ind med VPID'en som tekst (skrevet eller scannet). Indekset
+normaliserer store/små bogstaver og mellemrum og bygges med én forespørgsel
+første gang det bruges. Derefter koster et opslag ingen forespørgsel.
+Signalerne på Asset smider det væk ved ændringer (se signals.py).
+
+Ændringer der ikke sender signaler (bulk_create i import-kommandoerne, andre
+processer), fanges ved at et ukendt VPID genindlæser indekset, højst hvert
+MISS_RELOAD sekund, og ved at indekset aldrig er ældre end MAX_AGE.
+"""
+import threading
+import time
+from django.conf import settings
+
+
+def resolver_settings():
+    return {
+        'MAX_AGE': 300,      # Sekunder før indekset altid indlæses igen
+        'MISS_RELOAD': 30,   # Mindste pause mellem genindlæsninger udløst af ukendte VPID'er
+        **getattr(settings, 'VPID_RESOLVER', {}),
+    }
+
+
+def normalize_vpid(vpid):
+    """' 101-10 ' og '101-10' er samme aktiv; mellemrum inde i VPID'en samles til ét."""
+    return ' '.join(str(vpid or '').split()).upper()
+
+
+class VPIDIndex:
+    """Normaliseret VPID -> Asset.pk for alle aktiver; trådsikker og doven."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._opslag = None
+        self._indlæst = 0.0
+        self._generation = 0
+
+    def invalidate(self):
+        self._generation += 1
+        self._opslag = None
+
+    def _indlæs(self):
+        from .models import Asset
+
+        generation = self._generation
+        opslag = {}
+        # Ved to VPID'er der kun adskiller sig i store/små bogstaver vinder det ældste aktiv
+        for vpid, pk in Asset.objects.order_by('-pk').values_list('VPID', 'pk').iterator(chunk_size=5000):
+            opslag[normalize_vpid(vpid)] = pk
+        # Blev det invalideret undervejs, kan vi have læst før ændringen; så bruges det kun til dette opslag
+        if generation == self._generation:
+            self._opslag, self._indlæst = opslag, time.monotonic()
+        return opslag
+
+    def _aktuelt(self, efter_miss=False):
+        cfg = resolver_settings()
+        opslag, indlæst = self._opslag, self._indlæst
+        alder = time.monotonic() - indlæst
+        if opslag is not None and alder < cfg['MAX_AGE'] and not (efter_miss and alder >= cfg['MISS_RELOAD']):
+            return opslag
+        with self._lock:
+            # En anden tråd kan have indlæst det, mens vi ventede på låsen
+            if self._opslag is not None and self._indlæst != indlæst:
+                return self._opslag
+            return self._indlæs()
+
+    def resolve(self, vpid):
+        """Asset.pk for `vpid`, eller None hvis intet aktiv har den VPID."""
+        nøgle = normalize_vpid(vpid)
+        if not nøgle:
+            return None
+        pk = self._aktuelt().get(nøgle)
+        if pk is None:
+            pk = self._aktuelt(efter_miss=True).get(nøgle)
+        return pk
+
+
+index = VPIDIndex()
+
+
+def resolve_asset_id(vpid):
+    return index.resolve(vpid)
@@ -0,0 +1,113 @@
+import re
+from django.db import connection
+
+FTS_TABLE = 'assets_asset_fts'
+
+# Vægte til bm25() i samme rækkefølge som kolonnerne: VPID, navn, beskrivelse
+_VÆGTE = (10.0, 5.0, 1.0)
+
+_fts_tilgængelig = None
+
+# Samme triggere som migration 0008. SQLite smider dem væk, når Django genopbygger
+# assets_asset ved en skemaændring, så ensure_triggers() lægger dem på igen efter migrate.
+TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, VPID, name, description) VALUES (new.id, new.VPID, new.name, new.description);
+    END""",
+    f'{FTS_TABLE}_ad': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, VPID, name, description)
+        VALUES ('delete', old.id, old.VPID, old.name, old.description);
+    END""",
+    f'{FTS_TABLE}_au': f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF VPID, name, description
+        ON assets_asset BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, VPID, name, description)
+        VALUES ('delete', old.id, old.VPID, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, VPID, name, description) VALUES (new.id, new.VPID, new.name, new.description);
+    END""",
+}
+
+
+def fts_available():
+    """True hvis databasen er SQLite med FTS5-indekset fra migration 0008 (slås op én gang pr. proces)."""
+    global _fts_tilgængelig
+    if _fts_tilgængelig is None:
+        if connection.vendor != 'sqlite':
+            _fts_tilgængelig = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_tilgængelig = cursor.fetchone() is not None
+    return _fts_tilgængelig
+
+
+def fts_query(term):
+    """
+    Laver søgeteksten om til en FTS5-forespørgsel: hvert ord som præfiks
+    ("lbl"* "00"*), så der matches mens brugeren skriver. None hvis der ikke er noget at søge på.
+    """
+    ordene = re.findall(r'\w+', term.lower())
+    if not ordene:
+        return None
+    return ' '.join(f'"{o}"*' for o in ordene)
+
+
+def search_assets(term, limit=None):
+    """
+    Aktiver der matcher `term` som dicts (VPID, name, id, description).
+    Et eksakt VPID-match kommer altid først, derefter VPID'er der starter
+    med teksten, derefter efter relevans (bm25).
+    """
+    query = fts_query(term)
+    if query is None:
+        return []
+    sql = f"""
+        SELECT a.VPID, a.name, a.id, a.description
+        FROM {FTS_TABLE} f
+        JOIN assets_asset a ON a.id = f.rowid
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY a.VPID = %s COLLATE NOCASE DESC,
+                 a.VPID LIKE %s ESCAPE '\\' DESC,
+                 bm25({FTS_TABLE}, {', '.join(str(v) for v in _VÆGTE)})
+    """
+    params = [query, term.strip(), _like_prefix(term.strip())]
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        kolonner = [c[0] for c in cursor.description]
+        return [dict(zip(kolonner, række)) for række in cursor.fetchall()]
+
+
+def rebuild_index():
+    """Genopbygger FTS-indekset fra assets_asset. Returnerer antal indekserede aktiver."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute("SELECT COUNT(*) FROM assets_asset")
+        return cursor.fetchone()[0]
+
+
+def ensure_triggers(conn=connection):
+    """
+    Genskaber manglende sync-triggere og genopbygger i så fald indekset.
+    Returnerer True hvis noget blev repareret.
+    """
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR name IN (%s, %s, %s)",
+            [FTS_TABLE, *TRIGGERS],
+        )
+        findes = {name for _, name in cursor.fetchall()}
+        if FTS_TABLE not in findes or findes >= set(TRIGGERS):
+            return False
+        for sql in TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def _like_prefix(term):
+    return re.sub(r'([\\%_])', r'\\\1', term) + '%'
@@ -0,0 +1,122 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import catalog, image_processing, live, resolver, search, stats
+from .models import Asset, AssetTombstone, FaultReport
+
+IMAGE_FIELDS = ('image', 'image_thumbnail')
+
+
+def _release_on_commit(instance, names):
+    """Slipper referencerne til filerne, når transaktionen er committet (se assets/storage.py)."""
+    storage = instance._meta.get_field('image').storage
+    release = getattr(storage, 'release', None)
+    names = [name for name in names if name]
+    if release and names:
+        transaction.on_commit(lambda: [release(name) for name in names])
+
+
+@receiver(pre_save, sender=Asset)
+@receiver(pre_save, sender=FaultReport)
+def release_replaced_image(sender, instance, update_fields=None, **kwargs):
+    """Når billedet skiftes ud, slippes det gamle billede og miniaturen laves forfra."""
+    if instance._state.adding or (update_fields is not None and 'image' not in update_fields):
+        return
+    old = sender.objects.filter(pk=instance.pk).values_list(*IMAGE_FIELDS).first()
+    if old is None or old[0] == instance.image.name:
+        return
+    instance.image_thumbnail = ''
+    if update_fields is not None and 'image_thumbnail' not in update_fields:
+        sender.objects.filter(pk=instance.pk).update(image_thumbnail='')
+    _release_on_commit(instance, old)
+
+
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=FaultReport)
+def release_deleted_images(sender, instance, **kwargs):
+    _release_on_commit(instance, [getattr(instance, field).name for field in IMAGE_FIELDS])
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=FaultReport)
+def schedule_image_processing(sender, instance, **kwargs):
+    """Nedskaler billedet og lav miniature i baggrunden, når et nyt billede er gemt."""
+    if image_processing.needs_processing(instance):
+        transaction.on_commit(lambda: image_processing.schedule(instance))
+
+
+@receiver(pre_save, sender=FaultReport)
+def remember_queue_state(sender, instance, **kwargs):
+    """Husker tildeling og status før gemningen, så live-køen kan se hvad der ændrede sig."""
+    if instance._state.adding or not live.feed.subscriber_count:
+        return
+    instance._live_before = sender.objects.filter(pk=instance.pk).values(*live.QUEUE_FIELDS).first()
+
+
+@receiver(post_save, sender=FaultReport)
+def publish_queue_change(sender, instance, created, **kwargs):
+    """Sender nye tildelinger, statusskift og nye højprioritetsrapporter til mekanikernes live-kø."""
+    if not live.feed.subscriber_count:
+        return
+    events = live.queue_events(instance, instance.__dict__.pop('_live_before', None), created)
+    if events:
+        transaction.on_commit(lambda: [live.feed.publish(event, users) for event, users in events])
+
+
+@receiver(pre_save, sender=FaultReport)
+@receiver(pre_delete, sender=FaultReport)
+def remember_stat_state(sender, instance, update_fields=None, **kwargs):
+    """Rapportens række før ændringen, så statistikken kan få forskellen (se assets/stats.py)."""
+    if instance._state.adding or not stats.affects(update_fields):
+        return
+    instance._stat_before = stats.rows(sender.objects.filter(pk=instance.pk)).first()
+
+
+@receiver(post_save, sender=FaultReport)
+def update_report_stats(sender, instance, update_fields=None, **kwargs):
+    if not stats.affects(update_fields):
+        return
+    stats.apply_on_commit(stats.saved(instance, instance.__dict__.pop('_stat_before', None)))
+
+
+@receiver(post_delete, sender=FaultReport)
+def remove_report_stats(sender, instance, **kwargs):
+    stats.apply_on_commit(stats.delta(instance.__dict__.pop('_stat_before', None), None))
+
+
+@receiver(pre_save, sender=Asset)
+def remember_asset_location(sender, instance, update_fields=None, **kwargs):
+    if not instance._state.adding and (update_fields is None or 'location' in update_fields):
+        instance._location_before = sender.objects.filter(pk=instance.pk).values_list('location', flat=True).first()
+
+
+@receiver(post_save, sender=Asset)
+def move_report_stats_with_asset(sender, instance, **kwargs):
+    """Rapporter uden egen lokation tælles under aktivets; flytter aktivet, flytter de med."""
+    før = instance.__dict__.pop('_location_before', None)
+    if før is not None and før != instance.location:
+        pk, efter = instance.pk, instance.location
+        transaction.on_commit(lambda: stats.asset_location_changed(pk, før, efter))
+
+
+@receiver(post_delete, sender=Asset)
+def record_asset_tombstone(sender, instance, **kwargs):
+    """Tombstone til /api/assets/changes/, så tablets også fjerner aktivet (Asset.save tager selv en version)."""
+    AssetTombstone.objects.create(
+        asset_id=instance.pk, VPID=instance.VPID, sync_version=catalog.bump(catalog.ASSETS)
+    )
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def invalidate_vpid_index(sender, **kwargs):
+    """VPID-indekset indlæses forfra; også efter commit, så en samtidig indlæsning ikke beholder det gamle."""
+    resolver.index.invalidate()
+    transaction.on_commit(resolver.index.invalidate)
+
+
+@receiver(post_migrate)
+def repair_search_triggers(sender, using, **kwargs):
+    """Skemaændringer på assets_asset genopbygger tabellen i SQLite og mister FTS-triggerne."""
+    if sender.name == 'assets':
+        search.ensure_triggers(connections[using])
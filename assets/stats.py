@@ -0,0 +1,281 @@
+"""
+Løbende statistik over fejlrapporter til dashboardet (/api/dashboard/).
+
+Hver rapport bidrager til én række i ReportStatistic pr. dimension: i alt,
+prioritet, aktiv, lokation og tildelt mekaniker. Bidraget er om den er åben,
+og (når den er påbegyndt/afsluttet) sekunderne fra oprettelse til start og
+til afslutning. Når en rapport oprettes, ændres eller slettes, lægges
+forskellen mellem dens bidrag før og efter til rækkerne. Så læser dashboardet
+kun de få rækker i ReportStatistic og aldrig FaultReport.
+
+Opdateringerne sker efter commit i deres egen transaktion, så rapportens
+transaktion ikke holder lås på de fælles rækker (især "i alt"). Går en
+opdatering tabt, eller ændres rapporter uden om signalerne, retter
+reconcile() det. Kør den jævnligt (manage.py reconcile_report_stats).
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Asset, FaultReport, ReportStatistic
+
+# Felterne bidraget udregnes af (som values(); lokationen falder tilbage til aktivets)
+STAT_FIELDS = (
+    'priority', 'asset_id', 'location', 'asset__location', 'assigned_to_id',
+    'created_at', 'started_at', 'completed_at',
+)
+# Modelfelterne bag STAT_FIELDS; gemninger med update_fields uden dem ændrer ikke statistikken
+MODEL_FIELDS = {
+    'priority', 'asset', 'asset_id', 'location', 'assigned_to', 'assigned_to_id',
+    'created_at', 'started_at', 'completed_at',
+}
+COUNTERS = ('open_count', 'started_count', 'start_seconds', 'completed_count', 'complete_seconds')
+
+
+def affects(update_fields):
+    return update_fields is None or not MODEL_FIELDS.isdisjoint(update_fields)
+
+
+def _sekunder(fra, til):
+    return max(0, int((til - fra).total_seconds())) if fra and til else 0
+
+
+def _tal(row):
+    """Rapportens bidrag til hver af sine rækker, som en tuple i COUNTERS' rækkefølge."""
+    return (
+        1 if row['completed_at'] is None else 0,
+        1 if row['started_at'] else 0,
+        _sekunder(row['created_at'], row['started_at']),
+        1 if row['completed_at'] else 0,
+        _sekunder(row['created_at'], row['completed_at']),
+    )
+
+
+def _nøgler(row):
+    return (
+        (ReportStatistic.TOTAL, ''),
+        (ReportStatistic.PRIORITY, str(row['priority'])),
+        (ReportStatistic.ASSET, str(row['asset_id'] or '')),
+        (ReportStatistic.LOCATION, (row['location'] or row['asset__location'] or '')[:100]),
+        (ReportStatistic.MECHANIC, str(row['assigned_to_id'] or '')),
+    )
+
+
+def contribution(row):
+    """{(dimension, nøgle): Counter} for én rapport (et dict med STAT_FIELDS)."""
+    tal = Counter({navn: værdi for navn, værdi in zip(COUNTERS, _tal(row)) if værdi})
+    return {nøgle: tal for nøgle in _nøgler(row)}
+
+
+def delta(before, after):
+    """Forskellen mellem to rapporttilstande (None = findes ikke) som {(dimension, nøgle): {tæller: ændring}}."""
+    ændringer = {}
+    for row, fortegn in ((before, -1), (after, 1)):
+        if row is None:
+            continue
+        for nøgle, tal in contribution(row).items():
+            samlet = ændringer.setdefault(nøgle, Counter())
+            for navn, værdi in tal.items():
+                samlet[navn] += fortegn * værdi
+    return {nøgle: tal for nøgle, tal in ændringer.items() if any(tal.values())}
+
+
+def merge(*ændringer):
+    samlet = {}
+    for ændring in ændringer:
+        for nøgle, tal in ændring.items():
+            samlet.setdefault(nøgle, Counter()).update(tal)
+    return {nøgle: tal for nøgle, tal in samlet.items() if any(tal.values())}
+
+
+def apply(ændringer):
+    """Lægger ændringerne til rækkerne med ét UPDATE pr. række (F-udtryk, så samtidige opdateringer ikke tabes)."""
+    if not ændringer:
+        return
+    nu = timezone.now()
+    with transaction.atomic():
+        for (dimension, key), tal in sorted(ændringer.items()):
+            felter = {navn: F(navn) + værdi for navn, værdi in tal.items() if værdi}
+            rækker = ReportStatistic.objects.filter(dimension=dimension, key=key)
+            if not rækker.update(**felter, updated_at=nu):
+                _, oprettet = ReportStatistic.objects.get_or_create(
+                    dimension=dimension, key=key, defaults={**tal, 'updated_at': nu}
+                )
+                if not oprettet:
+                    rækker.update(**felter, updated_at=nu)
+
+
+def apply_on_commit(ændringer):
+    if ændringer:
+        transaction.on_commit(lambda: apply(ændringer))
+
+
+def rows(queryset):
+    """Rapporterne som dicts med STAT_FIELDS."""
+    return queryset.values('pk', *STAT_FIELDS)
+
+
+def _row(report, asset_location):
+    return {
+        **{f: getattr(report, f) for f in STAT_FIELDS if '__' not in f},
+        'asset__location': asset_location or '',
+    }
+
+
+def saved(report, before):
+    """Ændringerne efter report.save(); `before` er rapportens række før gemningen (None for en ny)."""
+    if before is not None and before['asset_id'] == report.asset_id:
+        asset_location = before['asset__location']
+    elif report.asset_id and not report.location:
+        asset_location = Asset.objects.filter(pk=report.asset_id).values_list('location', flat=True).first()
+    else:
+        asset_location = ''
+    return delta(before, _row(report, asset_location))
+
+
+def created(reports):
+    """Ændringerne for nye rapporter, der er gemt uden signaler (bulk_create)."""
+    lokationer = dict(
+        Asset.objects.filter(pk__in={r.asset_id for r in reports if r.asset_id and not r.location})
+        .values_list('pk', 'location')
+    )
+    return merge(*(delta(None, _row(r, lokationer.get(r.asset_id))) for r in reports))
+
+
+def record_transition(marker, report_ids):
+    """
+    Efter transitions.apply_transition: rapporterne har netop fået `marker`
+    (started_at/completed_at) sat; før var den tom. Læser dem én gang.
+    """
+    ændringer = [
+        delta({**row, marker: None}, row)
+        for row in rows(FaultReport.objects.filter(pk__in=report_ids))
+    ]
+    apply(merge(*ændringer))
+
+
+def asset_location_changed(asset_id, before, after):
+    """Rapporter uden egen lokation følger aktivets; flyt deres bidrag fra `before` til `after`."""
+    ændringer = [
+        delta({**row, 'asset__location': before}, row)
+        for row in rows(FaultReport.objects.filter(asset_id=asset_id, location=''))
+    ]
+    apply(merge(*ændringer))
+
+
+def compute(chunk_size=2000):
+    """
+    Rækkerne som de skal være, udregnet fra alle rapporter. Læses i korte
+    forespørgsler efter id, så der ikke holdes en lang læsning åben (i SQLite
+    ville den blokere alle skrivninger imens).
+    """
+    summer = {}
+    sidste_pk = 0
+    while batch := list(rows(FaultReport.objects.filter(pk__gt=sidste_pk).order_by('pk'))[:chunk_size]):
+        sidste_pk = batch[-1]['pk']
+        for row in batch:
+            åben, startet, til_start, afsluttet, til_afslutning = _tal(row)
+            for nøgle in _nøgler(row):
+                sum_ = summer.get(nøgle)
+                if sum_ is None:
+                    sum_ = summer[nøgle] = [0, 0, 0, 0, 0]
+                sum_[0] += åben
+                sum_[1] += startet
+                sum_[2] += til_start
+                sum_[3] += afsluttet
+                sum_[4] += til_afslutning
+    return {nøgle: Counter(dict(zip(COUNTERS, sum_))) for nøgle, sum_ in summer.items()}
+
+
+def reconcile(chunk_size=2000):
+    """
+    Udregner statistikken forfra og retter de rækker der er drevet. Returnerer
+    (rettede, sprungne): rækker som den løbende opdatering har ændret, mens
+    der blev talt, springes over, da optællingen kan have set rapporterne før
+    eller efter ændringen; de rettes ved næste kørsel.
+    """
+    før = dict(ReportStatistic.objects.values_list('pk', 'updated_at'))
+    korrekt = compute(chunk_size)
+    nu = timezone.now()
+    with transaction.atomic():
+        eksisterende = {(s.dimension, s.key): s for s in ReportStatistic.objects.select_for_update()}
+        urørt = {nøgle for nøgle, s in eksisterende.items() if før.get(s.pk) == s.updated_at}
+        nye, ændrede, sprunget = [], [], 0
+        for nøgle, tal in korrekt.items():
+            række = eksisterende.pop(nøgle, None)
+            if række is None:
+                nye.append(ReportStatistic(dimension=nøgle[0], key=nøgle[1], updated_at=nu, **tal))
+            elif any(getattr(række, navn) != tal[navn] for navn in COUNTERS):
+                if nøgle not in urørt:
+                    sprunget += 1
+                    continue
+                for navn in COUNTERS:
+                    setattr(række, navn, tal[navn])
+                række.updated_at = nu
+                ændrede.append(række)
+        # Rækker ingen rapport bidrager til længere (fx en slettet mekaniker); kun dem der ikke står på nul, var drevet
+        forældede = [s for nøgle, s in eksisterende.items() if nøgle in urørt]
+        drevne = [s for s in forældede if any(getattr(s, navn) for navn in COUNTERS)]
+        sprunget += sum(1 for nøgle, s in eksisterende.items() if nøgle not in urørt and any(getattr(s, n) for n in COUNTERS))
+        # ignore_conflicts: en række oprettet af en samtidig opdatering vinder
+        ReportStatistic.objects.bulk_create(nye, ignore_conflicts=True)
+        ReportStatistic.objects.bulk_update(ændrede, [*COUNTERS, 'updated_at'])
+        ReportStatistic.objects.filter(pk__in=[s.pk for s in forældede]).delete()
+    return len(nye) + len(ændrede) + len(drevne), sprunget
+
+
+def _middel(sekunder, antal):
+    return round(sekunder / antal, 1) if antal else None
+
+
+def _punkt(række, label):
+    return {
+        'key': række.key,
+        'label': label,
+        'open': række.open_count,
+        'started': række.started_count,
+        'completed': række.completed_count,
+        'mean_time_to_start': _middel(række.start_seconds, række.started_count),
+        'mean_time_to_complete': _middel(række.complete_seconds, række.completed_count),
+    }
+
+
+def dashboard(top=50):
+    """
+    Dashboardets tal, kun fra ReportStatistic (plus navne på de viste aktiver og
+    mekanikere): i alt, pr. prioritet og de `top` aktiver, lokationer og
+    mekanikere med flest åbne rapporter. Tider er i sekunder.
+    """
+    from django.contrib.auth.models import User
+    from django.utils.translation import gettext as _
+
+    S = ReportStatistic
+    faste = {(s.dimension, s.key): s for s in S.objects.filter(dimension__in=[S.TOTAL, S.PRIORITY])}
+    toppe = {
+        dimension: list(S.objects.filter(dimension=dimension, open_count__gt=0).order_by('-open_count', 'key')[:top])
+        for dimension in (S.ASSET, S.LOCATION, S.MECHANIC)
+    }
+    aktiver = Asset.objects.only('VPID', 'name').in_bulk([int(s.key) for s in toppe[S.ASSET] if s.key])
+    mekanikere = User.objects.only('username', 'first_name', 'last_name').in_bulk(
+        [int(s.key) for s in toppe[S.MECHANIC] if s.key]
+    )
+    prioriteter = dict(FaultReport._meta.get_field('priority').choices)
+
+    def aktiv(key):
+        a = aktiver.get(int(key)) if key else None
+        return f"{a.VPID} - {a.name}" if a else _("Intet aktiv")
+
+    def mekaniker(key):
+        m = mekanikere.get(int(key)) if key else None
+        return (m.get_full_name() or m.username) if m else _("Ikke tildelt")
+
+    return {
+        'total': _punkt(faste.get((S.TOTAL, '')) or S(), _("I alt")),
+        'priority': [
+            _punkt(faste.get((S.PRIORITY, str(p))) or S(key=str(p)), str(navn))
+            for p, navn in prioriteter.items()
+        ],
+        'asset': [_punkt(s, aktiv(s.key)) for s in toppe[S.ASSET]],
+        'location': [_punkt(s, s.key or _("Ukendt")) for s in toppe[S.LOCATION]],
+        'mechanic': [_punkt(s, mekaniker(s.key)) for s in toppe[S.MECHANIC]],
+    }
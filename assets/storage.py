@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def media_blob_storage():
+    """Storage til billeder på Asset/FaultReport (settings.STORAGES['media_blobs'])."""
+    return storages['media_blobs']
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Gemmer filer under deres SHA-256 (`blobs/ab/abcd….jpg`), så ens bytes kun
+    ligger på disk én gang, uanset hvor mange rapporter der peger på dem.
+
+    save() tager en reference og delete() slipper den igen; referencerne tælles
+    i MediaBlob. Om indholdet allerede findes afgøres ud fra hashen i databasen,
+    så eksisterende filer aldrig skal læses igen. Filer uden referencer fjernes
+    først af `manage.py gc_media`.
+    """
+    blob_dir = 'blobs'
+
+    @staticmethod
+    def _blobs():
+        return apps.get_model('assets', 'MediaBlob')
+
+    @staticmethod
+    def digest(content):
+        sha = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+        return sha.hexdigest()
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(f"{self.blob_dir}/")
+
+    def get_available_name(self, name, max_length=None):
+        # Det endelige navn afgøres af indholdet i _save(); ingen grund til at stat'e det foreslåede
+        return name
+
+    def _save(self, name, content):
+        MediaBlob = self._blobs()
+        sha256 = self.digest(content)
+
+        skrevet = None
+        while True:
+            # Opslag og reference i ét UPDATE, så gc_media ikke kan slette rækken og filen imellem
+            if MediaBlob.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1, updated_at=timezone.now()):
+                existing = MediaBlob.objects.filter(sha256=sha256).values_list('name', flat=True).get()
+                if skrevet and skrevet != existing:
+                    super().delete(skrevet)
+                return existing
+
+            blob_name = f"{self.blob_dir}/{sha256[:2]}/{sha256}{os.path.splitext(name)[1].lower()}"
+            if not super().exists(blob_name):
+                content.seek(0)
+                blob_name = skrevet = super()._save(blob_name, content)
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(sha256=sha256, name=blob_name, size=content.size, refcount=1)
+                return blob_name
+            except IntegrityError:
+                # En samtidig upload af samme indhold nåede først; tag en reference til dens række
+                continue
+
+    def release(self, name):
+        """Slipper én reference til filen. Returnerer False hvis filen ikke er en blob."""
+        if not self.is_blob(name):
+            return False
+        self._blobs().objects.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1, updated_at=timezone.now()
+        )
+        return True
+
+    def delete(self, name):
+        # Blobs deles mellem rækker og slettes kun af gc_media; ældre filer (før
+        # indholdsadresseringen) har ét ejerskab og slettes som hidtil
+        if not self.release(name):
+            super().delete(name)
+
+    def collect_garbage(self, older_than, dry_run=False):
+        """
+        Sletter blobs uden referencer, som ikke er rørt siden `older_than`.
+        Returnerer (antal, bytes).
+        """
+        MediaBlob = self._blobs()
+        orphans = MediaBlob.objects.filter(refcount__lte=0, updated_at__lt=older_than)
+        count = freed = 0
+        for pk, name, size in orphans.values_list('pk', 'name', 'size').iterator():
+            count += 1
+            freed += size
+            if dry_run:
+                continue
+            # Betinget sletning: en upload kan have taget en ny reference imens
+            if MediaBlob.objects.filter(pk=pk, refcount__lte=0).delete()[0]:
+                super().delete(name)
+                logger.info("Mediefil slettet: %s (%d bytes)", name, size)
+        return count, freed
@@ -1,3 +1,1210 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.admin import site as admin_site
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+import translator
+from vprepair.asgi import application
+from . import catalog, image_processing, live, qr_labels, report_batch, resolver, search, stats, transitions, translation_worker
+from .models import (
+    Asset, CatalogVersion, Equipment, FaultReport, FaultReportTranslation, MediaBlob, ReportStatistic, TranslationCacheEntry,
+)
+from .storage import media_blob_storage
+from .translation_memory import load_translation_memory
 
-# Create your tests here.
+# Testklientens requests må ikke starte baggrundsworkeren; testene kalder den selv
+_uden_worker = override_settings(TRANSLATION_WORKER={**settings.TRANSLATION_WORKER, 'AUTOSTART': False})
+
+
+def setUpModule():
+    _uden_worker.enable()
+
+
+def tearDownModule():
+    _uden_worker.disable()
+
+
+class _StandInLibreTranslate(BaseHTTPRequestHandler):
+    """Lokal erstatning for LibreTranslate: svarer 'ok', 'fejl' eller hænger alt efter server.mode."""
+
+    def do_POST(self):
+        self.server.kald += 1
+        data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.server.mode == 'hæng':
+            time.sleep(1)
+        if self.server.mode == 'fejl':
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({'translatedText': f"[{data['target']}] {data['q']}"}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LibreTranslateBackupTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInLibreTranslate)
+        self.server.mode = 'ok'
+        self.server.kald = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.backup = translator.LibreTranslateBackup(
+            url=f"http://127.0.0.1:{self.server.server_port}/",
+            connect_timeout=0.5, read_timeout=0.2, fejl_grænse=2, pause=60,
+        )
+
+    def tearDown(self):
+        self.backup.luk()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_oversætter_via_server(self):
+        self.assertEqual(self.backup.oversæt("Reifen platt", 'de', 'da'), "[da] Reifen platt")
+        self.assertEqual(self.backup.afbryder.tilstand, translator.Kredsløbsafbryder.LUKKET)
+
+    def test_timeout_tæller_som_fejl(self):
+        self.server.mode = 'hæng'
+        start = time.monotonic()
+        with self.assertRaises(Exception):
+            self.backup.oversæt("Reifen platt", 'de', 'da')
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(self.backup.tællere['fejl'], 1)
+
+    def test_afbryder_åbner_og_springer_over(self):
+        self.server.mode = 'fejl'
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.backup.oversæt("x", 'de', 'da')
+        self.assertEqual(self.backup.afbryder.tilstand, translator.Kredsløbsafbryder.ÅBEN)
+        with self.assertRaises(translator.BackupUtilgængelig):
+            self.backup.oversæt("x", 'de', 'da')
+        self.assertEqual(self.server.kald, 2)
+
+    def test_halvåben_lukker_efter_vellykket_prøvekald(self):
+        self.server.mode = 'fejl'
+        self.backup.afbryder.pause = 0.05
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.backup.oversæt("x", 'de', 'da')
+        time.sleep(0.1)
+        self.server.mode = 'ok'
+        self.assertEqual(self.backup.oversæt("x", 'de', 'da'), "[da] x")
+        self.assertEqual(self.backup.afbryder.tilstand, translator.Kredsløbsafbryder.LUKKET)
+
+
+class _StandInOversættelse:
+    """Argos-oversættelse der skriver "[mål] tekst" og husker sine kald."""
+
+    def __init__(self, fra_sprog, mål_sprog, kald):
+        self.fra_sprog, self.mål_sprog, self.kald = fra_sprog, mål_sprog, kald
+
+    def translate(self, tekst):
+        self.kald.append((self.fra_sprog, self.mål_sprog, tekst))
+        return f"[{self.mål_sprog}] {tekst}"
+
+
+class StandInMotorMixin:
+    """Erstatter Argos-modellerne, cachen og translation memory i translator med tomme stand-ins."""
+
+    def setUp(self):
+        super().setUp()
+        self.kald = []
+        motor = translator.OversættelsesMotor(pakke_mappe=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, motor.pakke_mappe, ignore_errors=True)
+        motor._indlæst = True
+        motor._register = {
+            (fra, til): _StandInOversættelse(fra, til, self.kald)
+            for fra in ('da', 'de', 'en', 'pl') for til in ('da', 'de', 'en', 'pl') if 'en' in (fra, til) and fra != til
+        }
+        for navn, værdi in (('motor', motor), ('cache', translator.OversættelsesCache()),
+                            ('hukommelse', translator.Oversættelseshukommelse())):
+            patcher = mock.patch.object(translator, navn, værdi)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def kald_til(self, fra_sprog, mål_sprog):
+        return [tekst for fra, til, tekst in self.kald if (fra, til) == (fra_sprog, mål_sprog)]
+
+
+class OversættelsesMotorTests(SimpleTestCase):
+    def setUp(self):
+        self.mappe = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mappe, ignore_errors=True)
+        for navn in ('de_en.argosmodel', 'en_da.argosmodel', 'LÆSMIG.txt'):
+            open(os.path.join(self.mappe, navn), 'w').close()
+        self.kald = []
+        sprog = {kode: mock.Mock(code=kode) for kode in ('de', 'en', 'da')}
+        for kode, fra in sprog.items():
+            fra.get_translation.side_effect = lambda til, fra=kode: (
+                _StandInOversættelse(fra, til.code, self.kald) if 'en' in (fra, til.code) else None
+            )
+        self.install = mock.patch.object(translator.package, 'install_from_path').start()
+        self.installerede = mock.patch.object(
+            translator.translate, 'get_installed_languages', return_value=list(sprog.values())
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.motor = translator.OversættelsesMotor(pakke_mappe=self.mappe)
+
+    def test_modeller_indlæses_én_gang_pr_proces(self):
+        tråde = [threading.Thread(target=self.motor.oversættelse, args=('de', 'en')) for _ in range(8)]
+        for tråd in tråde:
+            tråd.start()
+        for tråd in tråde:
+            tråd.join()
+        self.assertEqual(sorted(os.path.basename(c.args[0]) for c in self.install.call_args_list),
+                         ['de_en.argosmodel', 'en_da.argosmodel'])
+        self.assertEqual(self.installerede.call_count, 1)
+        self.assertIs(self.motor.oversættelse('de', 'en'), self.motor.oversættelse('de', 'en'))
+
+        self.motor.nulstil()
+        self.motor.oversættelse('en', 'da')
+        self.assertEqual(self.installerede.call_count, 2)
+
+    def test_manglende_sprogpar(self):
+        with self.assertRaises(LookupError):
+            self.motor.oversættelse('de', 'pl')
+        with self.assertRaises(LookupError):
+            self.motor.oversættelse('de', 'da')  # Ingen direkte model; går via engelsk
+
+    def test_sætninger_uden_argos_pakke_oversættes_enkeltvis(self):
+        self.assertEqual(self.motor.oversæt_sætninger([], 'de', 'en'), [])
+        self.assertEqual(self.motor.oversæt_sætninger(["Eins.", "Zwei."], 'de', 'en'), ["[en] Eins.", "[en] Zwei."])
+        self.assertEqual(len(self.kald), 2)
+
+
+class OversættelsesCacheTests(TestCase):
+    def test_lru_normaliserer_og_smider_ældste_ud(self):
+        cache = translator.OversættelsesCache(maks_størrelse=2)
+        nøgle = cache.nøgle("Reifen  platt\n", 'de', 'da')
+        self.assertEqual(nøgle, cache.nøgle("Reifen platt", 'de', 'da'))
+        self.assertNotEqual(nøgle, cache.nøgle("Reifen platt", 'de', 'en'))
+
+        cache.gem(nøgle, "Dæk fladt")
+        cache.gem(cache.nøgle("Licht kaputt", 'de', 'da'), "Lys i stykker")
+        self.assertEqual(cache.hent(nøgle), "Dæk fladt")
+        cache.gem(cache.nøgle("Bremse quietscht", 'de', 'da'), "Bremsen hviner")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.hent(cache.nøgle("Licht kaputt", 'de', 'da')))
+        self.assertEqual(dict(cache.tællere), {'lru_hits': 1, 'misses': 1, 'lru_evictions': 1})
+
+    def test_udløbne_poster_bruges_ikke(self):
+        cache = translator.OversættelsesCache(maks_alder=60)
+        nøgle = cache.nøgle("Reifen platt", 'de', 'da')
+        with mock.patch.object(translator.time, 'monotonic', return_value=1000.0):
+            cache.gem(nøgle, "Dæk fladt")
+        with mock.patch.object(translator.time, 'monotonic', return_value=1059.0):
+            self.assertEqual(cache.hent(nøgle), "Dæk fladt")
+        with mock.patch.object(translator.time, 'monotonic', return_value=1061.0):
+            self.assertIsNone(cache.hent(nøgle))
+        self.assertEqual(len(cache), 0)
+
+    def test_databaselaget_deles_mellem_processer(self):
+        from .translation_cache import DatabaseTranslationCache
+
+        en, anden = translator.OversættelsesCache(), translator.OversættelsesCache()
+        en.persistent = anden.persistent = DatabaseTranslationCache(maks_rækker=2, prune_hver=3)
+        nøgle = en.nøgle("Reifen platt", 'de', 'da')
+        en.gem(nøgle, "Dæk fladt")
+        self.assertEqual(anden.hent(nøgle), "Dæk fladt")
+        self.assertEqual(anden.hent(nøgle), "Dæk fladt")
+        self.assertEqual((anden.tællere['db_hits'], anden.tællere['lru_hits']), (1, 1))
+
+        # Hver tredje skrivning beskærer tabellen til de mindst brugte maks_rækker
+        en.gem(en.nøgle("a", 'de', 'da'), "a")
+        en.gem(en.nøgle("b", 'de', 'da'), "b")
+        self.assertEqual(TranslationCacheEntry.objects.count(), 2)
+
+        fejlende = translator.OversættelsesCache()
+        fejlende.persistent = mock.Mock(**{'get.side_effect': RuntimeError("db nede"), 'set.side_effect': RuntimeError})
+        with self.assertLogs('translator', 'WARNING'):
+            fejlende.gem(nøgle, "Dæk fladt")
+            fejlende.ryd()
+            self.assertIsNone(fejlende.hent(nøgle))
+
+
+class MålingerTests(SimpleTestCase):
+    def test_trin_tælles_og_logges_struktureret(self):
+        målinger = translator.Målinger()
+        with self.assertLogs('translator', 'INFO') as logs:
+            with målinger.mål('de→en', tegn=12):
+                pass
+            with self.assertRaises(RuntimeError), målinger.mål('fallback', fra='de', til='da'):
+                raise RuntimeError("LibreTranslate nede")
+            målinger.registrer('de→en', 30.0)
+        self.assertRegex(logs.output[0], r"trin=de→en ms=\d+\.\d ok=True tegn=12$")
+        self.assertIn("trin=fallback", logs.output[1])
+        self.assertIn("ok=False fra=de til=da", logs.output[1])
+        self.assertEqual((logs.records[1].trin, logs.records[1].ok, logs.records[1].til), ('fallback', False, 'da'))
+
+        tal = målinger.snapshot()
+        self.assertEqual((tal['de→en']['antal'], tal['de→en']['fejl'], tal['fallback']['fejl']), (2, 0, 1))
+        self.assertEqual(tal['de→en']['maks_ms'], 30.0)
+        self.assertAlmostEqual(tal['de→en']['gns_ms'], tal['de→en']['total_ms'] / 2)
+        målinger.nulstil()
+        self.assertEqual(målinger.snapshot(), {})
+
+
+class OversættelseshukommelseTests(SimpleTestCase):
+    def setUp(self):
+        self.tm = translator.Oversættelseshukommelse(maks_poster=2)
+        self.tm.tilføj("Reifen hinten links platt", 'de', 'da', "Dæk bag venstre fladt")
+
+    def test_genbruger_samme_tekst_efter_normalisering(self):
+        self.assertEqual(self.tm.find("reifen  hinten links, platt!", 'de', 'da'), "Dæk bag venstre fladt")
+        self.assertEqual(self.tm.tællere['hits'], 1)
+
+    def test_lignende_tekst_med_samme_bærende_ord_genbruges(self):
+        self.tm.tilføj("Der Reifen hinten links ist seit gestern platt", 'de', 'da', "Dækket bag venstre har været fladt siden i går")
+        self.assertEqual(
+            self.tm.find("Reifen hinten links ist seit gestern platt", 'de', 'da'),
+            "Dækket bag venstre har været fladt siden i går",
+        )
+        self.assertEqual(self.tm.tællere['hits'], 1)
+
+    def test_andre_bærende_ord_genbruges_ikke(self):
+        tm = translator.Oversættelseshukommelse(tærskel=0.5)
+        tm.tilføj("Reifen hinten links ist seit gestern platt", 'de', 'da', "Dækket bag venstre er fladt")
+        tm.tilføj("Licht links vorne geht an", 'de', 'da', "Lyset foran venstre tænder")
+        self.assertIsNone(tm.find("Reifen vorne links ist seit gestern platt", 'de', 'da'))
+        self.assertIsNone(tm.find("Reifen links hinten ist seit gestern platt", 'de', 'da'))
+        self.assertIsNone(tm.find("Licht links vorne geht aus", 'de', 'da'))
+        self.assertIsNone(tm.find("Reifen hinten links ist seit gestern platt", 'de', 'en'))
+        self.assertEqual(tm.tællere['misses'], 4)
+
+    def test_tal_og_koder_erstattes(self):
+        self.tm.tilføj("VP1234 verliert 5 Liter Öl", 'de', 'da', "VP1234 taber 5 liter olie")
+        self.assertEqual(self.tm.find("VP987 verliert 12 Liter Öl", 'de', 'da'), "VP987 taber 12 liter olie")
+        self.tm.tilføj("Nur 42", 'de', 'da', "Kun 42")
+        self.tm.tilføj("Motor defekt 3", 'de', 'da', "Motoren er defekt")  # Tallet findes ikke i oversættelsen
+        self.assertIsNone(self.tm.find("Motor defekt 4", 'de', 'da'))
+        self.assertEqual(self.tm.tællere['afvist'], 1)
+
+    def test_sjældnest_brugte_smides_ud(self):
+        self.tm.tilføj("Licht kaputt", 'de', 'da', "Lys i stykker")
+        self.tm.find("Reifen hinten links platt", 'de', 'da')
+        self.tm.tilføj("Bremse quietscht", 'de', 'da', "Bremsen hviner")
+        self.assertEqual(len(self.tm), 2)
+        self.assertIsNone(self.tm.find("Licht kaputt", 'de', 'da'))
+        self.assertEqual(self.tm.find("Reifen hinten links platt", 'de', 'da'), "Dæk bag venstre fladt")
+
+
+class PivotMålingTests(StandInMotorMixin, SimpleTestCase):
+    def test_pivot_måles_pr_hop(self):
+        målinger = translator.Målinger()
+        with mock.patch.object(translator, 'målinger', målinger):
+            self.assertEqual(translator.oversæt("Reifen platt", 'de', 'da'), "[da] [en] Reifen platt")
+        self.assertEqual(set(målinger.snapshot()), {'de→en', 'en→da'})
+
+
+class ReportLanguageTests(StandInMotorMixin, TestCase):
+    def test_oversæt_alle_beregner_pivot_én_gang(self):
+        resultater = translator.oversæt_alle("Reifen platt", 'de', ['da', 'en', 'pl', 'de'])
+        self.assertEqual(resultater, {
+            'da': "[da] [en] Reifen platt", 'en': "[en] Reifen platt",
+            'pl': "[pl] [en] Reifen platt", 'de': "Reifen platt",
+        })
+        self.assertEqual(self.kald_til('de', 'en'), ["Reifen platt"])
+
+        translator.oversæt_alle("Reifen platt", 'de', ['da', 'en', 'pl'])
+        self.assertEqual(len(self.kald), 3)  # Anden gang fra cachen
+
+    def test_dansk_og_kildesprog_gemmes_kun_på_rapporten(self):
+        rapport = FaultReport.objects.create(
+            title='R', description='', original_description="Reifen platt", sprog='de',
+            translation_status=FaultReport.TRANSLATION_PENDING,
+        )
+        self.assertTrue(translation_worker.translate_report(rapport.pk))
+        rapport.refresh_from_db()
+        self.assertEqual(set(rapport.translations.values_list('language', flat=True)), {'en', 'pl'})
+        self.assertEqual(rapport.description_in('da'), "[da] [en] Reifen platt")
+        self.assertEqual(rapport.description_in('de'), "Reifen platt")
+        self.assertEqual(rapport.description_in('en'), "[en] Reifen platt")
+
+        # En rettet dansk beskrivelse ses straks på dansk; der er ingen anden kopi at holde i takt
+        rapport.description = "Dækket er fladt"
+        rapport.save()
+        self.assertEqual(FaultReport.objects.get(pk=rapport.pk).description_in('da'), "Dækket er fladt")
+
+
+class RetranslateTests(StandInMotorMixin, TestCase):
+    def test_sætninger_deles_og_samles_uændret(self):
+        tekst = "Reifen platt.  Bremse defekt!\n\nLicht aus? Ja"
+        dele = translator._del_i_sætninger(tekst)
+        self.assertEqual("".join(dele), tekst)
+        self.assertEqual(dele[::2], ["Reifen platt.", "Bremse defekt!", "Licht aus?", "Ja"])
+
+        oversat = translator._oversæt_gruppe(["Reifen platt.  Bremse defekt!", "Bremse defekt!\nLicht aus"], 'de', 'da')
+        self.assertEqual(oversat, [
+            "[da] [en] Reifen platt.  [da] [en] Bremse defekt!",
+            "[da] [en] Bremse defekt!\n[da] [en] Licht aus",
+        ])
+        # Hver unik sætning oversættes én gang
+        self.assertEqual(self.kald_til('de', 'en'), ["Reifen platt.", "Bremse defekt!", "Licht aus"])
+
+    def test_kommando_opdaterer_beskrivelse_og_oversættelser(self):
+        rapport = FaultReport.objects.create(
+            title='R', description="[Oversættelse fejlede: Reifen platt]", original_description="Reifen platt",
+            sprog='de', translation_status=FaultReport.TRANSLATION_FAILED,
+        )
+        FaultReportTranslation.objects.create(report=rapport, language='en', text="gammel")
+        FaultReport.objects.create(title='OK', description="Ok", original_description="Gut", sprog='de',
+                                   translation_status=FaultReport.TRANSLATION_DONE)
+
+        call_command('retranslate_reports', '--chunk-size', '1', stdout=StringIO())
+        rapport.refresh_from_db()
+        self.assertEqual((rapport.description, rapport.translation_status), ("[da] [en] Reifen platt", 'done'))
+        self.assertEqual(dict(rapport.translations.values_list('language', 'text')), {
+            'en': "[en] Reifen platt", 'pl': "[pl] [en] Reifen platt",
+        })
+        self.assertEqual(self.kald_til('de', 'en'), ["Reifen platt"])
+
+
+@override_settings(TRANSLATION_WORKER={'CLAIM_TIMEOUT': 60, 'AUTOSTART': False})
+class TranslationWorkerTests(StandInMotorMixin, TestCase):
+    def afventende(self, tekst="Reifen platt", **felter):
+        return FaultReport.objects.create(
+            title='R', description='', original_description=tekst, sprog='de',
+            translation_status=FaultReport.TRANSLATION_PENDING, **felter,
+        )
+
+    def test_autostart_læses_ved_første_request(self):
+        from django.core.signals import request_started
+        self.addCleanup(request_started.connect, translation_worker.start_worker, dispatch_uid='assets.translation_worker')
+        with mock.patch.object(translation_worker.worker, 'start') as start:
+            self.client.get('/api/reports/batch/')
+            start.assert_not_called()
+            with self.settings(TRANSLATION_WORKER={'AUTOSTART': True}):
+                self.client.get('/api/reports/batch/')
+                self.client.get('/api/reports/batch/')
+        start.assert_called_once_with()
+
+    def test_fejl_prøves_igen_og_markeres_til_sidst(self):
+        rapport = self.afventende()
+        with mock.patch.object(translation_worker, 'oversæt_alle', side_effect=RuntimeError("Argos nede")):
+            self.assertFalse(translation_worker.translate_report(rapport.pk, max_forsøg=2))
+            rapport.refresh_from_db()
+            self.assertEqual(
+                (rapport.translation_status, rapport.translation_attempts, rapport.translation_claim), ('pending', 1, '')
+            )
+            self.assertTrue(translation_worker.translate_report(rapport.pk, max_forsøg=2))
+        rapport.refresh_from_db()
+        self.assertEqual((rapport.translation_status, rapport.translation_attempts), ('failed', 2))
+
+        andre = [self.afventende(), self.afventende("Motor laut")]
+        with mock.patch.object(translation_worker, 'oversæt_batch_alle', side_effect=RuntimeError("Argos nede")):
+            self.assertEqual(sorted(translation_worker.translate_reports([r.pk for r in andre], max_forsøg=2)), [r.pk for r in andre])
+        self.assertEqual(translation_worker.translate_reports([r.pk for r in andre], max_forsøg=2), [])
+        self.assertEqual(
+            set(FaultReport.objects.filter(pk__in=[r.pk for r in andre]).values_list('translation_status', 'translation_attempts')),
+            {('done', 2)},
+        )
+
+    def test_rapport_taget_af_anden_worker_springes_over(self):
+        rapport = self.afventende()
+        translation_worker.claim_reports([rapport.pk])
+        self.assertTrue(translation_worker.translate_report(rapport.pk))
+        self.assertEqual(translation_worker.translate_reports([rapport.pk]), [])
+        self.assertEqual((FaultReport.objects.get(pk=rapport.pk).translation_status, self.kald), ('pending', []))
+
+        # Kravet er udløbet: workeren der tog den, døde undervejs
+        FaultReport.objects.filter(pk=rapport.pk).update(translation_claimed_at=timezone.now() - timedelta(minutes=5))
+        self.assertTrue(translation_worker.translate_report(rapport.pk))
+        self.assertEqual(FaultReport.objects.get(pk=rapport.pk).description, "[da] [en] Reifen platt")
+
+    def test_genoptager_afventende_efter_genstart(self):
+        nu = timezone.now()
+        ledig = self.afventende()
+        død = self.afventende(translation_claim='x', translation_claimed_at=nu - timedelta(hours=2))
+        i_gang = self.afventende(translation_claim='y', translation_claimed_at=nu)
+        FaultReport.objects.create(title='Færdig', description='Ok')
+
+        worker = translation_worker.TranslationWorker()
+        with mock.patch.object(translation_worker.threading, 'Timer') as timer:
+            worker._genoptag_afventende()
+        self.assertEqual(list(worker._kø.queue), [ledig.pk, død.pk])
+        timer.assert_called_once_with(60, worker._kø.put, args=[[i_gang.pk]])
+
+        for job in list(worker._kø.queue):
+            self.assertTrue(translation_worker.translate_report(job))
+        self.assertEqual(
+            dict(FaultReport.objects.filter(original_description="Reifen platt").values_list('pk', 'translation_status')),
+            {ledig.pk: 'done', død.pk: 'done', i_gang.pk: 'pending'},
+        )
+
+
+class TempMediaMixin:
+    """Skriver mediefiler (billeder, QR-koder) til en midlertidig mappe i stedet for MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ContentAddressedStorageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = media_blob_storage()
+
+    def test_ens_indhold_gemmes_én_gang(self):
+        første = self.storage.save('fault_reports/report_1.jpeg', ContentFile(b'samme bytes'))
+        anden = self.storage.save('fault_reports/report_2.jpeg', ContentFile(b'samme bytes'))
+        self.assertEqual(første, anden)
+        self.assertTrue(første.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.get(name=første).refcount, 2)
+
+    def test_delete_slipper_reference_og_gc_sletter_filen(self):
+        navn = self.storage.save('assets/a.png', ContentFile(b'x' * 10))
+        self.storage.save('assets/b.png', ContentFile(b'x' * 10))
+        self.storage.delete(navn)
+        self.assertTrue(self.storage.exists(navn))
+        self.assertEqual(self.storage.collect_garbage(timezone.now() + timedelta(seconds=1)), (0, 0))
+
+        self.storage.delete(navn)
+        self.assertEqual(self.storage.collect_garbage(timezone.now() - timedelta(hours=1)), (0, 0))
+        self.assertEqual(self.storage.collect_garbage(timezone.now() + timedelta(seconds=1)), (1, 10))
+        self.assertFalse(self.storage.exists(navn))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_gc_midt_i_en_upload_af_samme_indhold(self):
+        navn = self.storage.save('assets/a.png', ContentFile(b'uden ejer'))
+        self.storage.delete(navn)
+        update = QuerySet.update
+
+        def gc_først(qs, **kwargs):
+            # gc_media sletter den forældreløse blob lige før uploaden tager sin reference
+            if qs.model is MediaBlob and 'refcount' in kwargs and not kørt:
+                kørt.append(True)
+                self.storage.collect_garbage(timezone.now() + timedelta(seconds=1))
+            return update(qs, **kwargs)
+
+        kørt = []
+        with mock.patch.object(QuerySet, 'update', gc_først):
+            igen = self.storage.save('assets/b.png', ContentFile(b'uden ejer'))
+        self.assertTrue(kørt)
+        self.assertEqual(igen, navn)
+        self.assertTrue(self.storage.exists(igen))
+        self.assertEqual(MediaBlob.objects.get(name=igen).refcount, 1)
+
+
+class GcMediaTests(TempMediaMixin, TestCase):
+    def test_sletning_af_rapport_slipper_billedet(self):
+        rapport = FaultReport.objects.create(title='R', description='')
+        rapport.image.save('skade.jpg', ContentFile(b'billede'), save=True)
+        navn = rapport.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            rapport.delete()
+        self.assertEqual(MediaBlob.objects.get(name=navn).refcount, 0)
+
+        out = StringIO()
+        call_command('gc_media', '--grace-hours', '0', '--dry-run', stdout=out)
+        self.assertIn('1 filer uden referencer ville blive slettet', out.getvalue())
+        self.assertTrue(media_blob_storage().exists(navn))
+        call_command('gc_media', '--grace-hours', '0', stdout=StringIO())
+        self.assertFalse(media_blob_storage().exists(navn))
+
+    def test_reconcile_retter_referencetællingen(self):
+        storage = media_blob_storage()
+        brugt = storage.save('fault_reports/a.jpg', ContentFile(b'brugt'))
+        glemt = storage.save('fault_reports/b.jpg', ContentFile(b'glemt'))
+        FaultReport.objects.create(title='R', description='', image=brugt)
+        # Drevet: den brugte står til nul (ville blive slettet), den glemte til to (ville aldrig blive det)
+        MediaBlob.objects.filter(name=brugt).update(refcount=0)
+        MediaBlob.objects.filter(name=glemt).update(refcount=2)
+
+        out = StringIO()
+        call_command('gc_media', '--grace-hours', '0', '--reconcile', stdout=out)
+        self.assertIn('2 referencetællinger rettet', out.getvalue())
+        self.assertEqual(list(MediaBlob.objects.values_list('name', 'refcount')), [(brugt, 1)])
+        self.assertTrue(storage.exists(brugt))
+        self.assertFalse(storage.exists(glemt))
+
+
+class AssetSearchTests(TestCase):
+    def setUp(self):
+        if not search.fts_available():
+            self.skipTest("SQLite uden FTS5")
+        Asset.objects.bulk_create([
+            Asset(VPID='KR-100', name='Kran', description='Mobilkran'),
+            Asset(VPID='KR-1', name='Kran', description='Ældre kran'),
+            Asset(VPID='TR-5', name='Truck', description='Bruges ved KR-1'),
+        ])
+
+    def vpids(self, term):
+        return [a['VPID'] for a in search.search_assets(term)]
+
+    def test_eksakt_vpid_først_og_præfiks(self):
+        self.assertEqual(self.vpids('kr-1')[0], 'KR-1')
+        self.assertEqual(set(self.vpids('kra')), {'KR-100', 'KR-1'})
+        self.assertEqual(self.vpids('ældr'), ['KR-1'])
+
+    def test_indekset_følger_ændringer(self):
+        Asset.objects.filter(VPID='TR-5').update(name='Gaffeltruck')
+        self.assertEqual(self.vpids('gaffel'), ['TR-5'])
+        Asset.objects.filter(VPID='TR-5').delete()
+        self.assertEqual(self.vpids('gaffel'), [])
+
+
+class AssetListApiTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = [Asset.objects.create(VPID=f'VP-{i}', name=f'Kran {i}', description='').pk for i in range(5)]
+
+    def test_sider_hænger_sammen(self):
+        sete, url, sider = [], '/api/assets/?limit=2&fields=VPID', 0
+        while url:
+            svar = self.client.get(url)
+            sider += 1
+            side = svar.json()
+            self.assertEqual([set(a) for a in side], [{'id', 'VPID'}] * len(side))
+            sete += [a['id'] for a in side]
+            url = svar.headers.get('Link', '').partition('>')[0].lstrip('<')
+            if url:
+                self.assertEqual(svar.headers['X-Next-After'], str(side[-1]['id']))
+        self.assertEqual((sete, sider), (self.ids, 3))
+
+        # En ny side efter et aktiv der er slettet imellem, fortsætter hvor den slap
+        Asset.objects.filter(pk=self.ids[2]).delete()
+        svar = self.client.get('/api/assets/', {'after': self.ids[1], 'limit': 2})
+        self.assertEqual([a['id'] for a in svar.json()], self.ids[3:])
+        self.assertNotIn('X-Next-After', svar.headers)
+
+    def test_uændret_katalog_giver_304(self):
+        svar = self.client.get('/api/assets/', {'limit': 2})
+        etag = svar.headers['ETag']
+        uændret = self.client.get('/api/assets/', {'limit': 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((uændret.status_code, uændret.headers['ETag']), (304, etag))
+        self.assertNotEqual(self.client.get('/api/assets/', {'limit': 3}).headers['ETag'], etag)
+
+        aktiv = Asset.objects.get(pk=self.ids[0])
+        aktiv.name = 'Mobilkran'
+        aktiv.save()
+        svar = self.client.get('/api/assets/', {'limit': 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(svar.status_code, 200)
+        self.assertEqual(svar.json()[0]['name'], 'Mobilkran')
+
+
+class AssetChangesTests(TempMediaMixin, TestCase):
+    def test_delta_efter_token(self):
+        a = Asset.objects.create(VPID='A-1', description='')
+        b = Asset.objects.create(VPID='B-1', description='')
+        fuld = catalog.changes_since(None, limit=1)
+        self.assertTrue(fuld['reset'])
+        self.assertTrue(fuld['more'])
+        rest = catalog.changes_since(fuld['token'], limit=10)
+        self.assertEqual([x['VPID'] for x in fuld['changed'] + rest['changed']], ['A-1', 'B-1'])
+
+        a.name = 'Ny'
+        a.save()
+        b_id = b.pk
+        b.delete()
+        delta = catalog.changes_since(rest['token'], limit=10)
+        self.assertEqual([x['VPID'] for x in delta['changed']], ['A-1'])
+        self.assertEqual(delta['deleted'], [b_id])
+        self.assertFalse(delta['reset'])
+        self.assertEqual(catalog.changes_since(delta['token'], limit=10)['changed'], [])
+
+
+@override_settings(QR_LABELS={'WORKERS': 0})
+class ImportAssetsTests(TempMediaMixin, TestCase):
+    def fil(self, navn, indhold):
+        sti = os.path.join(self.media_root, navn)
+        with open(sti, 'w', encoding='utf-8') as f:
+            f.write(indhold)
+        return sti
+
+    def importer(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_assets', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_dubletter_og_fejl(self):
+        Asset.objects.bulk_create([Asset(VPID='VP-1', name='Gammel', description='')])
+        version = catalog.current_version(catalog.ASSETS)
+        sti = self.fil('aktiver.csv', (
+            "VPID,name,category,is_active,last_service_date\n"
+            "VP-1,Kran,Kraner,ja,2026-01-31\n"
+            "VP-2,Truck,kraner,nej,\n"
+            "VP-2,Truck igen,,,\n"
+            ",Uden VPID,,,\n"
+            "VP-3,Dårlig dato,,,31-01-2026\n"
+        ))
+        out, err = self.importer(sti, '--batch-size', '2')
+        self.assertIn('5 rækker læst', out)
+        self.assertIn('1 oprettet, 0 opdateret, 2 dubletter sprunget over, 2 fejl', out)
+        self.assertIn('Linje 5: mangler VPID', err)
+        self.assertEqual(Asset.objects.get(VPID='VP-1').name, 'Gammel')
+        truck = Asset.objects.get(VPID='VP-2')
+        self.assertEqual((truck.is_active, truck.category.name, truck.sync_version), (False, 'Kraner', version + 1))
+        self.assertFalse(truck.qr_code)
+
+    def test_jsonl_opdater_dry_run_og_qr(self):
+        Asset.objects.bulk_create([Asset(VPID='VP-1', name='Gammel', description='')])
+        sti = self.fil('aktiver.jsonl', '{"VPID": "VP-1", "name": "Kran"}\n\n{"VPID": "VP-2", "name": "Truck"}\n')
+        out, _ = self.importer(sti, '--update', '--dry-run')
+        self.assertIn('rullet tilbage', out)
+        self.assertEqual(list(Asset.objects.values_list('VPID', 'name')), [('VP-1', 'Gammel')])
+
+        out, _ = self.importer(sti, '--update', '--with-qr')
+        self.assertIn('1 oprettet, 1 opdateret', out)
+        self.assertIn('2 QR-koder genereret', out)
+        self.assertEqual(Asset.objects.get(VPID='VP-1').name, 'Kran')
+        self.assertFalse(Asset.objects.filter(qr_code='').exists())
+
+
+class ImportLegacyTests(TestCase):
+    def setUp(self):
+        mappe = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, mappe, ignore_errors=True)
+        self.path = os.path.join(mappe, 'service_system.db')
+        with sqlite3.connect(self.path) as db:
+            db.executescript("""
+                CREATE TABLE Maskinliste (ID INTEGER PRIMARY KEY AUTOINCREMENT, VPID TEXT NOT NULL UNIQUE,
+                                          Beskrivelse TEXT NOT NULL, Kaldenavn TEXT);
+                CREATE TABLE Udstyr (ID INTEGER PRIMARY KEY AUTOINCREMENT, Navn TEXT NOT NULL, Beskrivelse TEXT);
+                CREATE TABLE MaskineUdstyr (MaskineID INTEGER, UdstyrID INTEGER, PRIMARY KEY (MaskineID, UdstyrID));
+                CREATE TABLE FaultReports (ID INTEGER PRIMARY KEY AUTOINCREMENT, Description TEXT NOT NULL,
+                                           MachineID INTEGER, RepairReport TEXT, CompletedAt TIMESTAMP,
+                                           ReportedAt TIMESTAMP);
+                INSERT INTO Maskinliste VALUES (1, '101-10', 'Renault Clio', NULL), (2, '101-11', 'Mercedes ML', 'Brian');
+                INSERT INTO Udstyr VALUES (1, 'Trækkrog', NULL);
+                INSERT INTO MaskineUdstyr VALUES (2, 1);
+                INSERT INTO FaultReports VALUES
+                    (1, 'Punktering', '101-10', 'Skiftet', '2025-08-11 18:00:00', '2025-08-11 17:00:00'),
+                    (2, 'Lyd fra motor', 2, NULL, NULL, '2025-08-12 07:00:00');
+            """)
+
+    def importer(self):
+        call_command('import_legacy', self.path, '--batch-size', '1', stdout=StringIO())
+
+    def test_importerer_og_genoptager_uden_dubletter(self):
+        self.importer()
+        self.assertEqual(Asset.objects.get(VPID='101-11').equipment.get().name, 'Trækkrog')
+        afsluttet, åben = FaultReport.objects.order_by('created_at')
+        self.assertEqual((afsluttet.asset.VPID, afsluttet.notes), ('101-10', 'Skiftet'))
+        self.assertEqual(afsluttet.created_at.year, 2025)
+        self.assertTrue(afsluttet.repair_status)
+        self.assertEqual((åben.vpid, åben.completed_at), ('101-11', None))
+
+        with sqlite3.connect(self.path) as db:
+            db.execute("INSERT INTO FaultReports (Description, MachineID) VALUES ('Ny', '101-10')")
+        self.importer()
+        self.assertEqual(Asset.objects.count(), 2)
+        self.assertEqual(Equipment.objects.count(), 1)
+        self.assertEqual(FaultReport.objects.count(), 3)
+
+    def test_importerede_rapporter_holdes_ude_af_oversættelseshukommelsen(self):
+        self.importer()
+        afsluttet = FaultReport.objects.get(original_description='Punktering')
+        self.assertEqual(afsluttet.translation_status, FaultReport.TRANSLATION_LEGACY)
+        self.assertEqual(afsluttet.updated_at, afsluttet.completed_at)
+        self.assertEqual(list(load_translation_memory()), [])
+        # Det delte felt er urørt, så andre gemninger stadig får tidsstempler
+        self.assertTrue(FaultReport._meta.get_field('created_at').auto_now_add)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.admin)
+
+    def opret(self, fra, til):
+        assets = Asset.objects.bulk_create([Asset(VPID=f'A-{i}', description='') for i in range(fra, til)])
+        mekaniker = User.objects.create_user(f'mekaniker{fra}')
+        reports = FaultReport.objects.bulk_create([
+            FaultReport(title=f'R{i}', description='', asset=asset, assigned_to=mekaniker if i % 2 else None,
+                        started_at=timezone.now() if i % 3 == 0 else None)
+            for i, asset in zip(range(fra, til), assets)
+        ])
+        FaultReportTranslation.objects.bulk_create(
+            [FaultReportTranslation(report=r, language='en', text='translated') for r in reports]
+        )
+
+    def antal_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_konstant_antal_queries_pr_side(self):
+        self.opret(0, 10)
+        ti = {url: self.antal_queries(url) for url in ('/admin/assets/faultreport/', '/admin/assets/asset/')}
+        self.opret(10, 100)
+        for url, antal in ti.items():
+            self.assertEqual(self.antal_queries(url), antal, url)
+
+    def test_forløb_filtreres_og_sorteres_i_sql(self):
+        self.opret(0, 6)
+        igang = FaultReport.objects.with_current_status().filter(current_status_code=FaultReport.CURRENT_STARTED)
+        self.assertEqual(sorted(r.title for r in igang), ['R0', 'R3'])
+        svar = self.client.get('/admin/assets/faultreport/', {'current_status': FaultReport.CURRENT_ASSIGNED, 'o': '5'})
+        self.assertEqual(sorted(r.title for r in svar.context['cl'].result_list), ['R1', 'R5'])
+
+
+class LiveQueueTests(TransactionTestCase):
+    """SSE-strømmen køres gennem vprepair.asgi.application, som en ASGI-server ville gøre det."""
+
+    async def læs(self, communicator, type_):
+        while True:
+            besked = await communicator.receive_output(timeout=5)
+            if f"event: {type_}".encode() in besked.get('body', b''):
+                return json.loads(besked['body'].decode().split('data: ', 1)[1])
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+        'method': 'GET', 'path': '/api/mechanic/events/', 'query_string': b'', 'server': ('testserver', 80),
+    }
+
+    async def test_kræver_login(self):
+        communicator = ApplicationCommunicator(application, {**self.scope, 'headers': []})
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        self.assertEqual((await communicator.receive_output(timeout=5))['status'], 403)
+
+    async def test_tildeling_og_status_sendes_til_mekanikeren(self):
+        mekaniker = await User.objects.acreate(username='mekaniker')
+        await sync_to_async(self.client.force_login)(mekaniker)
+        cookie = f"sessionid={self.client.cookies['sessionid'].value}".encode()
+        communicator = ApplicationCommunicator(application, {**self.scope, 'headers': [(b'cookie', cookie)]})
+        await communicator.send_input({'type': 'http.request', 'body': b'', 'more_body': False})
+        start = await communicator.receive_output(timeout=5)
+        self.assertEqual(start['status'], 200)
+        await self.læs(communicator, 'ready')
+        self.assertEqual(live.feed.subscriber_count, 1)
+
+        def tildel():
+            report = FaultReport.objects.create(title='Punktering', description='', vpid='A-1',
+                                                priority=1, assigned_to=mekaniker)
+            report.started_at = timezone.now()
+            report.save()
+            return report
+
+        report = await sync_to_async(tildel)()
+        self.assertEqual((await self.læs(communicator, 'high_priority'))['report']['id'], report.pk)
+        self.assertEqual((await self.læs(communicator, 'assigned'))['report']['vpid'], 'A-1')
+        opdateret = await self.læs(communicator, 'updated')
+        self.assertEqual(opdateret['report']['status'], FaultReport.CURRENT_STARTED)
+
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(timeout=5)
+        self.assertEqual(live.feed.subscriber_count, 0)
+
+
+class ReportTransitionTests(TestCase):
+    def setUp(self):
+        self.mekaniker = User.objects.create_user('mekaniker')
+        self.client.force_login(self.mekaniker)
+        self.report = FaultReport.objects.create(title='R', description='', assigned_to=self.mekaniker)
+
+    def test_ulovligt_skift_afvises(self):
+        url = f'/da/report/{self.report.pk}/start/'
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.post(url).status_code, 200)
+        rapport_sql = [q['sql'] for q in queries if 'assets_faultreport' in q['sql']]
+        self.assertEqual(len(rapport_sql), 1)
+        self.assertTrue(rapport_sql[0].startswith('UPDATE'))
+        self.assertEqual(self.client.post(url).status_code, 409)
+        self.assertEqual(self.client.post(f'/da/report/{self.report.pk}/complete/').status_code, 200)
+        self.assertEqual(self.client.post(f'/da/report/{self.report.pk}/complete/').status_code, 409)
+        self.assertEqual(self.client.post('/da/report/999999/complete/').status_code, 404)
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.completed_by, self.report.repair_status), (self.mekaniker, True))
+
+    def test_bulk_i_én_transaktion(self):
+        afsluttet = FaultReport.objects.create(title='F', description='', completed_at=timezone.now())
+        body = {'action': 'complete', 'ids': [self.report.pk, afsluttet.pk, 999999]}
+        self.assertEqual(self.client.post('/api/reports/bulk-status/', body, 'application/json').status_code, 403)
+
+        værkfører = User.objects.create_superuser('værkfører', 'v@example.com', 'x')
+        self.client.force_login(værkfører)
+        svar = self.client.post('/api/reports/bulk-status/', body, 'application/json').json()
+        self.assertEqual((svar['updated'], svar['rejected'], svar['missing']), ([self.report.pk], [afsluttet.pk], [999999]))
+        self.assertEqual(FaultReport.objects.get(pk=self.report.pk).completed_by, værkfører)
+
+    def test_bulk_kræver_en_liste_af_heltal(self):
+        self.client.force_login(User.objects.create_superuser('værkfører', 'v@example.com', 'x'))
+        for ids in (str(self.report.pk), {str(self.report.pk): 1}, [str(self.report.pk)], [True], None):
+            svar = self.client.post('/api/reports/bulk-status/', {'action': 'start', 'ids': ids}, 'application/json')
+            self.assertEqual(svar.status_code, 400, ids)
+        for_mange = list(range(1, transitions.MAX_BULK_IDS + 2))
+        svar = self.client.post('/api/reports/bulk-status/', {'action': 'start', 'ids': for_mange}, 'application/json')
+        self.assertEqual(svar.status_code, 400)
+        self.assertIsNone(FaultReport.objects.get(pk=self.report.pk).started_at)
+
+    def test_admin_handling_kræver_ændringsret(self):
+        læser = User.objects.create_user('læser', is_staff=True)
+        læser.user_permissions.add(Permission.objects.get(codename='view_faultreport'))
+        self.client.force_login(læser)
+        self.client.post('/admin/assets/faultreport/', {
+            'action': 'complete_selected', '_selected_action': [self.report.pk],
+        })
+        self.assertIsNone(FaultReport.objects.get(pk=self.report.pk).completed_at)
+        request = RequestFactory().get('/admin/assets/faultreport/')
+        request.user = læser
+        self.assertNotIn('complete_selected', admin_site._registry[FaultReport].get_actions(request))
+
+
+@override_settings(TRANSLATION_WORKER={'ASYNC': False})
+class ReportBatchTests(StandInMotorMixin, TestCase):
+    def test_dubletter_springes_over_og_oversættes_samlet(self):
+        body = [
+            {'key': 'a', 'VPID': '101-10', 'description': 'Reifen platt'},
+            {'key': 'b', 'VPID': '101-11', 'description': 'Motor laut', 'sprog': 'pl'},
+            {'key': 'a', 'VPID': '101-10', 'description': 'Reifen platt'},
+            {'VPID': '101-12'},
+        ]
+        with mock.patch.object(translator, 'oversæt_batch', wraps=translator.oversæt_batch) as oversæt_batch:
+            svar = self.client.post('/api/reports/batch/', body, 'application/json').json()
+        self.assertEqual([r['status'] for r in svar['results']], ['created', 'created', 'duplicate', 'error'])
+        self.assertEqual(svar['results'][0]['report_id'], svar['results'][2]['report_id'])
+        # Ét kald til engelsk for hele batchen, og derfra ét kald pr. øvrigt UI-sprog
+        self.assertEqual([c.args[2] for c in oversæt_batch.call_args_list][0], 'en')
+        self.assertEqual(sorted(c.args[2] for c in oversæt_batch.call_args_list), ['da', 'de', 'en', 'pl'])
+        self.assertEqual(self.kald_til('de', 'en') + self.kald_til('pl', 'en'), ['Reifen platt', 'Motor laut'])
+        self.assertEqual(sorted(self.kald_til('en', 'da')), ['[en] Motor laut', '[en] Reifen platt'])
+        rapport = FaultReport.objects.get(client_key='a')
+        self.assertEqual((rapport.description, rapport.translation_status), ("[da] [en] Reifen platt", 'done'))
+
+        with CaptureQueriesContext(connection) as queries:
+            igen = self.client.post('/api/reports/batch/', body[:2], 'application/json').json()
+        self.assertEqual([r['status'] for r in igen['results']], ['duplicate', 'duplicate'])
+        self.assertFalse([q for q in queries if q['sql'].startswith('INSERT')])
+        self.assertEqual(FaultReport.objects.count(), 2)
+
+
+class VPIDResolverTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        resolver.index.invalidate()
+        self.addCleanup(resolver.index.invalidate)
+        self.aktiv = Asset.objects.create(VPID='VP-101', description='')
+
+    def test_opslag_uden_forespørgsel_og_invalidering(self):
+        self.assertEqual(resolver.resolve_asset_id(' vp-101 '), self.aktiv.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve_asset_id('VP-101'), self.aktiv.pk)
+            self.assertIsNone(resolver.resolve_asset_id('VP-999'))
+
+        self.aktiv.VPID = 'VP-102'
+        self.aktiv.save()
+        self.assertIsNone(resolver.resolve_asset_id('VP-101'))
+        self.assertEqual(resolver.resolve_asset_id('vp-102'), self.aktiv.pk)
+
+        svar = self.client.post('/api/reports/', {'VPID': 'vp-102 ', 'description': ''})
+        self.assertEqual(FaultReport.objects.get(pk=svar.json()['report_id']).asset, self.aktiv)
+
+    def test_backfill(self):
+        gammel = FaultReport.objects.create(title='R', description='', vpid='vp-101')
+        ukendt = FaultReport.objects.create(title='R', description='', vpid='VP-404')
+        call_command('link_report_assets', '--batch-size', '1', stdout=StringIO())
+        gammel.refresh_from_db()
+        ukendt.refresh_from_db()
+        self.assertEqual((gammel.asset, ukendt.asset), (self.aktiv, None))
+
+
+class DedupeVPIDMigrationTests(TransactionTestCase):
+    """Migration 0011 gør VPID unik; dubletter flyttes over til aktivet med laveste id."""
+
+    def _migrer(self, mål=None):
+        """Migrerer assets til `mål` (None = seneste) og returnerer modeltilstanden dér."""
+        from django.db.migrations.executor import MigrationExecutor
+        executor = MigrationExecutor(connection)
+        node = ('assets', mål) if mål else executor.loader.graph.leaf_nodes('assets')[0]
+        executor.migrate([node])
+        return executor.loader.project_state([node]).apps
+
+    def test_dubletter_omdøbes_og_rapporter_flyttes(self):
+        self.addCleanup(self._migrer)
+        apps = self._migrer('0010_asset_sync')
+        Asset_ = apps.get_model('assets', 'Asset')
+        Equipment_ = apps.get_model('assets', 'Equipment')
+        FaultReport_ = apps.get_model('assets', 'FaultReport')
+        beholdes, dublet, anden = (
+            Asset_.objects.create(VPID=vpid, description='') for vpid in ('VP-1', 'VP-1', 'VP-2')
+        )
+        lang = 'L' * 100
+        lange = [Asset_.objects.create(VPID=lang, description='') for _ in range(3)]
+        fælles, eget = Equipment_.objects.create(name='Fælles'), Equipment_.objects.create(name='Eget')
+        beholdes.equipment.add(fælles)
+        dublet.equipment.add(fælles, eget)
+        rapport = FaultReport_.objects.create(title='R', description='', asset=dublet)
+
+        with self.assertLogs('assets', 'WARNING') as log:
+            self._migrer()
+        self.assertIn('3 aktiver med dublet-VPID', log.output[0])
+
+        beholdes, dublet, anden = (Asset.objects.get(pk=a.pk) for a in (beholdes, dublet, anden))
+        self.assertEqual((beholdes.VPID, beholdes.is_active), ('VP-1', True))
+        self.assertEqual((dublet.VPID, dublet.is_active), (f'VP-1~dup{dublet.pk}', False))
+        self.assertEqual(anden.VPID, 'VP-2')
+        self.assertEqual(FaultReport.objects.get(pk=rapport.pk).asset, beholdes)
+        self.assertEqual(sorted(beholdes.equipment.values_list('name', flat=True)), ['Eget', 'Fælles'])
+        version = CatalogVersion.objects.get(key='assets').version
+        self.assertGreater(version, 0)
+        self.assertEqual(dublet.sync_version, version)
+        # Lange VPID'er afkortes før endelsen, så dubletterne stadig får hver sit navn
+        self.assertEqual(
+            list(Asset.objects.filter(pk__in=[a.pk for a in lange]).order_by('pk').values_list('VPID', flat=True)),
+            [lang, *(lang[:100 - len(f'~dup{a.pk}')] + f'~dup{a.pk}' for a in lange[1:])],
+        )
+
+
+class ReportStatisticsTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.mekaniker = User.objects.create_user('mekaniker')
+        self.aktiv = Asset.objects.create(VPID='VP-1', description='', location='Hal 1')
+
+    def tal(self):
+        return {
+            (s.dimension, s.key): tuple(getattr(s, f) for f in stats.COUNTERS)
+            for s in ReportStatistic.objects.all() if any(getattr(s, f) for f in stats.COUNTERS)
+        }
+
+    def test_løbende_tal_svarer_til_afstemning(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rapport = FaultReport.objects.create(title='R', description='', asset=self.aktiv, priority=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rapport.assigned_to = self.mekaniker
+            rapport.save()
+        for handling in ('start', 'complete'):
+            with self.captureOnCommitCallbacks(execute=True):
+                transitions.apply_transition(handling, [rapport.pk], self.mekaniker)
+        with mock.patch.object(translation_worker.worker, 'enqueue_batch'), self.captureOnCommitCallbacks(execute=True):
+            report_batch.submit_batch([{'key': 'k1', 'VPID': 'vp-1', 'description': 'x'}])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aktiv.location = 'Hal 2'
+            self.aktiv.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            FaultReport.objects.create(title='Slettes', description='').delete()
+
+        løbende = self.tal()
+        self.assertEqual(løbende[('total', '')][:2], (1, 1))
+        self.assertEqual(løbende[('location', 'Hal 2')][0], 1)
+        self.assertEqual(stats.reconcile(), (0, 0))
+        self.assertEqual(self.tal(), løbende)
+
+        FaultReport.objects.filter(pk=rapport.pk).update(priority=3)  # Uden om signalerne
+        self.assertEqual(stats.reconcile(), (2, 0))
+
+    def test_dashboard_læser_kun_statistikken(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            FaultReport.objects.create(title='R', description='', asset=self.aktiv, assigned_to=self.mekaniker)
+        self.client.force_login(self.mekaniker)
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser('værkfører', 'v@example.com', 'x'))
+        with CaptureQueriesContext(connection) as queries:
+            svar = self.client.get('/api/dashboard/').json()
+        self.assertFalse([q for q in queries if 'assets_faultreport' in q['sql']])
+        self.assertEqual(svar['total']['open'], 1)
+        self.assertEqual([(a['label'], a['open']) for a in svar['asset']], [('VP-1 - ', 1)])
+        self.assertEqual(svar['mechanic'][0]['label'], 'mekaniker')
+
+
+class TranslationMemoryLoaderTests(TestCase):
+    def test_nyeste_i_alt_ældste_først(self):
+        rapporter = [
+            FaultReport.objects.create(
+                title=f'R{i}', description=f'da {i}', original_description=f'de {i}', sprog='de',
+                translation_status=FaultReport.TRANSLATION_DONE,
+            )
+            for i in range(3)
+        ]
+        for rapport in rapporter:
+            FaultReportTranslation.objects.create(report=rapport, language='en', text=f'en {rapport.title}')
+        poster = list(load_translation_memory(limit=4))
+        self.assertEqual([tekst for tekst, *_ in poster], ['de 1', 'de 1', 'de 2', 'de 2'])
+        self.assertEqual({mål for _tekst, _fra, mål, _oversat in poster}, {'da', 'en'})
+
+
+@override_settings(QR_LABELS={'COLUMNS': 2, 'ROWS': 2})
+class QRLabelTests(TestCase):
+    def setUp(self):
+        Asset.objects.bulk_create([
+            Asset(VPID=f'VP-{i}', name=f'Kran <{i}>', description='', is_active=i != 4) for i in range(5)
+        ])
+
+    def test_etiketark_i_webappen_renderes_uden_pulje(self):
+        self.assertEqual(self.client.get('/da/print_qr/labels/').status_code, 302)
+        self.client.force_login(User.objects.create_user('mekaniker'))
+        with mock.patch('assets.qr_labels._new_pool', side_effect=AssertionError("Ingen pulje i webappen")):
+            svar = self.client.get('/da/print_qr/labels/', {'is_active': '1'})
+            html = b''.join(svar.streaming_content).decode()
+        self.assertEqual(svar.headers['Cache-Control'], 'no-store')
+        self.assertEqual(html.count('<section class="sheet">'), 1)
+        self.assertEqual(html.count('<svg'), 4)
+        self.assertIn('<strong>VP-0</strong><span>Kran &lt;0&gt;</span>', html)
+        self.assertNotIn('VP-4', html)
+        self.assertTrue(html.endswith('</html>\n'))
+
+    def test_workers_nul_i_indstillingerne_giver_ingen_pulje(self):
+        with override_settings(QR_LABELS={'WORKERS': 0}), \
+                mock.patch('assets.qr_labels._new_pool', side_effect=AssertionError("Ingen pulje")):
+            pngs = list(qr_labels.render_pngs(['VP-0', 'VP-1'], size=50))
+        self.assertEqual([png[:4] for png in pngs], [b'\x89PNG'] * 2)
+
+    def test_kommando_renderer_i_spawn_pulje(self):
+        sti = os.path.join(tempfile.mkdtemp(), 'etiketter.html')
+        self.addCleanup(shutil.rmtree, os.path.dirname(sti), ignore_errors=True)
+        out = StringIO()
+        call_command('print_labels', '--workers', '1', '-o', sti, stdout=out)
+        self.assertIn('5 etiketter', out.getvalue())
+        with open(sti, encoding='utf-8') as f:
+            html = f.read()
+        self.assertEqual(html.count('<section class="sheet">'), 2)
+        self.assertLess(html.index('VP-0'), html.index('VP-1'))
+        self.assertIn('VP-4', html)
+
+
+class QRImageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.aktiv = Asset.objects.create(VPID='VP-1', description='')
+        self.url = f'/qr/{self.aktiv.pk}.svg'
+
+    def test_etag_og_last_modified_følger_aktivet(self):
+        svar = self.client.get(self.url)
+        self.assertEqual((svar.status_code, svar.headers['Content-Type']), (200, 'image/svg+xml'))
+        self.assertIn(b'<svg', svar.content)
+        etag, last_modified = svar.headers['ETag'], svar.headers['Last-Modified']
+        self.assertEqual(last_modified, http_date(self.aktiv.modified_at.timestamp()))
+        self.assertEqual(self.client.get(self.url).headers['Last-Modified'], last_modified)
+        self.assertNotEqual(self.client.get(self.url, {'size': 100}).headers['ETag'], etag)
+
+        with mock.patch('assets.qr_utils.render_qr', side_effect=AssertionError("Renderet trods 304")):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        Asset.objects.filter(pk=self.aktiv.pk).update(VPID='VP-2', modified_at=self.aktiv.modified_at + timedelta(minutes=1))
+        svar = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(svar.status_code, 200)
+        self.assertNotEqual(svar.headers['ETag'], etag)
+
+    def test_ukendt_aktiv_eller_format(self):
+        self.assertEqual(self.client.get('/qr/999999.svg').status_code, 404)
+        self.assertEqual(self.client.get(f'/qr/{self.aktiv.pk}.gif').status_code, 404)
+
+
+@override_settings(IMAGE_PROCESSING={'MAX_DIMENSION': 200, 'THUMBNAIL_SIZE': 50})
+class ImageProcessingTests(TempMediaMixin, TestCase):
+    def billede(self, størrelse, fmt='PNG', orientering=None):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        if orientering:
+            exif[0x0112] = orientering
+        Image.new('RGB', størrelse, 'red').save(buffer, format=fmt, exif=exif)
+        return buffer.getvalue()
+
+    def størrelse(self, felt):
+        with felt.open('rb') as f:
+            return Image.open(f).size
+
+    def indsend(self, data, **kwargs):
+        """Indsender via /api/reports/ og kører billedbehandlingen her i tråden i stedet for i baggrunden."""
+        kør_her = lambda instance: image_processing.process_image(instance._meta.label, instance.pk)
+        with mock.patch.object(translation_worker.worker, 'enqueue'), \
+                mock.patch.object(image_processing, 'schedule', side_effect=kør_her), \
+                self.captureOnCommitCallbacks(execute=True):
+            svar = self.client.post('/api/reports/', data, **kwargs)
+        return FaultReport.objects.get(pk=svar.json()['report_id'])
+
+    def test_upload_nedskaleres_og_får_miniature(self):
+        upload = SimpleUploadedFile('skade.png', self.billede((600, 300)), content_type='image/png')
+        rapport = self.indsend({'VPID': 'VP-1', 'description': 'Reifen platt', 'image': upload})
+        self.assertTrue(rapport.image.name.endswith('.jpg'))
+        self.assertEqual(self.størrelse(rapport.image), (200, 100))
+        self.assertTrue(rapport.image_thumbnail.name.startswith('blobs/'))
+        self.assertEqual(self.størrelse(rapport.image_thumbnail), (50, 25))
+        self.assertFalse(image_processing.needs_processing(rapport))
+
+    def test_exif_rotation_og_base64(self):
+        data = base64.b64encode(self.billede((40, 20), 'JPEG', orientering=6)).decode()
+        rapport = self.indsend(
+            {'VPID': 'VP-1', 'description': 'x', 'image': f'data:image/jpeg;base64,{data}'}, content_type='application/json'
+        )
+        self.assertEqual(self.størrelse(rapport.image), (20, 40))
+        self.assertEqual(self.størrelse(rapport.image_thumbnail), (20, 40))
+
+    def test_andet_end_billeder_afvises_og_logges(self):
+        upload = SimpleUploadedFile('noter.txt', b'ikke et billede', content_type='text/plain')
+        with self.assertLogs('assets.views', 'WARNING') as logs:
+            rapport = self.indsend({'VPID': 'VP-1', 'description': 'x', 'image': upload})
+        self.assertFalse(rapport.image)
+        self.assertIn('ikke et billede', logs.output[0])
+
+    def test_udskiftet_billede_røres_ikke(self):
+        storage = media_blob_storage()
+        rapport = FaultReport.objects.create(title='R', description='')
+        gammelt = storage.save('fault_reports/a.png', ContentFile(self.billede((300, 300))))
+        FaultReport.objects.filter(pk=rapport.pk).update(image=gammelt)
+        rigtig_open = Image.open
+
+        def udskift_undervejs(*args, **kwargs):
+            # En ny upload gemmes, mens det gamle billede behandles
+            FaultReport.objects.filter(pk=rapport.pk).update(image='fault_reports/nyt.png')
+            return rigtig_open(*args, **kwargs)
+
+        with mock.patch.object(image_processing.Image, 'open', side_effect=udskift_undervejs):
+            self.assertFalse(image_processing.process_image('assets.FaultReport', rapport.pk))
+        rapport.refresh_from_db()
+        self.assertEqual((rapport.image.name, rapport.image_thumbnail.name), ('fault_reports/nyt.png', ''))
+        # Kun det oprindelige billede har en reference; behandlingens egne filer er sluppet igen
+        self.assertEqual(MediaBlob.objects.get(name=gammelt).refcount, 1)
+        self.assertEqual(list(MediaBlob.objects.exclude(name=gammelt).values_list('refcount', flat=True)), [0, 0])
+
+    def test_nyt_billede_nulstiller_miniaturen(self):
+        storage = media_blob_storage()
+        rapport = FaultReport.objects.create(title='R', description='')
+        FaultReport.objects.filter(pk=rapport.pk).update(
+            image=storage.save('fault_reports/a.png', ContentFile(b'a')),
+            image_thumbnail=storage.save('thumbnails/a.jpg', ContentFile(b'mini')),
+        )
+        rapport.refresh_from_db()
+        with mock.patch.object(image_processing, 'schedule') as schedule, self.captureOnCommitCallbacks(execute=True):
+            rapport.image = storage.save('fault_reports/b.png', ContentFile(b'b'))
+            rapport.save(update_fields=['image'])
+        self.assertEqual(FaultReport.objects.get(pk=rapport.pk).image_thumbnail.name, '')
+        schedule.assert_called_once()
+        self.assertEqual(MediaBlob.objects.get(name=rapport.image.name).refcount, 1)
+        self.assertFalse(MediaBlob.objects.filter(refcount__gt=0).exclude(name=rapport.image.name).exists())
+
+    def test_kommando_behandler_eksisterende_billeder(self):
+        rapport = FaultReport.objects.create(title='R', description='')
+        FaultReport.objects.filter(pk=rapport.pk).update(
+            image=media_blob_storage().save('fault_reports/gammel.png', ContentFile(self.billede((300, 300))))
+        )
+        out = StringIO()
+        call_command('process_images', '--model', 'faultreport', stdout=out)
+        self.assertIn('1 billeder behandlet', out.getvalue())
+        rapport.refresh_from_db()
+        self.assertEqual(self.størrelse(rapport.image_thumbnail), (50, 50))
@@ -0,0 +1,72 @@
+"""
+Statusskift på fejlrapporter (start, afslut) som ét betinget UPDATE.
+
+Betingelsen står i WHERE, så to mekanikere der trykker samtidig ikke kan
+overskrive hinanden: den ene opdaterer rækken, den anden får den afvist.
+Kun de ændrede kolonner og updated_at skrives, og der læses ikke først.
+Rammer UPDATE'et ikke alle rapporterne, rulles det tilbage, og de tilladte
+låses og vælges med SELECT ... FOR UPDATE, før de opdateres, så svaret
+siger præcis hvilke der blev ændret.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+from . import live, stats
+from .models import FaultReport
+
+MAX_BULK_IDS = 1000
+
+# Handling -> (hvilke rapporter den gælder for, den kolonne der markerer skiftet)
+TRANSITIONS = {
+    'start': (Q(started_at__isnull=True, completed_at__isnull=True), 'started_at'),
+    'complete': (Q(completed_at__isnull=True), 'completed_at'),
+}
+
+
+def _values(action, now, user):
+    if action == 'start':
+        return {'started_at': now}
+    return {'completed_at': now, 'completed_by': user, 'repair_status': True}
+
+
+def apply_transition(action, report_ids, user):
+    """
+    Udfører `action` på rapporterne i én transaktion. Returnerer et dict med
+    updated (ændret nu), rejected (findes, men handlingen er ikke tilladt i
+    rapportens status) og missing (findes ikke), alle som lister af id'er.
+    """
+    if action not in TRANSITIONS:
+        raise ValueError(f"Ukendt handling: {action}")
+    betingelse, markør = TRANSITIONS[action]
+    report_ids = sorted({int(pk) for pk in report_ids})
+    now = timezone.now()
+
+    with transaction.atomic():
+        savepoint = transaction.savepoint()
+        antal = FaultReport.objects.filter(betingelse, pk__in=report_ids).update(
+            **_values(action, now, user), updated_at=now
+        )
+        if antal == len(report_ids):
+            transaction.savepoint_commit(savepoint)
+            updated, findes = report_ids, set(report_ids)
+        else:
+            # Kun ved afvisninger: lås rækkerne og opdater netop dem der stadig opfylder betingelsen
+            transaction.savepoint_rollback(savepoint)
+            rækker = dict(
+                FaultReport.objects.select_for_update().filter(pk__in=report_ids)
+                .annotate(tilladt=ExpressionWrapper(betingelse, output_field=BooleanField()))
+                .values_list('pk', 'tilladt')
+            )
+            updated = sorted(pk for pk, tilladt in rækker.items() if tilladt)
+            findes = set(rækker)
+            if updated:
+                FaultReport.objects.filter(pk__in=updated).update(**_values(action, now, user), updated_at=now)
+        if updated:
+            transaction.on_commit(lambda: live.publish_updates(updated))
+            transaction.on_commit(lambda: stats.record_transition(markør, updated))
+
+    return {
+        'updated': updated,
+        'rejected': sorted(findes - set(updated)),
+        'missing': sorted(set(report_ids) - findes),
+    }
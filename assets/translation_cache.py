@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from .models import TranslationCacheEntry
+
+
+class DatabaseTranslationCache:
+    """
+    Persistent lag af oversættelsescachen (se translator.OversættelsesCache).
+
+    Rækkerne deles mellem alle worker-processer. Gamle og overskydende rækker
+    fjernes af prune(), som også kaldes automatisk for hver `prune_hver` skrivning.
+    """
+
+    def __init__(self, maks_rækker=50000, maks_alder=timedelta(days=180), prune_hver=500):
+        self.maks_rækker = maks_rækker
+        self.maks_alder = maks_alder
+        self.prune_hver = prune_hver
+        self._skrivninger = 0
+
+    def get(self, text_hash, fra_sprog, mål_sprog):
+        entry = TranslationCacheEntry.objects.filter(
+            text_hash=text_hash, source_language=fra_sprog, target_language=mål_sprog
+        ).values_list('pk', 'translated_text', 'last_used_at').first()
+        if entry is None:
+            return None
+        pk, tekst, sidst_brugt = entry
+        nu = timezone.now()
+        if self.maks_alder and sidst_brugt < nu - self.maks_alder:
+            return None
+        TranslationCacheEntry.objects.filter(pk=pk).update(hits=F('hits') + 1, last_used_at=nu)
+        return tekst
+
+    def set(self, text_hash, fra_sprog, mål_sprog, tekst):
+        try:
+            TranslationCacheEntry.objects.update_or_create(
+                text_hash=text_hash, source_language=fra_sprog, target_language=mål_sprog,
+                defaults={'translated_text': tekst, 'last_used_at': timezone.now()}
+            )
+        except IntegrityError:
+            # En anden proces nåede at gemme samme nøgle først
+            pass
+        self._skrivninger += 1
+        if self.prune_hver and self._skrivninger % self.prune_hver == 0:
+            self.prune()
+
+    def prune(self):
+        """Sletter rækker ældre end maks_alder og de mindst brugte ud over maks_rækker."""
+        slettet = 0
+        if self.maks_alder:
+            slettet += TranslationCacheEntry.objects.filter(
+                last_used_at__lt=timezone.now() - self.maks_alder
+            ).delete()[0]
+        if self.maks_rækker:
+            grænse = list(TranslationCacheEntry.objects.order_by('-last_used_at').values_list(
+                'last_used_at', flat=True
+            )[self.maks_rækker:self.maks_rækker + 1])
+            if grænse:
+                slettet += TranslationCacheEntry.objects.filter(last_used_at__lte=grænse[0]).delete()[0]
+        return slettet
+
+    def clear(self):
+        return TranslationCacheEntry.objects.all().delete()[0]
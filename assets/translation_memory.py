@@ -0,0 +1,37 @@
+import heapq
+from itertools import islice
+from django.db.models import F
+from .models import FaultReport, FaultReportTranslation
+
+
+def load_translation_memory(limit=50000):
+    """
+    Leverer (original, fra_sprog, mål_sprog, oversat) fra eksisterende fejlrapporter
+    til translator.hukommelse: de `limit` nyeste på tværs af danske og andre sprog,
+    ældste først, så nyere oversættelser overskriver ældre og smides ud sidst.
+    Mislykkede oversættelser og rapporter hvis beskrivelse aldrig blev oversat
+    (fx importeret fra det gamle system), springes over.
+    """
+    danske = (
+        FaultReport.objects.filter(translation_status=FaultReport.TRANSLATION_DONE)
+        .exclude(original_description__isnull=True).exclude(original_description='')
+        .exclude(sprog='da')
+        .exclude(description__startswith="[Oversættelse fejlede")
+        .exclude(description=F('original_description'))
+        .order_by('-pk')
+        .values_list('pk', 'original_description', 'sprog', 'description')[:limit]
+    )
+    andre = (
+        FaultReportTranslation.objects.exclude(language='da').exclude(language=F('report__sprog'))
+        .exclude(report__original_description__isnull=True)
+        .order_by('-report_id', '-pk')
+        .values_list('report_id', 'report__original_description', 'report__sprog', 'language', 'text')[:limit]
+    )
+    # Nyeste først på tværs af begge (rapportens id som tidsorden), højst `limit` i alt
+    nyeste = islice(heapq.merge(
+        ((pk, original, sprog, 'da', description) for pk, original, sprog, description in danske.iterator(chunk_size=2000)),
+        andre.iterator(chunk_size=2000),
+        key=lambda række: række[0], reverse=True,
+    ), limit)
+    for _, original, sprog, language, text in reversed(list(nyeste)):
+        yield original, sprog, language, text
@@ -0,0 +1,269 @@
+import logging
+import queue
+import threading
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from translator import oversæt_alle, oversæt_batch_alle, er_fejlet
+from .models import FaultReport, FaultReportTranslation
+
+logger = logging.getLogger(__name__)
+
+
+def worker_settings():
+    return {
+        'ASYNC': True,
+        'MAX_ATTEMPTS': 3,
+        'RETRY_DELAY': 30,
+        'CLAIM_TIMEOUT': 600,
+        'AUTOSTART': True,
+        **getattr(settings, 'TRANSLATION_WORKER', {}),
+    }
+
+
+def ui_languages():
+    """Sprogkoderne fra settings.LANGUAGES med dansk først."""
+    koder = [code for code, _name in settings.LANGUAGES]
+    return ['da'] + [code for code in koder if code != 'da']
+
+
+def translation_rows(report_id, kilde_sprog, oversættelser):
+    """
+    FaultReportTranslation-rækkerne for de vellykkede oversættelser af en rapport.
+    Dansk gemmes kun i description og kildesproget kun i original_description.
+    """
+    return [
+        FaultReportTranslation(report_id=report_id, language=sprog, text=tekst)
+        for sprog, tekst in oversættelser.items()
+        if sprog not in ('da', kilde_sprog) and not er_fejlet(tekst)
+    ]
+
+
+def save_translations(rækker):
+    """Gemmer/overskriver rækkerne fra translation_rows()."""
+    FaultReportTranslation.objects.bulk_create(
+        rækker,
+        update_conflicts=True,
+        unique_fields=['report', 'language'],
+        update_fields=['text'],
+    )
+
+
+def claim_reports(report_ids):
+    """
+    Tager de afventende rapporter blandt report_ids med ét UPDATE, så to workere
+    (fx i hver sin proces) ikke oversætter den samme. Rapporter en anden worker
+    har taget, springes over, medmindre kravet er ældre end CLAIM_TIMEOUT (så
+    døde workeren undervejs). Returnerer kravets nøgle; de tagne rapporter har
+    den i translation_claim.
+    """
+    nøgle = uuid.uuid4().hex
+    nu = timezone.now()
+    grænse = nu - timedelta(seconds=worker_settings()['CLAIM_TIMEOUT'])
+    FaultReport.objects.filter(
+        Q(translation_claimed_at__isnull=True) | Q(translation_claimed_at__lt=grænse),
+        pk__in=list(report_ids), translation_status=FaultReport.TRANSLATION_PENDING,
+    ).update(translation_claim=nøgle, translation_claimed_at=nu)
+    return nøgle
+
+
+# Felterne der frigiver et krav, når rapporten er færdig eller skal prøves igen
+FRIGIVET = {'translation_claim': '', 'translation_claimed_at': None}
+
+
+def translate_report(report_id, max_forsøg=None):
+    """
+    Oversætter én afventende fejlrapport til alle UI-sprog i ét gennemløb og
+    gemmer den danske tekst i `description` og de øvrige sprog i FaultReportTranslation.
+
+    Returnerer True når rapporten er færdig (oversat, endeligt fejlet eller
+    taget af en anden worker) og False når den skal prøves igen.
+    """
+    if max_forsøg is None:
+        max_forsøg = worker_settings()['MAX_ATTEMPTS']
+    nøgle = claim_reports([report_id])
+    taget = FaultReport.objects.filter(pk=report_id, translation_claim=nøgle)
+    report = taget.values('original_description', 'sprog', 'translation_attempts').first()
+    if report is None:
+        return True
+
+    original = report['original_description'] or ''
+    try:
+        oversættelser = oversæt_alle(original, report['sprog'], ui_languages())
+    except Exception:
+        logger.exception("Oversættelse af rapport %s fejlede", report_id)
+        oversættelser = {}
+    result = oversættelser.get('da', f"[Oversættelse fejlede: {original}]")
+    save_translations(translation_rows(report_id, report['sprog'], oversættelser))
+
+    forsøg = report['translation_attempts'] + 1
+    if not er_fejlet(result):
+        taget.update(
+            description=result,
+            translation_status=FaultReport.TRANSLATION_DONE,
+            translation_attempts=forsøg,
+            updated_at=timezone.now(),
+            **FRIGIVET,
+        )
+        return True
+
+    if forsøg >= max_forsøg:
+        logger.warning("Rapport %s kunne ikke oversættes efter %d forsøg", report_id, forsøg)
+        taget.update(
+            description=result,
+            translation_status=FaultReport.TRANSLATION_FAILED,
+            translation_attempts=forsøg,
+            updated_at=timezone.now(),
+            **FRIGIVET,
+        )
+        return True
+
+    taget.update(translation_attempts=F('translation_attempts') + 1, **FRIGIVET)
+    return False
+
+
+def translate_reports(report_ids, max_forsøg=None):
+    """
+    Oversætter mange afventende fejlrapporter på én gang med oversæt_batch_alle():
+    beskrivelserne oversættes til engelsk én gang og derfra til hvert UI-sprog,
+    og resultaterne gemmes med få forespørgsler i stedet for et gennemløb pr. rapport.
+
+    Returnerer id'erne på de rapporter der skal prøves igen.
+    """
+    if max_forsøg is None:
+        max_forsøg = worker_settings()['MAX_ATTEMPTS']
+    report_ids = list(report_ids)
+    nøgle = claim_reports(report_ids)
+    taget = FaultReport.objects.filter(pk__in=report_ids, translation_claim=nøgle)
+    rapporter = list(taget.values('id', 'original_description', 'sprog', 'translation_attempts'))
+    if not rapporter:
+        return []
+
+    originaler = [r['original_description'] or '' for r in rapporter]
+    try:
+        oversættelser = oversæt_batch_alle(originaler, [r['sprog'] for r in rapporter], ui_languages())
+    except Exception:
+        logger.exception("Batch-oversættelse af %d rapporter fejlede", len(rapporter))
+        oversættelser = [{} for _ in rapporter]
+
+    save_translations([
+        række
+        for r, pr_sprog in zip(rapporter, oversættelser)
+        for række in translation_rows(r['id'], r['sprog'], pr_sprog)
+    ])
+
+    nu = timezone.now()
+    færdige, igen = [], []
+    for r, original, pr_sprog in zip(rapporter, originaler, oversættelser):
+        result = pr_sprog.get('da', f"[Oversættelse fejlede: {original}]")
+        forsøg = r['translation_attempts'] + 1
+        if er_fejlet(result) and forsøg < max_forsøg:
+            igen.append(r['id'])
+            continue
+        if er_fejlet(result):
+            logger.warning("Rapport %s kunne ikke oversættes efter %d forsøg", r['id'], forsøg)
+        færdige.append(FaultReport(
+            pk=r['id'],
+            description=result,
+            translation_status=FaultReport.TRANSLATION_FAILED if er_fejlet(result) else FaultReport.TRANSLATION_DONE,
+            translation_attempts=forsøg,
+            updated_at=nu,
+            **FRIGIVET,
+        ))
+    taget.bulk_update(
+        færdige, ['description', 'translation_status', 'translation_attempts', 'updated_at', *FRIGIVET]
+    )
+    if igen:
+        taget.filter(pk__in=igen).update(translation_attempts=F('translation_attempts') + 1, **FRIGIVET)
+    return igen
+
+
+class TranslationWorker:
+    """
+    Lokal baggrundstråd der oversætter fejlrapporter efter de er gemt.
+
+    Jobs ligger i en kø i processen; da status gemmes på rapporten, bliver
+    afventende rapporter samlet op igen når workeren startes efter en genstart.
+    Hver rapport tages (claim_reports) før den oversættes, så flere processer
+    med hver sin worker ikke oversætter den samme.
+    """
+
+    def __init__(self):
+        self._kø = queue.Queue()
+        self._tråd = None
+        self._lås = threading.Lock()
+
+    def start(self):
+        with self._lås:
+            if self._tråd is not None and self._tråd.is_alive():
+                return
+            self._tråd = threading.Thread(target=self._kør, name='translation-worker', daemon=True)
+            self._tråd.start()
+
+    def enqueue(self, report_id):
+        self.start()
+        self._kø.put(report_id)
+
+    def enqueue_batch(self, report_ids):
+        """Lægger rapporterne i køen som ét job, der oversættes med translate_reports()."""
+        self.start()
+        self._kø.put(list(report_ids))
+
+    def _genoptag_afventende(self):
+        timeout = worker_settings()['CLAIM_TIMEOUT']
+        try:
+            rækker = list(FaultReport.objects.filter(
+                translation_status=FaultReport.TRANSLATION_PENDING
+            ).order_by('created_at').values_list('pk', 'translation_claimed_at'))
+        except Exception as e:
+            logger.warning("Kunne ikke hente afventende oversættelser: %s", e)
+            return
+        grænse = timezone.now() - timedelta(seconds=timeout)
+        ledige = [pk for pk, taget in rækker if taget is None or taget < grænse]
+        optagne = [pk for pk, taget in rækker if taget is not None and taget >= grænse]
+        if rækker:
+            logger.info("Genoptager %d afventende oversættelser (%d er i gang andetsteds)", len(rækker), len(optagne))
+        for report_id in ledige:
+            self._kø.put(report_id)
+        if optagne:
+            # Tages af en anden worker; prøv igen når kravet kan være udløbet (færdige springes over)
+            timer = threading.Timer(timeout, self._kø.put, args=[optagne])
+            timer.daemon = True
+            timer.start()
+
+    def _kør(self):
+        self._genoptag_afventende()
+        close_old_connections()
+        while True:
+            job = self._kø.get()
+            try:
+                if isinstance(job, list):
+                    # En batch; de rapporter der skal prøves igen, kommer i køen som én ny batch
+                    igen = translate_reports(job) or None
+                else:
+                    igen = None if translate_report(job) else job
+            except Exception:
+                logger.exception("Oversættelsesjob for rapport(er) %s fejlede", job)
+                igen = job
+            finally:
+                close_old_connections()
+            if igen is not None:
+                forsinkelse = worker_settings()['RETRY_DELAY']
+                timer = threading.Timer(forsinkelse, self._kø.put, args=[igen])
+                timer.daemon = True
+                timer.start()
+
+
+worker = TranslationWorker()
+
+
+def start_worker(sender=None, **kwargs):
+    """Receiver for request_started: starter workeren ved første request i processen."""
+    from django.core.signals import request_started
+    if not (worker_settings()['ASYNC'] and worker_settings()['AUTOSTART']):
+        return
+    request_started.disconnect(start_worker, dispatch_uid='assets.translation_worker')
+    worker.start()
@@ -1,67 +1,117 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.base import ContentFile
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import models
-from django.utils.translation import gettext as _
+from django.db import models, transaction
+from django.urls import reverse
+from django.utils.translation import gettext as _, get_language
+from django.utils.cache import get_conditional_response
+from django.conf import settings
 import json
 import base64
-from .models import Asset, FaultReport
+import hashlib
+import logging
+from .models import Asset, FaultReport, FaultReportTranslation
 from .forms import AssetForm
-from translator import oversæt
+from . import catalog, report_batch, resolver, search, stats, transitions
+from .translation_worker import worker, worker_settings, translate_report
+
+logger = logging.getLogger(__name__)
 
 @csrf_exempt
 def submit_report(request):
+    """
+    API: Modtager en fejlrapport. Accepterer både multipart/form-data (billedet
+    streames som fil) og det gamle JSON-format med billedet som base64 data-URL.
+    """
     if request.method == 'POST':
         try:
-            data = json.loads(request.body)
+            image_file = None
+            image_data = None
+            if request.content_type == 'multipart/form-data':
+                # Django streamer filen i bidder til hukommelse/tempfil; request.body røres ikke
+                data = request.POST
+                image_file = request.FILES.get('image')
+            else:
+                data = json.loads(request.body)
+                image_data = data.get('image', None)
             description = data.get('description', '')
             vpid = data.get('VPID', '')
             sprog = data.get('sprog', 'de')  # Default: tysk
-            image_data = data.get('image', None)
-
-            # DEBUG: Vis input
-            print(f"Oversætter fra {sprog} til dansk: '{description}'")
-
-            # Oversæt beskrivelsen
-            translated_desc = oversæt(description, fra_sprog=sprog, mål_sprog='da')
 
-            # DEBUG: Vis output
-            print(f"Resultat: '{translated_desc}'")
-
-            # Opret rapporten...
+            # Gem rapporten med det samme; oversættelsen sker i baggrunden
+            asynkron = worker_settings()['ASYNC']
             report = FaultReport.objects.create(
                 title=f"Rapport for {vpid}",
-                description=translated_desc,
+                description='',
                 original_description=description,  # Gem originalen!
                 vpid=vpid,
-                sprog=sprog
+                asset_id=resolver.resolve_asset_id(vpid),
+                sprog=sprog,
+                translation_status=FaultReport.TRANSLATION_PENDING,
             )
 
             # Gem billede (hvis sendt)
-            if image_data:
+            if image_file:
+                save_uploaded_image(image_file, report)
+            elif image_data:
                 save_image_from_base64(image_data, report)
-                report.save()
+
+            if asynkron:
+                transaction.on_commit(lambda: worker.enqueue(report.id))
+            else:
+                translate_report(report.id, max_forsøg=1)
+                report.refresh_from_db(fields=['description', 'translation_status'])
 
             # Sikrer korrekt encoding af specialtegn (æ, ø, å) i JSON-svar
             return JsonResponse({
                 'status': 'success',
                 'report_id': report.id,
                 'message': _('Rapport indsendt! Tak for din indsats.'),
-                'oversat': translated_desc  # Ingen ekstra encoding nødvendig (Django håndterer UTF-8 automatisk)
+                'translation_status': report.translation_status,
+                'status_url': reverse('report_translation_status', args=[report.id]),
+                'oversat': report.description  # Tom indtil oversættelsen er færdig
             })
 
-        except Exception as e:
-            print("Fejl i submit_report:", str(e))
+        except Exception:
+            logger.exception("Fejl i submit_report")
             return JsonResponse({
                 'status': 'error',
                 'message': _('Der opstod en fejl. Prøv venligst igen.')
             }, status=400)
 
 
+@csrf_exempt
+def submit_report_batch(request):
+    """
+    API: Mange fejlrapporter i ét kald, fx en tablets offline-kø. JSON-listen
+    [{"key": ..., "VPID": ..., "description": ..., "sprog": ...}, ...] sendes som
+    body eller som feltet `reports` i multipart/form-data med billederne som
+    image_<key>. Svaret har ét resultat pr. rapport (se report_batch.submit_batch).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Kun POST'}, status=405)
+    try:
+        if request.content_type == 'multipart/form-data':
+            items = json.loads(request.POST.get('reports', ''))
+        else:
+            items = json.loads(request.body)
+        if isinstance(items, dict):
+            items = items.get('reports')
+        if not isinstance(items, list):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Forventer en liste af rapporter'}, status=400)
+    if len(items) > report_batch.MAX_BATCH_REPORTS:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Højst {report_batch.MAX_BATCH_REPORTS} rapporter ad gangen'}, status=400
+        )
+    return JsonResponse({'status': 'success', 'results': report_batch.submit_batch(items, request.FILES)})
+
+
 def save_image_from_base64(image_data, report):
     """Gemmer et base64-kodet billede til en FaultReport."""
     if not image_data:
@@ -72,29 +122,128 @@ def save_image_from_base64(image_data, report):
         filename = f"report_{report.id}_{timezone.now().timestamp()}.{ext}"
         report.image.save(filename, ContentFile(base64.b64decode(imgstr)), save=True)
         return True
-    except Exception as e:
-        print(f"Fejl ved gemning af billede: {e}")
+    except Exception:
+        logger.exception("Fejl ved gemning af billede til rapport %s", report.id)
         return False
 
+def save_uploaded_image(uploaded_file, report):
+    """Gemmer et uploadet billede (multipart) til en FaultReport uden at læse det hele ind i hukommelsen."""
+    if not (uploaded_file.content_type or '').startswith('image/'):
+        logger.warning("Billede til rapport %s afvist: ikke et billede (%s)", report.id, uploaded_file.content_type)
+        return False
+    try:
+        ext = uploaded_file.content_type.split('/')[-1]
+        filename = f"report_{report.id}_{timezone.now().timestamp()}.{ext}"
+        report.image.save(filename, uploaded_file, save=True)
+        return True
+    except Exception:
+        logger.exception("Fejl ved gemning af billede til rapport %s", report.id)
+        return False
+
+def report_translation_status(request, report_id):
+    """API: Status for oversættelsen af en fejlrapport (polles af index.html)."""
+    report = FaultReport.objects.filter(pk=report_id).values(
+        'id', 'translation_status', 'description', 'original_description', 'sprog'
+    ).first()
+    if report is None:
+        return JsonResponse({'status': 'error', 'message': _('Rapport ikke fundet')}, status=404)
+    return JsonResponse({
+        'report_id': report['id'],
+        'translation_status': report['translation_status'],
+        'oversat': report['description'],
+        'original': report['original_description'],
+        'sprog': report['sprog'],
+    })
+
 def index(request):
     """Renderer forsiden (index.html)."""
     return render(request, 'index.html')
 
+ASSET_API_FIELDS = ('id', 'VPID', 'name', 'description')
+
+def asset_api_settings():
+    return {
+        'PAGE_SIZE': 100,      # Standard antal aktiver pr. side
+        'MAX_PAGE_SIZE': 500,  # Højeste tilladte ?limit=
+        **getattr(settings, 'ASSET_API', {}),
+    }
+
 @csrf_exempt
 def asset_list_api(request):
-    """API: Returnerer liste af aktiver (VPID, name, description) som JSON."""
+    """
+    API: Returnerer aktiver (id, VPID, name, description) som JSON-liste.
+
+    ?search=  fritekstsøgning (FTS5, se assets/search.py)
+    ?fields=  kommasepareret udvalg af felterne (id er altid med)
+    ?after=<id>&limit=  keyset-paginering; næste side står i X-Next-After/Link
+    Svarene har en ETag ud fra katalogversionen, så uændrede lister giver 304.
+    """
     if request.method != 'GET':
         return JsonResponse({'error': 'Metode ikke tilladt'}, status=405)
-    search_term = request.GET.get('search', '')
-    if search_term:
-        assets = Asset.objects.filter(
-            models.Q(VPID__icontains=search_term) |
-            models.Q(name__icontains=search_term) |
-            models.Q(description__icontains=search_term)
-        ).values('VPID', 'name', 'id', 'description')
+    cfg = asset_api_settings()
+    search_term = request.GET.get('search', '').strip()
+    fields = [f for f in request.GET.get('fields', '').split(',') if f in ASSET_API_FIELDS] or list(ASSET_API_FIELDS)
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    try:
+        limit = min(max(int(request.GET.get('limit', cfg['PAGE_SIZE'])), 1), cfg['MAX_PAGE_SIZE'])
+        after = int(request.GET.get('after') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Ugyldig limit/after'}, status=400)
+
+    etag = '"%s"' % hashlib.md5(
+        f"{catalog.current_version(catalog.ASSETS)}|{request.GET.urlencode()}".encode()
+    ).hexdigest()
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
+    next_after = None
+    if search_term and search.fts_available():
+        # FTS5-indekset: præfiks-match, eksakt VPID først; sorteret efter relevans, så ingen næste side
+        assets = [{f: a[f] for f in fields} for a in search.search_assets(search_term, limit=limit)]
     else:
-        assets = Asset.objects.all().values('VPID', 'name', 'id', 'description')
-    return JsonResponse(list(assets), safe=False)
+        queryset = Asset.objects.all()
+        if search_term:
+            queryset = queryset.filter(
+                models.Q(VPID__icontains=search_term) |
+                models.Q(name__icontains=search_term) |
+                models.Q(description__icontains=search_term)
+            )
+        if after:
+            queryset = queryset.filter(pk__gt=after)
+        assets = list(queryset.order_by('pk').values(*fields)[:limit + 1])
+        if len(assets) > limit:
+            assets = assets[:limit]
+            next_after = assets[-1]['id']
+
+    response = JsonResponse(assets, safe=False)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'  # Browseren må gemme svaret, men skal revalidere med ETag'en
+    if next_after is not None:
+        params = request.GET.copy()
+        params['after'] = next_after
+        response['X-Next-After'] = str(next_after)
+        response['Link'] = f'<{request.path}?{params.urlencode()}>; rel="next"'
+    return response
+
+def asset_changes_api(request):
+    """
+    API: Ændringer i aktivkataloget siden klientens sync-token (til det lokale
+    katalog i index.html). Tom/udløbet ?since= giver hele kataloget med reset=true.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Metode ikke tilladt'}, status=405)
+    cfg = {'PAGE_SIZE': 1000, **getattr(settings, 'ASSET_SYNC', {})}
+    try:
+        limit = min(max(int(request.GET.get('limit', cfg['PAGE_SIZE'])), 1), cfg['PAGE_SIZE'])
+        changes = catalog.changes_since(request.GET.get('since'), limit)
+    except ValueError:
+        return JsonResponse({'error': 'Ugyldigt sync-token'}, status=400)
+    response = JsonResponse(changes)
+    response['Cache-Control'] = 'no-store'
+    return response
 
 @login_required
 def edit_asset(request, pk):
@@ -113,26 +262,88 @@ def edit_asset(request, pk):
 @login_required
 def mechanic_view(request):
     """Vis åbne fejlrapporter tildelt den loggede ind bruger."""
-    reports = FaultReport.objects.filter(
+    language = (get_language() or 'da')[:2]
+    reports = list(FaultReport.objects.filter(
         assigned_to=request.user,
         completed_at__isnull=True
-    ).order_by('-priority', 'created_at')
-    return render(request, 'assets/mechanic_view.html', {'reports': reports})
+    ).order_by('-priority', 'created_at').prefetch_related(
+        models.Prefetch('translations', queryset=FaultReportTranslation.objects.filter(language=language))
+    ))
+    for report in reports:
+        report.display_description = report.description_in(language)
+    return render(request, 'assets/mechanic_view.html', {
+        'reports': reports,
+        'labels': {
+            'priority': dict(FaultReport._meta.get_field('priority').choices),
+            'status': dict(FaultReport.CURRENT_STATUS_CHOICES),
+            'live': _("Opdateres automatisk"),
+            'high_priority': _("Ny rapport med høj prioritet"),
+        },
+    })
+
+def mechanic_events(request):
+    """
+    Live-køens SSE-sti. Under ASGI svarer vprepair.asgi selv (assets.live.sse_app);
+    når requesten når hertil (fx runserver/WSGI), svares 204, så browseren ikke
+    genforbinder, og siden genindlæses i stedet efter hver handling.
+    """
+    return HttpResponse(status=204)
 
 @csrf_exempt
 @login_required
 def update_report_status(request, report_id, action):
-    """Opdaterer status for en fejlrapport."""
-    report = get_object_or_404(FaultReport, id=report_id)
-    if action == 'start':
-        report.started_at = timezone.now()
-        report.save()
-        return JsonResponse({'status': 'success', 'message': 'Rapport påbegyndt'})
-    elif action == 'complete':
-        report.completed_at = timezone.now()
-        report.completed_by = request.user
-        report.repair_status = True
-        report.save()
-        return JsonResponse({'status': 'success', 'message': 'Rapport afsluttet'})
-    else:
+    """Starter eller afslutter en fejlrapport med ét betinget UPDATE (se assets/transitions.py)."""
+    if action not in transitions.TRANSITIONS:
+        return JsonResponse({'status': 'error', 'message': 'Ugyldig handling'}, status=400)
+    result = transitions.apply_transition(action, [report_id], request.user)
+    if result['missing']:
+        raise Http404
+    if result['rejected']:
+        message = 'Rapporten er allerede afsluttet' if action == 'complete' else 'Rapporten er allerede påbegyndt'
+        return JsonResponse({'status': 'error', 'message': message}, status=409)
+    message = 'Rapport afsluttet' if action == 'complete' else 'Rapport påbegyndt'
+    return JsonResponse({'status': 'success', 'message': message})
+
+@login_required
+def dashboard_api(request):
+    """
+    API: Værkførernes tal (åbne rapporter og gennemsnitlige tider til start og
+    afslutning) i alt, pr. prioritet, aktiv, lokation og mekaniker. Læser kun
+    de løbende optællinger (assets/stats.py), så svaret ikke afhænger af antal rapporter.
+    """
+    if not request.user.has_perm('assets.view_faultreport'):
+        return JsonResponse({'status': 'error', 'message': 'Ingen adgang'}, status=403)
+    try:
+        top = min(max(int(request.GET.get('top', 50)), 1), 500)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Ugyldig top'}, status=400)
+    return JsonResponse(stats.dashboard(top))
+
+@csrf_exempt
+@login_required
+def bulk_update_report_status(request):
+    """
+    API: Samme handling på mange rapporter i én transaktion, fx når værkføreren
+    lukker en vagt. POST {"action": "complete", "ids": [1, 2, 3]}; svaret lister
+    de opdaterede, de afviste (forkert status) og de manglende id'er.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Kun POST'}, status=405)
+    if not request.user.has_perm('assets.change_faultreport'):
+        return JsonResponse({'status': 'error', 'message': 'Ingen adgang'}, status=403)
+    try:
+        data = json.loads(request.body)
+        action = data['action']
+        ids = data['ids']
+    except (ValueError, KeyError, TypeError):
+        ids = None
+    # En streng eller et objekt ville ellers blive gennemløbet tegn for tegn eller nøgle for nøgle
+    if not isinstance(ids, list) or not all(type(pk) is int for pk in ids):
+        return JsonResponse({'status': 'error', 'message': 'Forventer {"action": ..., "ids": [heltal, ...]}'}, status=400)
+    if action not in transitions.TRANSITIONS:
         return JsonResponse({'status': 'error', 'message': 'Ugyldig handling'}, status=400)
+    if len(ids) > transitions.MAX_BULK_IDS:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Højst {transitions.MAX_BULK_IDS} rapporter ad gangen'}, status=400
+        )
+    return JsonResponse({'status': 'success', **transitions.apply_transition(action, ids, request.user)})
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Før/efter-benchmark af indeksene i migration 0011 (assets.0011_hot_path_indexes).
+
+Opretter en midlertidig SQLite-database, migrerer til 0010, seeder den med
+aktiver, mekanikere og 100.000 fejlrapporter (inkl. nogle dublet-VPID'er) og
+måler de varme forespørgsler: åbne rapporter pr. mekaniker, prioritetskøen,
+admin-filteret på status, afventende oversættelser og VPID-opslag. Derefter
+migreres til 0011 og det samme måles igen. Rapporterer median-tid og
+SQLite's forespørgselsplan for hver.
+
+    python benchmarks/query_plan_benchmark.py [--rapporter 100000] [--aktiver 5000] [--gentagelser 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+def configure(db_path, media_root):
+    from vprepair import settings as base
+
+    værdier = {k: getattr(base, k) for k in dir(base) if k.isupper()}
+    værdier.update(
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': db_path}},
+        MEDIA_ROOT=media_root,
+        TRANSLATOR_PRELOAD=False,
+        LOGGING={'version': 1, 'disable_existing_loggers': False},
+    )
+    settings.configure(**værdier)
+    django.setup()
+
+
+def seed(antal_rapporter, antal_aktiver):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from assets.models import Asset, FaultReport
+
+    rnd = random.Random(42)
+    mekanikere = User.objects.bulk_create([User(username=f"mekaniker{i}") for i in range(20)])
+    aktiver = Asset.objects.bulk_create(
+        [Asset(VPID=f"VP-{i:06d}", name=f"Maskine {i}", description="") for i in range(antal_aktiver)]
+        # Et par dubletter, som migrationen skal rydde op i
+        + [Asset(VPID=f"VP-{i:06d}", name="Dublet", description="") for i in range(0, antal_aktiver, 500)],
+        batch_size=2000,
+    )
+    nu = timezone.now()
+    statusser = ['', 'Venter på dele', 'Sendt til værksted', 'Afvist']
+    rapporter = []
+    for i in range(antal_rapporter):
+        oprettet = nu - timedelta(minutes=rnd.randint(0, 60 * 24 * 365 * 3))
+        afsluttet = rnd.random() < 0.85
+        rapporter.append(FaultReport(
+            title=f"Rapport {i}",
+            description="Hydraulik utæt",
+            original_description="Hydraulik undicht",
+            sprog=rnd.choice(['de', 'pl', 'en']),
+            translation_status='pending' if rnd.random() < 0.002 else 'done',
+            created_at=oprettet,
+            updated_at=oprettet,
+            status=rnd.choice(statusser),
+            priority=rnd.choice([1, 2, 2, 2, 3]),
+            asset=rnd.choice(aktiver),
+            assigned_to=rnd.choice(mekanikere) if rnd.random() < 0.7 else None,
+            started_at=oprettet if afsluttet else None,
+            completed_at=oprettet + timedelta(hours=4) if afsluttet else None,
+        ))
+        if len(rapporter) == 5000:
+            FaultReport.objects.bulk_create(rapporter)
+            rapporter = []
+    FaultReport.objects.bulk_create(rapporter)
+    return mekanikere
+
+
+def forespørgsler(mekaniker):
+    from assets.models import Asset, FaultReport
+
+    return [
+        ("åbne rapporter pr. mekaniker", FaultReport.objects.filter(
+            assigned_to=mekaniker, completed_at__isnull=True).order_by('-priority', 'created_at')),
+        ("prioritetskø (side 1)", FaultReport.objects.order_by('-priority', '-created_at')[:100]),
+        ("admin: status-filter (side 1)", FaultReport.objects.filter(
+            status='Venter på dele').order_by('-priority', '-created_at')[:100]),
+        ("afventende oversættelser", FaultReport.objects.filter(
+            translation_status='pending').values_list('id', flat=True)),
+        ("aktiv efter VPID", Asset.objects.filter(VPID='VP-004321')),
+    ]
+
+
+def mål(gentagelser, mekaniker):
+    resultater = {}
+    for navn, qs in forespørgsler(mekaniker):
+        tider = []
+        for _ in range(gentagelser):
+            t0 = time.perf_counter()
+            list(qs.all())
+            tider.append((time.perf_counter() - t0) * 1000)
+        plan = " | ".join(linje.strip() for linje in qs.explain().splitlines() if linje.strip())
+        resultater[navn] = (statistics.median(tider), plan)
+    return resultater
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rapporter", type=int, default=100000, help="Antal fejlrapporter at seede")
+    parser.add_argument("--aktiver", type=int, default=5000, help="Antal aktiver at seede")
+    parser.add_argument("--gentagelser", type=int, default=20, help="Kørsler pr. forespørgsel")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, 'benchmark.sqlite3'), tmp)
+        from django.core.management import call_command
+        from django.db import connection
+
+        call_command('migrate', verbosity=0)
+        call_command('migrate', 'assets', '0010', verbosity=0)
+        t0 = time.perf_counter()
+        mekanikere = seed(args.rapporter, args.aktiver)
+        print(f"Seedet {args.rapporter} rapporter og {args.aktiver} aktiver på {time.perf_counter() - t0:.1f} s")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        før = mål(args.gentagelser, mekanikere[0])
+        t0 = time.perf_counter()
+        call_command('migrate', 'assets', '0011', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        print(f"Migration 0011 (inkl. dublet-oprydning) på {time.perf_counter() - t0:.1f} s\n")
+        efter = mål(args.gentagelser, mekanikere[0])
+
+        print(f"{'Forespørgsel':32} {'før ms':>10} {'efter ms':>10} {'faktor':>8}")
+        for navn, (ms_før, _) in før.items():
+            ms_efter = efter[navn][0]
+            print(f"{navn:32} {ms_før:>10.2f} {ms_efter:>10.2f} {ms_før / ms_efter if ms_efter else 0:>7.1f}x")
+        print()
+        for navn in før:
+            print(f"{navn}\n  før:   {før[navn][1]}\n  efter: {efter[navn][1]}")
+
+
+if __name__ == "__main__":
+    main()
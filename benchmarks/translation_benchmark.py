@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Benchmark af translator.oversæt() og oversæt_batch().
+
+Kører et fast, flersproget korpus af fejlbeskrivelser igennem oversættelsen
+koldt (modeller indlæses) og varmt (modeller i hukommelsen), enkeltvis og i
+batch, og med cachen slået til. Rapporterer p50/p95/p99, gennemløb, peak RSS
+og tid pr. trin, så model- og konfigurationsændringer kan sammenlignes.
+
+    python benchmarks/translation_benchmark.py [--gentagelser 3] [--json] [--uden-fallback]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import translator  # noqa: E402
+
+KORPUS = [
+    ("de", "Hydraulik undicht"),
+    ("de", "Reifen vorne links platt"),
+    ("de", "Motor startet nicht. Batterie ist leer."),
+    ("de", "Bremslicht hinten rechts defekt"),
+    ("de", "Ölverlust am Getriebe, bitte prüfen!"),
+    ("de", "Kabine: Scheibenwischer funktioniert nicht"),
+    ("de", "Lenkung hat viel Spiel, Fahrzeug zieht nach links."),
+    ("de", "Warnleuchte für Kühlmitteltemperatur leuchtet"),
+    ("pl", "brak oleju"),
+    ("pl", "Przebita opona z tyłu"),
+    ("pl", "Silnik dymi przy uruchomieniu. Proszę sprawdzić."),
+    ("pl", "Nie działa klimatyzacja w kabinie"),
+    ("pl", "Wyciek płynu hydraulicznego z siłownika"),
+    ("pl", "Pęknięta szyba przednia"),
+    ("pl", "Hamulec ręczny nie trzyma"),
+    ("pl", "Lampka kontrolna ciśnienia oleju świeci się"),
+    ("en", "flat tyre"),
+    ("en", "Engine overheats after 20 minutes of operation."),
+    ("en", "Hydraulic hose leaking at the boom"),
+    ("en", "Reverse alarm not working"),
+    ("en", "Seat belt buckle broken. Needs replacement before next shift."),
+    ("en", "Strange noise from the rear axle when turning"),
+    ("en", "Fuel gauge shows empty although tank is full"),
+    ("en", "Forks bent after collision"),
+]
+
+
+class _IngenBackup:
+    """Slår LibreTranslate-backuppen fra, så benchmarken kun måler de lokale modeller."""
+
+    def oversæt(self, tekst, fra_sprog, mål_sprog):
+        raise translator.BackupUtilgængelig("fallback slået fra i benchmark")
+
+
+def percentiler(værdier):
+    if not værdier:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(værdier) == 1:
+        return {"p50": værdier[0], "p95": værdier[0], "p99": værdier[0]}
+    q = statistics.quantiles(værdier, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+def peak_rss_mb():
+    # ru_maxrss er i KiB på Linux og i bytes på macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def kør_enkeltvis(korpus, gentagelser):
+    tider = []
+    start = time.perf_counter()
+    for _ in range(gentagelser):
+        for sprog, tekst in korpus:
+            t0 = time.perf_counter()
+            translator.oversæt(tekst, fra_sprog=sprog, mål_sprog="da")
+            tider.append((time.perf_counter() - t0) * 1000)
+    return tider, time.perf_counter() - start
+
+
+def kør_batch(korpus, gentagelser):
+    tider = []
+    start = time.perf_counter()
+    for _ in range(gentagelser):
+        t0 = time.perf_counter()
+        translator.oversæt_batch([t for _, t in korpus], [s for s, _ in korpus], "da", brug_cache=False)
+        tider.append((time.perf_counter() - t0) * 1000)
+    return tider, time.perf_counter() - start
+
+
+def resultat(navn, tider, varighed, antal_tekster):
+    return {
+        "scenarie": navn,
+        "kald": len(tider),
+        **{k: round(v, 2) for k, v in percentiler(tider).items()},
+        "tekster_pr_s": round(antal_tekster / varighed, 2) if varighed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gentagelser", type=int, default=3, help="Antal gennemløb af korpusset pr. scenarie")
+    parser.add_argument("--json", action="store_true", help="Udskriv resultatet som JSON")
+    parser.add_argument("--uden-fallback", action="store_true", help="Slå LibreTranslate-backuppen fra")
+    args = parser.parse_args()
+
+    if args.uden_fallback:
+        translator.backup = _IngenBackup()
+    translator.cache.persistent = None
+    translator.hukommelse.aktiv = False
+    n = len(KORPUS)
+    resultater = []
+
+    # Koldt: første kald indlæser modellerne
+    translator.motor.nulstil()
+    translator.cache.aktiv = False
+    translator.målinger.nulstil()
+    t0 = time.perf_counter()
+    sprog, tekst = KORPUS[0]
+    translator.oversæt(tekst, fra_sprog=sprog, mål_sprog="da")
+    kold = (time.perf_counter() - t0) * 1000
+    resultater.append(resultat("koldt (første kald)", [kold], kold / 1000, 1))
+
+    # Varmt, uden cache: selve modellerne
+    tider, varighed = kør_enkeltvis(KORPUS, args.gentagelser)
+    resultater.append(resultat("varmt, enkeltvis", tider, varighed, n * args.gentagelser))
+    tider, varighed = kør_batch(KORPUS, args.gentagelser)
+    resultater.append(resultat(f"varmt, batch ({n} tekster)", tider, varighed, n * args.gentagelser))
+    trin = translator.målinger.snapshot()
+
+    # Varmt, med cache: gentagne fraser
+    translator.cache.aktiv = True
+    translator.cache.ryd()
+    kør_enkeltvis(KORPUS, 1)
+    tider, varighed = kør_enkeltvis(KORPUS, args.gentagelser)
+    resultater.append(resultat("varmt, cache-hits", tider, varighed, n * args.gentagelser))
+
+    rapport = {
+        "korpus": n,
+        "gentagelser": args.gentagelser,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "scenarier": resultater,
+        "trin": {k: {kk: round(vv, 2) for kk, vv in v.items()} for k, v in trin.items()},
+        "cache": dict(translator.cache.tællere),
+    }
+
+    if args.json:
+        print(json.dumps(rapport, ensure_ascii=False, indent=2))
+        return
+
+    print(f"Korpus: {n} tekster × {args.gentagelser} gentagelser, peak RSS {rapport['peak_rss_mb']} MB")
+    print(f"{'Scenarie':32} {'kald':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'tekster/s':>10}")
+    for r in resultater:
+        print(f"{r['scenarie']:32} {r['kald']:>6} {r['p50']:>10.1f} {r['p95']:>10.1f} {r['p99']:>10.1f} {r['tekster_pr_s']:>10.1f}")
+    print()
+    print(f"{'Trin':16} {'antal':>6} {'fejl':>6} {'gns ms':>10} {'maks ms':>10}")
+    for navn, data in sorted(rapport["trin"].items()):
+        print(f"{navn:16} {data['antal']:>6} {data['fejl']:>6} {data['gns_ms']:>10.1f} {data['maks_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
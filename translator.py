@@ -1,88 +1,831 @@
 import os
+import re
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
 from argostranslate import package, translate
-from libretranslatepy import LibreTranslateAPI
+
+logger = logging.getLogger(__name__)
+
+PAKKE_MAPPE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "argos_packages")
+
+
+class Målinger:
+    """
+    Tidsmålinger pr. trin i oversættelsen (load, hvert pivot-hop, fallback, ...).
+
+    Hvert trin logges struktureret (logfmt i beskeden og felterne i `extra`)
+    og summeres i tællere, som kan aflæses med snapshot().
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lås = threading.Lock()
+
+    @contextmanager
+    def mål(self, trin, **felter):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.registrer(trin, (time.perf_counter() - start) * 1000, ok, **felter)
+
+    def registrer(self, trin, ms, ok=True, **felter):
+        with self._lås:
+            data = self._data.setdefault(trin, {"antal": 0, "fejl": 0, "total_ms": 0.0, "maks_ms": 0.0})
+            data["antal"] += 1
+            data["fejl"] += 0 if ok else 1
+            data["total_ms"] += ms
+            data["maks_ms"] = max(data["maks_ms"], ms)
+        ekstra = " ".join(f"{k}={v}" for k, v in felter.items())
+        logger.info(
+            "trin=%s ms=%.1f ok=%s%s", trin, ms, ok, f" {ekstra}" if ekstra else "",
+            extra={"trin": trin, "varighed_ms": round(ms, 1), "ok": ok, **felter},
+        )
+
+    def snapshot(self):
+        """Kopi af tællerne: {trin: {antal, fejl, total_ms, maks_ms, gns_ms}}."""
+        with self._lås:
+            return {
+                trin: {**data, "gns_ms": data["total_ms"] / data["antal"] if data["antal"] else 0.0}
+                for trin, data in self._data.items()
+            }
+
+    def nulstil(self):
+        with self._lås:
+            self._data = {}
+
+
+målinger = Målinger()
+
+
+class OversættelsesMotor:
+    """
+    Holder Argos-modellerne indlæst i processen.
+
+    Modellerne installeres og sprogene slås op én gang (ved opstart eller ved
+    første brug); derefter genbruges oversættelsesobjekterne fra et register
+    med nøglen (fra_sprog, mål_sprog).
+    """
+
+    def __init__(self, pakke_mappe=PAKKE_MAPPE):
+        self.pakke_mappe = pakke_mappe
+        self._register = {}
+        self._sprog = {}
+        self._indlæst = False
+        self._lås = threading.Lock()
+
+    def indlæs(self):
+        """Installerer og indlæser modellerne, hvis det ikke allerede er sket."""
+        if self._indlæst:
+            return
+        with self._lås:
+            if self._indlæst:
+                return
+            start = time.perf_counter()
+            try:
+                model_filer = sorted(f for f in os.listdir(self.pakke_mappe) if f.endswith(".argosmodel"))
+            except FileNotFoundError:
+                logger.warning("Argos-pakkemappen %s findes ikke", self.pakke_mappe)
+                model_filer = []
+            for model_file in model_filer:
+                try:
+                    package.install_from_path(os.path.join(self.pakke_mappe, model_file))
+                except Exception as e:
+                    logger.warning("Kunne ikke installere %s: %s", model_file, e)
+
+            self._sprog = {l.code: l for l in translate.get_installed_languages()}
+            self._register = {}
+            self._indlæst = True
+            varighed = time.perf_counter() - start
+            målinger.registrer("load", varighed * 1000, filer=len(model_filer))
+            logger.info(
+                "Argos-modeller indlæst på %.2f s (%d filer, sprog: %s)",
+                varighed, len(model_filer), ", ".join(sorted(self._sprog)) or "-"
+            )
+
+    def oversættelse(self, fra_sprog, mål_sprog):
+        """Returnerer det (cachede) Argos-oversættelsesobjekt for fra→mål."""
+        self.indlæs()
+        nøgle = (fra_sprog, mål_sprog)
+        translation = self._register.get(nøgle)
+        if translation is None:
+            from_code = self._sprog.get(fra_sprog)
+            to_code = self._sprog.get(mål_sprog)
+            if from_code is None or to_code is None:
+                raise LookupError(f"Sprogparret {fra_sprog}→{mål_sprog} er ikke installeret")
+            translation = from_code.get_translation(to_code)
+            if translation is None:
+                raise LookupError(f"Ingen Argos-model for {fra_sprog}→{mål_sprog}")
+            self._register[nøgle] = translation
+        return translation
+
+    def oversæt_sætninger(self, sætninger, fra_sprog, mål_sprog, batch_størrelse=32):
+        """
+        Oversætter en liste af sætninger fra→mål i ét batch-kald til CTranslate2.
+
+        Falder tilbage til én translate() pr. sætning, hvis oversættelsen ikke er
+        en almindelig Argos-pakke (fx en sammensat pivot-oversættelse).
+        """
+        if not sætninger:
+            return []
+        translation = self.oversættelse(fra_sprog, mål_sprog)
+        underlying = getattr(translation, "underlying", translation)  # CachedTranslation
+        pkg = getattr(underlying, "pkg", None)
+        if pkg is None or not hasattr(underlying, "translator"):
+            with målinger.mål(f"{fra_sprog}→{mål_sprog}", batch=len(sætninger)):
+                return [translation.translate(s) for s in sætninger]
+
+        if underlying.translator is None:
+            import ctranslate2
+            from argostranslate import settings as argos_settings
+            underlying.translator = ctranslate2.Translator(
+                str(pkg.package_path / "model"), device=argos_settings.device
+            )
+
+        tokenized = [pkg.tokenizer.encode(s) for s in sætninger]
+        target_prefix = [[pkg.target_prefix]] * len(tokenized) if pkg.target_prefix else None
+        with målinger.mål(f"{fra_sprog}→{mål_sprog}", batch=len(sætninger)):
+            resultater = underlying.translator.translate_batch(
+                tokenized,
+                target_prefix=target_prefix,
+                replace_unknowns=True,
+                max_batch_size=batch_størrelse,
+                beam_size=4,
+                num_hypotheses=1,
+                length_penalty=0.2,
+            )
+        oversat = []
+        for resultat in resultater:
+            værdi = pkg.tokenizer.decode(resultat.hypotheses[0])
+            if pkg.target_prefix and værdi.startswith(pkg.target_prefix):
+                værdi = værdi[len(pkg.target_prefix):]
+            oversat.append(værdi.lstrip(" "))
+        return oversat
+
+    def nulstil(self):
+        """Glemmer de indlæste modeller (næste kald indlæser dem igen)."""
+        with self._lås:
+            self._register = {}
+            self._sprog = {}
+            self._indlæst = False
+
+
+motor = OversættelsesMotor()
+
+
+class OversættelsesCache:
+    """
+    To-lags cache foran oversæt(): en begrænset LRU i processen og bag den
+    et valgfrit persistent lager (sat af assets-appen, se
+    assets.translation_cache.DatabaseTranslationCache), som deles mellem
+    worker-processer og overlever genstart.
+    """
+
+    def __init__(self, maks_størrelse=2048, maks_alder=24 * 3600):
+        self.maks_størrelse = maks_størrelse
+        self.maks_alder = maks_alder  # sekunder, None = ingen udløb
+        self.persistent = None
+        self.aktiv = True  # Kan slås fra, fx i benchmarks der skal måle selve modellen
+        self.tællere = Counter()
+        self._lru = OrderedDict()
+        self._lås = threading.Lock()
+
+    @staticmethod
+    def normaliser(tekst):
+        """Normaliserer unicode og whitespace, så små forskelle rammer samme nøgle."""
+        return " ".join(unicodedata.normalize("NFC", tekst).split())
+
+    @classmethod
+    def nøgle(cls, tekst, fra_sprog, mål_sprog):
+        tekst_hash = hashlib.sha256(cls.normaliser(tekst).encode("utf-8")).hexdigest()
+        return (tekst_hash, fra_sprog, mål_sprog)
+
+    def hent(self, nøgle):
+        """Slår op i LRU'en og derefter i det persistente lager. Returnerer None ved miss."""
+        if not self.aktiv:
+            return None
+        with self._lås:
+            post = self._lru.get(nøgle)
+            if post is not None:
+                værdi, gemt = post
+                if self.maks_alder is None or time.monotonic() - gemt <= self.maks_alder:
+                    self._lru.move_to_end(nøgle)
+                    self.tællere["lru_hits"] += 1
+                    return værdi
+                del self._lru[nøgle]
+
+        if self.persistent is not None:
+            try:
+                værdi = self.persistent.get(*nøgle)
+            except Exception as e:
+                logger.warning("Persistent oversættelsescache fejlede ved opslag: %s", e)
+                værdi = None
+            if værdi is not None:
+                self.tællere["db_hits"] += 1
+                self._læg_i_lru(nøgle, værdi)
+                return værdi
+
+        self.tællere["misses"] += 1
+        return None
+
+    def gem(self, nøgle, værdi):
+        if not self.aktiv:
+            return
+        self._læg_i_lru(nøgle, værdi)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(*nøgle, værdi)
+            except Exception as e:
+                logger.warning("Persistent oversættelsescache fejlede ved skrivning: %s", e)
+
+    def _læg_i_lru(self, nøgle, værdi):
+        with self._lås:
+            self._lru[nøgle] = (værdi, time.monotonic())
+            self._lru.move_to_end(nøgle)
+            while len(self._lru) > self.maks_størrelse:
+                self._lru.popitem(last=False)
+                self.tællere["lru_evictions"] += 1
+
+    def ryd(self):
+        """Tømmer LRU'en og nulstiller tællerne (det persistente lager røres ikke)."""
+        with self._lås:
+            self._lru.clear()
+            self.tællere.clear()
+
+    def __len__(self):
+        return len(self._lru)
+
+
+cache = OversættelsesCache()
+
+
+class BackupUtilgængelig(Exception):
+    """LibreTranslate-backuppen springes over, fordi kredsløbsafbryderen er åben."""
+
+
+class Kredsløbsafbryder:
+    """
+    Simpel circuit breaker: efter `fejl_grænse` fejl i træk åbnes den i
+    `pause` sekunder, hvor kald afvises med det samme. Derefter slippes ét
+    prøvekald igennem (halvåben); lykkes det, lukkes den igen.
+    """
+
+    LUKKET, ÅBEN, HALVÅBEN = "lukket", "åben", "halvåben"
+
+    def __init__(self, fejl_grænse=3, pause=60.0, navn="libretranslate"):
+        self.fejl_grænse = fejl_grænse
+        self.pause = pause
+        self.navn = navn
+        self._fejl_i_træk = 0
+        self._åbnet = None
+        self._prøvekald_igang = False
+        self._lås = threading.Lock()
+
+    @property
+    def tilstand(self):
+        with self._lås:
+            return self._tilstand()
+
+    def _tilstand(self):
+        if self._åbnet is None:
+            return self.LUKKET
+        if time.monotonic() - self._åbnet < self.pause:
+            return self.ÅBEN
+        return self.HALVÅBEN
+
+    def tillad(self):
+        """True hvis et kald må forsøges nu."""
+        with self._lås:
+            tilstand = self._tilstand()
+            if tilstand == self.LUKKET:
+                return True
+            if tilstand == self.HALVÅBEN and not self._prøvekald_igang:
+                self._prøvekald_igang = True
+                return True
+            return False
+
+    def lykkedes(self):
+        with self._lås:
+            if self._åbnet is not None:
+                logger.info("Kredsløbsafbryder %s lukket igen", self.navn)
+            self._fejl_i_træk = 0
+            self._åbnet = None
+            self._prøvekald_igang = False
+
+    def fejlede(self):
+        with self._lås:
+            self._fejl_i_træk += 1
+            if self._prøvekald_igang or self._fejl_i_træk >= self.fejl_grænse:
+                if self._åbnet is None or self._prøvekald_igang:
+                    logger.warning(
+                        "Kredsløbsafbryder %s åbnet efter %d fejl i træk (pause %.0f s)",
+                        self.navn, self._fejl_i_træk, self.pause
+                    )
+                self._åbnet = time.monotonic()
+            self._prøvekald_igang = False
+
+
+class LibreTranslateBackup:
+    """
+    Backup-oversættelse via en LibreTranslate-server.
+
+    Bruger én requests.Session med keep-alive og connection-pool, faste
+    connect/read-timeouts og en kredsløbsafbryder, så et nedbrud hos serveren
+    ikke får hver fejlrapport til at hænge.
+    """
+
+    def __init__(self, url="https://translate.argosopentech.com/", api_key=None,
+                 connect_timeout=2.0, read_timeout=5.0, fejl_grænse=3, pause=60.0, pool_størrelse=4):
+        self.url = url.rstrip("/") + "/translate"
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.afbryder = Kredsløbsafbryder(fejl_grænse=fejl_grænse, pause=pause)
+        self.tællere = Counter()
+        self._pool_størrelse = pool_størrelse
+        self._session = None
+        self._lås = threading.Lock()
+
+    def _hent_session(self):
+        with self._lås:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_størrelse, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def oversæt(self, tekst, fra_sprog, mål_sprog):
+        if not self.afbryder.tillad():
+            self.tællere["sprunget_over"] += 1
+            raise BackupUtilgængelig(f"LibreTranslate sprunget over (afbryder {self.afbryder.tilstand})")
+
+        data = {"q": tekst, "source": fra_sprog, "target": mål_sprog, "format": "text"}
+        if self.api_key:
+            data["api_key"] = self.api_key
+        try:
+            with målinger.mål("fallback", fra=fra_sprog, til=mål_sprog, afbryder=self.afbryder.tilstand):
+                response = self._hent_session().post(self.url, json=data, timeout=self.timeout)
+                response.raise_for_status()
+                result = response.json()["translatedText"]
+        except Exception:
+            self.tællere["fejl"] += 1
+            self.afbryder.fejlede()
+            raise
+        self.tællere["ok"] += 1
+        self.afbryder.lykkedes()
+        return result
+
+    def luk(self):
+        with self._lås:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+backup = LibreTranslateBackup()
+
+
+class Oversættelseshukommelse:
+    """
+    Translation memory: tidligere (original → oversat)-par, slået op med fuzzy match.
+
+    Teksterne normaliseres (små bogstaver, uden tegnsætning, tal og VPID-lignende
+    koder erstattet af en pladsholder). En oversættelse genbruges kun, hvis de
+    bærende ord er de samme og i samme rækkefølge; kun korte fyldord (der, am,
+    the …) må afvige, så "Reifen hinten links platt" aldrig får oversættelsen af
+    "Reifen vorne links platt". Posterne er derfor grupperet efter deres bærende
+    ord, og et opslag sammenligner kun med sin egen gruppe: den post med størst
+    Jaccard-lighed på tegn-trigrammer vinder, hvis den når `tærskel`. Det er to
+    dict-opslag og en håndfuld mængdeoperationer, uanset hvor mange poster der er.
+
+    Tallene/koderne fra den nye tekst indsættes i den gemte oversættelse, og de
+    sjældnest brugte poster smides ud over `maks_poster`.
+    """
+
+    _PLADSHOLDER = re.compile(r"\b\w*\d[\w-]*")  # tal og koder som VP1234, AB-12
+    _TEGNSÆTNING = re.compile(r"[^\w#]+")
+    # Korte ord der vender betydningen og derfor altid skal være ens (ord på 4+ tegn skal altid)
+    _BÆRENDE_KORTE = frozenset({
+        'an', 'aus', 'auf', 'zu', 'ab', 'nie', 'on', 'off', 'out', 'up', 'no', 'not', 'nej', 'nic', 'tak',
+    })
+
+    def __init__(self, tærskel=0.9, maks_poster=50000, n=3):
+        self.tærskel = tærskel
+        self.maks_poster = maks_poster
+        self.n = n
+        self.aktiv = True
+        self.indlæser = None  # Kaldes ved første opslag og leverer (tekst, fra, mål, oversat), ældste først
+        self.tællere = Counter()
+        self._indlæst = False
+        # id -> (sprogpar, trigrammer, bærende ord, pladsholdere, oversat, nøgle); ældst brugt først
+        self._poster = OrderedDict()
+        self._nøgler = {}  # (sprogpar, normaliseret tekst) -> id
+        self._grupper = defaultdict(set)  # (sprogpar, bærende ord) -> {id}
+        self._næste_id = 0
+        self._lås = threading.RLock()
+
+    def _forbered(self, tekst):
+        pladsholdere = self._PLADSHOLDER.findall(tekst)
+        maskeret = self._PLADSHOLDER.sub("#", tekst.casefold())
+        return " ".join(self._TEGNSÆTNING.sub(" ", maskeret).split()), tuple(pladsholdere)
+
+    def _trigrammer(self, normaliseret):
+        s = f" {normaliseret} "
+        return frozenset(s[i:i + self.n] for i in range(max(len(s) - self.n + 1, 1)))
+
+    def _bærende(self, normaliseret):
+        return tuple(
+            ord_ for ord_ in normaliseret.split()
+            if len(ord_) >= 4 or ord_ == "#" or ord_ in self._BÆRENDE_KORTE
+        )
+
+    def indlæs(self):
+        """Bygger indekset fra `indlæser` (fx eksisterende fejlrapporter), hvis det ikke er gjort."""
+        if self._indlæst:
+            return
+        with self._lås:
+            if self._indlæst:
+                return
+            self._indlæst = True
+            if self.indlæser is None:
+                return
+            with målinger.mål("tm_load"):
+                try:
+                    for tekst, fra_sprog, mål_sprog, oversat in self.indlæser():
+                        self.tilføj(tekst, fra_sprog, mål_sprog, oversat)
+                except Exception as e:
+                    logger.warning("Translation memory kunne ikke indlæses: %s", e)
+            logger.info("Translation memory indlæst med %d poster", len(self._poster))
+
+    def tilføj(self, tekst, fra_sprog, mål_sprog, oversat):
+        """Gemmer et par; en nyere oversættelse af samme normaliserede tekst erstatter den gamle."""
+        if not tekst or not oversat or er_fejlet(oversat):
+            return
+        sprogpar = (fra_sprog, mål_sprog)
+        normaliseret, pladsholdere = self._forbered(tekst)
+        if not normaliseret.strip('# '):
+            return  # Kun tal/koder: intet at genbruge
+        nøgle = (sprogpar, normaliseret)
+        with self._lås:
+            gammel = self._nøgler.get(nøgle)
+            if gammel is not None:
+                self._fjern(gammel)
+            while len(self._poster) >= self.maks_poster:
+                self._fjern(next(iter(self._poster)))
+            post_id = self._næste_id
+            self._næste_id += 1
+            bærende = self._bærende(normaliseret)
+            self._poster[post_id] = (sprogpar, self._trigrammer(normaliseret), bærende, pladsholdere, oversat, nøgle)
+            self._nøgler[nøgle] = post_id
+            self._grupper[(sprogpar, bærende)].add(post_id)
+
+    def _fjern(self, post_id):
+        sprogpar, _, bærende, _, _, nøgle = self._poster.pop(post_id)
+        self._nøgler.pop(nøgle, None)
+        gruppe = self._grupper[(sprogpar, bærende)]
+        gruppe.discard(post_id)
+        if not gruppe:
+            del self._grupper[(sprogpar, bærende)]
+
+    def find(self, tekst, fra_sprog, mål_sprog):
+        """Returnerer en genbrugt oversættelse eller None, hvis intet ligner nok."""
+        if not self.aktiv:
+            return None
+        self.indlæs()
+        sprogpar = (fra_sprog, mål_sprog)
+        normaliseret, pladsholdere = self._forbered(tekst)
+        with self._lås:
+            bedste = self._nøgler.get((sprogpar, normaliseret))
+            if bedste is None:
+                bedste = self._lignende(sprogpar, normaliseret)
+            if bedste is None:
+                self.tællere["misses"] += 1
+                return None
+            self._poster.move_to_end(bedste)
+            _, _, _, gamle, oversat, _ = self._poster[bedste]
+
+        result = self._indsæt(oversat, gamle, pladsholdere)
+        if result is None:
+            self.tællere["afvist"] += 1
+            return None
+        self.tællere["hits"] += 1
+        return result
+
+    def _lignende(self, sprogpar, normaliseret):
+        """Id'et på den mest lignende post med samme bærende ord, hvis ligheden når `tærskel`."""
+        bærende = self._bærende(normaliseret)
+        if not bærende:
+            return None  # Kun fyldord: intet at sammenligne på
+        forespørgsel = self._trigrammer(normaliseret)
+        bedste, bedste_lighed = None, self.tærskel
+        for kandidat in self._grupper.get((sprogpar, bærende), ()):
+            trigrammer = self._poster[kandidat][1]
+            fælles = len(forespørgsel & trigrammer)
+            lighed = fælles / (len(forespørgsel) + len(trigrammer) - fælles)
+            if lighed >= bedste_lighed:
+                bedste, bedste_lighed = kandidat, lighed
+        return bedste
+
+    @staticmethod
+    def _indsæt(oversat, gamle, nye):
+        """Erstatter de gamle tal/koder i oversættelsen med de nye (samme rækkefølge)."""
+        if gamle == nye:
+            return oversat
+        if len(gamle) != len(nye):
+            return None
+        for i, gammel in enumerate(gamle):
+            oversat, antal = re.subn(rf"(?<!\w){re.escape(gammel)}(?!\w)", f"\x00{i}\x00", oversat, count=1)
+            if not antal:
+                return None
+        for i, ny in enumerate(nye):
+            oversat = oversat.replace(f"\x00{i}\x00", ny)
+        return oversat
+
+    def __len__(self):
+        return len(self._poster)
+
+
+hukommelse = Oversættelseshukommelse()
+
+
+def _slå_op(tekst, fra_sprog, mål_sprog):
+    """Cache først, derefter translation memory. Returnerer None hvis modellen skal bruges."""
+    nøgle = cache.nøgle(tekst, fra_sprog, mål_sprog)
+    result = cache.hent(nøgle)
+    if result is None:
+        result = hukommelse.find(tekst, fra_sprog, mål_sprog)
+        if result is not None:
+            cache.gem(nøgle, result)
+    return result
+
+
+def _husk(tekst, fra_sprog, mål_sprog, result):
+    """Gemmer en ny oversættelse i cache og translation memory (fejl gemmes ikke)."""
+    if er_fejlet(result):
+        return
+    cache.gem(cache.nøgle(tekst, fra_sprog, mål_sprog), result)
+    hukommelse.tilføj(tekst, fra_sprog, mål_sprog, result)
+
+
+def er_fejlet(tekst):
+    """True hvis tekst er fejlmarkøren fra oversæt()."""
+    return tekst.startswith("[Oversættelse fejlede")
+
 
 def oversæt(tekst, fra_sprog='de', mål_sprog='da'):
     """
-    Oversætter tekst til dansk (da) efter følgende regler:
-    1. Dansk (da) → Ingen oversættelse.
-    2. Engelsk (en) → Direkte en→da (uden at gå via en→en).
-    3. Alle andre sprog → Via engelsk (fra→en→da).
+    Oversætter tekst fra fra_sprog til mål_sprog (standard: dansk) efter følgende regler:
+    1. Samme sprog → Ingen oversættelse.
+    2. Engelsk ind eller ud (fx en→da) → Direkte.
+    3. Alle andre sprogpar → Via engelsk (fra→en→mål).
     """
-    # 1. Dansk: Ingen oversættelse
-    if fra_sprog == 'da':
+    # 1. Samme sprog: Ingen oversættelse
+    if fra_sprog == mål_sprog:
         return tekst
 
-    # 2. Engelsk: Direkte en→da
-    if fra_sprog == 'en':
-        return _oversæt_direkte(tekst, 'en', 'da')
+    # Cache og translation memory: samme sætning (evt. med andre tal) er typisk oversat før
+    result = _slå_op(tekst, fra_sprog, mål_sprog)
+    if result is not None:
+        return result
 
-    # 3. Alle andre sprog: Via engelsk (fra→en→da)
-    return _oversæt_via_engelsk(tekst, fra_sprog, 'da')
+    if 'en' in (fra_sprog, mål_sprog):
+        # 2. Engelsk: Direkte
+        result = _oversæt_direkte(tekst, fra_sprog, mål_sprog)
+    else:
+        # 3. Alle andre sprog: Via engelsk (fra→en→mål)
+        result = _oversæt_via_engelsk(tekst, fra_sprog, mål_sprog)
 
-def _oversæt_direkte(tekst, fra_sprog, mål_sprog):
-    """Oversætter direkte fra→mål (bruges til en→da)."""
-    try:
-        os.environ["ARGOSTRANSLATE_PACKAGE_DIR"] = os.path.join(os.path.dirname(__file__), "argos_packages")
-        for model_file in os.listdir("argos_packages"):
-            if model_file.endswith(".argosmodel"):
-                package.install_from_path(os.path.join("argos_packages", model_file))
+    _husk(tekst, fra_sprog, mål_sprog, result)  # Fejl gemmes ikke, så de prøves igen næste gang
+    return result
 
-        langs = translate.get_installed_languages()
-        from_code = next(l for l in langs if l.code == fra_sprog)
-        to_code = next(l for l in langs if l.code == mål_sprog)
 
-        translation = from_code.get_translation(to_code)
-        result = translation.translate(tekst)
-        if result != tekst:  # Valider oversættelsen
-            print(f"DEBUG: {fra_sprog}→{mål_sprog}: '{tekst}' → '{result}'")
-            return result
-    except Exception as e:
-        print(f"ArgosTranslate ({fra_sprog}→{mål_sprog}) fejlede: {e}")
+def oversæt_alle(tekst, fra_sprog, mål_sprog_liste):
+    """
+    Oversætter tekst til alle sprog i mål_sprog_liste i ét gennemløb.
+
+    Den engelske pivot (fra→en) beregnes højst én gang og genbruges til hvert
+    mål. Returnerer {sprogkode: tekst}; mislykkede sprog har fejlmarkøren som værdi.
+    """
+    resultater = {}
+    mangler = []
+    for mål in mål_sprog_liste:
+        if mål == fra_sprog:
+            resultater[mål] = tekst
+            continue
+        hit = _slå_op(tekst, fra_sprog, mål)
+        if hit is not None:
+            resultater[mål] = hit
+        else:
+            mangler.append(mål)
+    if not mangler:
+        return resultater
+
+    # Engelsk pivot: fra cachen, selve teksten (en) eller ét Argos-kald
+    engelsk_tekst = tekst if fra_sprog == 'en' else resultater.get('en')
+    if engelsk_tekst is None:
+        try:
+            engelsk_tekst = _engelsk_pivot(tekst, fra_sprog)
+        except Exception as e:
+            logger.warning("ArgosTranslate (%s→en) fejlede: %s", fra_sprog, e)
+
+    for mål in mangler:
+        if engelsk_tekst is None:
+            result = _backup(tekst, fra_sprog, mål)
+        elif mål == 'en':
+            result = engelsk_tekst
+        else:
+            result = _oversæt_via_engelsk(tekst, fra_sprog, mål, engelsk_tekst=engelsk_tekst)
+        _husk(tekst, fra_sprog, mål, result)
+        resultater[mål] = result
+    return resultater
+
+_SÆTNINGSGRÆNSE = re.compile(r"(\s*\n\s*|(?<=[.!?])\s+)")
+
+
+def _del_i_sætninger(tekst):
+    """Deler tekst i [sætning, separator, sætning, ...], så den kan samles igen uændret."""
+    return _SÆTNINGSGRÆNSE.split(tekst)
 
-    # Backup: LibreTranslate
+
+def oversæt_batch(tekster, fra_sprog='de', mål_sprog='da', brug_cache=True):
+    """
+    Oversætter mange tekster til mål_sprog (standard: dansk) på én gang.
+
+    fra_sprog kan være én sprogkode for alle tekster eller en liste med en kode
+    pr. tekst. Teksterne deles i sætninger, grupperes pr. sprogpar og sendes
+    samlet til modellen; resultaterne returneres i samme rækkefølge som input.
+    Tekster der ikke kan oversættes i batch, sendes gennem oversæt() (med
+    LibreTranslate som backup).
+    """
+    tekster = list(tekster)
+    if isinstance(fra_sprog, str):
+        fra_sprog = [fra_sprog] * len(tekster)
+    resultater = [None] * len(tekster)
+
+    grupper = {}
+    for i, (tekst, sprog) in enumerate(zip(tekster, fra_sprog)):
+        if sprog == mål_sprog or not tekst.strip():
+            resultater[i] = tekst
+            continue
+        if brug_cache:
+            hit = _slå_op(tekst, sprog, mål_sprog)
+            if hit is not None:
+                resultater[i] = hit
+                continue
+        grupper.setdefault(sprog, []).append(i)
+
+    for sprog, indekser in grupper.items():
+        try:
+            oversat = _oversæt_gruppe([tekster[i] for i in indekser], sprog, mål_sprog)
+        except Exception as e:
+            logger.warning("ArgosTranslate batch (%s→%s, %d tekster) fejlede: %s", sprog, mål_sprog, len(indekser), e)
+            oversat = [oversæt(tekster[i], fra_sprog=sprog, mål_sprog=mål_sprog) for i in indekser]
+        for i, result in zip(indekser, oversat):
+            resultater[i] = result
+            _husk(tekster[i], sprog, mål_sprog, result)
+
+    return resultater
+
+
+def oversæt_batch_alle(tekster, fra_sprog, mål_sprog_liste, brug_cache=True):
+    """
+    Oversætter mange tekster til alle sprog i mål_sprog_liste; oversæt_alle() for en batch.
+
+    Teksterne oversættes til engelsk én gang (ét oversæt_batch()-kald), og hvert
+    mål oversættes derefter fra de engelske tekster. fra_sprog er én kode eller
+    en liste med en kode pr. tekst. Returnerer en liste med {sprogkode: tekst}
+    pr. tekst; mislykkede sprog har fejlmarkøren som værdi.
+    """
+    tekster = list(tekster)
+    if isinstance(fra_sprog, str):
+        fra_sprog = [fra_sprog] * len(tekster)
+    resultater = [{} for _ in tekster]
+    mangler = {}  # mål -> indekser på de tekster der mangler det
+    for i, (tekst, sprog) in enumerate(zip(tekster, fra_sprog)):
+        for mål in mål_sprog_liste:
+            hit = tekst if mål == sprog or not tekst.strip() else None
+            if hit is None and brug_cache:
+                hit = _slå_op(tekst, sprog, mål)
+            if hit is not None:
+                resultater[i][mål] = hit
+            else:
+                mangler.setdefault(mål, []).append(i)
+    if not mangler:
+        return resultater
+
+    # Engelsk pivot: selve teksten (en), fra cachen eller ét samlet kald for resten
+    engelsk = {}
+    uden = []
+    for i in sorted({i for indekser in mangler.values() for i in indekser}):
+        if fra_sprog[i] == 'en':
+            engelsk[i] = tekster[i]
+        elif 'en' in resultater[i]:
+            engelsk[i] = resultater[i]['en']
+        else:
+            uden.append(i)
+    if uden:
+        pivot = oversæt_batch([tekster[i] for i in uden], [fra_sprog[i] for i in uden], 'en', brug_cache=False)
+        engelsk.update(zip(uden, pivot))
+
+    for mål, indekser in mangler.items():
+        if mål == 'en':
+            for i in indekser:
+                resultater[i]['en'] = engelsk[i]
+            continue
+        via = [i for i in indekser if not er_fejlet(engelsk[i])]
+        for i in indekser:
+            if er_fejlet(engelsk[i]):
+                resultater[i][mål] = _backup(tekster[i], fra_sprog[i], mål)
+                _husk(tekster[i], fra_sprog[i], mål, resultater[i][mål])
+        oversat = oversæt_batch([engelsk[i] for i in via], 'en', mål, brug_cache=brug_cache)
+        for i, result in zip(via, oversat):
+            resultater[i][mål] = result
+            if fra_sprog[i] != 'en':
+                _husk(tekster[i], fra_sprog[i], mål, result)
+    return resultater
+
+
+def _oversæt_gruppe(tekster, fra_sprog, mål_sprog):
+    """Oversætter tekster med samme kildesprog til mål_sprog (via engelsk hvis ingen af dem er en)."""
+    dele = [_del_i_sætninger(t) for t in tekster]
+    # Unikke sætninger (lige indekser er sætninger, ulige er separatorer)
+    unikke = list(dict.fromkeys(d for del_ in dele for d in del_[::2] if d.strip()))
+
+    if 'en' in (fra_sprog, mål_sprog):
+        hop = [(fra_sprog, mål_sprog)]
+    else:
+        hop = [(fra_sprog, 'en'), ('en', mål_sprog)]
+    oversat = unikke
+    for fra, til in hop:
+        oversat = motor.oversæt_sætninger(oversat, fra, til)
+    opslag = dict(zip(unikke, oversat))
+
+    resultater = []
+    for del_ in dele:
+        resultater.append("".join(
+            opslag.get(d, d) if i % 2 == 0 else d for i, d in enumerate(del_)
+        ))
+    return resultater
+
+
+def _oversæt_direkte(tekst, fra_sprog, mål_sprog):
+    """Oversætter direkte fra→mål (bruges når engelsk er kilde- eller målsprog)."""
     try:
-        lt = LibreTranslateAPI("https://translate.argosopentech.com/")
-        result = lt.translate(tekst, fra_sprog, mål_sprog)
-        print(f"DEBUG: Backup (LibreTranslate, {fra_sprog}→{mål_sprog}): '{tekst}' → '{result}'")
-        return result
+        translation = motor.oversættelse(fra_sprog, mål_sprog)
+        with målinger.mål(f"{fra_sprog}→{mål_sprog}", tegn=len(tekst)):
+            result = translation.translate(tekst)
+        if result != tekst:  # Valider oversættelsen
+            logger.debug("%s→%s: '%s' → '%s'", fra_sprog, mål_sprog, tekst, result)
+            return result
     except Exception as e:
-        print(f"LibreTranslate ({fra_sprog}→{mål_sprog}) fejlede: {e}")
-        return f"[Oversættelse fejlede: {tekst}]"
+        logger.warning("ArgosTranslate (%s→%s) fejlede: %s", fra_sprog, mål_sprog, e)
 
-def _oversæt_via_engelsk(tekst, fra_sprog, mål_sprog):
-    """Oversætter via engelsk (fra→en→mål)."""
-    try:
-        os.environ["ARGOSTRANSLATE_PACKAGE_DIR"] = os.path.join(os.path.dirname(__file__), "argos_packages")
-        for model_file in os.listdir("argos_packages"):
-            if model_file.endswith(".argosmodel"):
-                package.install_from_path(os.path.join("argos_packages", model_file))
+    return _backup(tekst, fra_sprog, mål_sprog)
 
-        langs = translate.get_installed_languages()
-        from_code = next(l for l in langs if l.code == fra_sprog)
-        en_code = next(l for l in langs if l.code == 'en')
-        to_code = next(l for l in langs if l.code == mål_sprog)
+def _engelsk_pivot(tekst, fra_sprog):
+    """Trin 1 af pivot-oversættelsen: fra_sprog → en. Rejser en fejl hvis intet blev oversat."""
+    translation_en = motor.oversættelse(fra_sprog, 'en')
+    with målinger.mål(f"{fra_sprog}→en", tegn=len(tekst)):
+        engelsk_tekst = translation_en.translate(tekst)
+    if engelsk_tekst == tekst:
+        raise ValueError(f"Kunne ikke oversætte '{tekst}' til engelsk")
+    return engelsk_tekst
 
+def _oversæt_via_engelsk(tekst, fra_sprog, mål_sprog, engelsk_tekst=None):
+    """Oversætter via engelsk (fra→en→mål). engelsk_tekst gives, hvis pivoten allerede er beregnet."""
+    try:
         # Trin 1: fra_sprog → en
-        translation_en = from_code.get_translation(en_code)
-        engelsk_tekst = translation_en.translate(tekst)
-        if engelsk_tekst == tekst:
-            raise ValueError(f"Kunne ikke oversætte '{tekst}' til engelsk")
+        if engelsk_tekst is None:
+            engelsk_tekst = _engelsk_pivot(tekst, fra_sprog)
 
         # Trin 2: en → mål_sprog
-        translation_final = en_code.get_translation(to_code)
-        result = translation_final.translate(engelsk_tekst)
-        print(f"DEBUG: {fra_sprog}→en→{mål_sprog}: '{tekst}' → '{result}'")
+        translation_final = motor.oversættelse('en', mål_sprog)
+        with målinger.mål(f"en→{mål_sprog}", tegn=len(engelsk_tekst)):
+            result = translation_final.translate(engelsk_tekst)
+        logger.debug("%s→en→%s: '%s' → '%s'", fra_sprog, mål_sprog, tekst, result)
         return result
     except Exception as e:
-        print(f"ArgosTranslate ({fra_sprog}→en→{mål_sprog}) fejlede: {e}")
+        logger.warning("ArgosTranslate (%s→en→%s) fejlede: %s", fra_sprog, mål_sprog, e)
 
         # Backup: LibreTranslate (direkte fra→mål)
-        try:
-            lt = LibreTranslateAPI("https://translate.argosopentech.com/")
-            result = lt.translate(tekst, fra_sprog, mål_sprog)
-            print(f"DEBUG: Backup (LibreTranslate, {fra_sprog}→{mål_sprog}): '{tekst}' → '{result}'")
-            return result
-        except Exception as e:
-            print(f"LibreTranslate ({fra_sprog}→{mål_sprog}) fejlede: {e}")
-            return f"[Oversættelse fejlede: {tekst}]"
+        return _backup(tekst, fra_sprog, mål_sprog)
+
+def _backup(tekst, fra_sprog, mål_sprog):
+    """Backup: LibreTranslate direkte fra→mål."""
+    try:
+        result = backup.oversæt(tekst, fra_sprog, mål_sprog)
+        logger.debug("Backup (LibreTranslate, %s→%s): '%s' → '%s'", fra_sprog, mål_sprog, tekst, result)
+        return result
+    except Exception as e:
+        logger.warning("LibreTranslate (%s→%s) fejlede: %s", fra_sprog, mål_sprog, e)
+        return f"[Oversættelse fejlede: {tekst}]"
@@ -13,4 +13,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vprepair.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.urls import reverse  # noqa: E402 (kræver at Django er sat op)
+from assets.live import sse_app  # noqa: E402
+
+_sse_path = None
+
+
+async def application(scope, receive, send):
+    """Mekanikernes live-kø (SSE) går uden om Djangos handler; alt andet til Django."""
+    global _sse_path
+    if scope['type'] == 'http':
+        if _sse_path is None:
+            _sse_path = reverse('mechanic_events')
+        if scope['path'] == _sse_path:
+            return await sse_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -102,6 +102,59 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024  # Uploads over 1 MB (fx fotos) streames til en tempfil
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Billeder på aktiver og fejlrapporter: gemmes efter indholds-hash, så ens billeder kun ligger der én gang
+    'media_blobs': {'BACKEND': 'assets.storage.ContentAddressedStorage'},
+}
+MEDIA_GC_GRACE_HOURS = 24  # gc_media sletter kun filer, der har været uden referencer så længe
+
+# /api/assets/: keyset-paginering
+ASSET_API = {
+    'PAGE_SIZE': 100,  # Aktiver pr. side, når ?limit= ikke er givet
+    'MAX_PAGE_SIZE': 500,  # Højeste tilladte ?limit=
+}
+# /api/assets/changes/: delta-synkronisering til tablets' lokale katalog
+ASSET_SYNC = {
+    'PAGE_SIZE': 1000,  # Ændrede aktiver pr. svar
+    'TOMBSTONE_DAYS': 90,  # prune_asset_tombstones sletter ældre tombstones (klienter bag det synkroniserer forfra)
+}
+
+# QR-koder (assets/qr_utils.py): renderes med segno og caches pr. (payload, format, størrelse)
+QR_CODES = {
+    'CACHE_SIZE': 1024,  # Antal QR-koder i hukommelsen pr. proces
+    'DEFAULT_SIZE': 370,  # Bredde i pixels for PNG, når ?size= ikke er givet
+    'MAX_AGE': 24 * 3600,  # Cache-Control på /qr/<id>.svg|png
+}
+QR_LABELS = {
+    'COLUMNS': 3,  # Etiketark: 3 x 8 etiketter pr. A4-side
+    'ROWS': 8,
+    'WORKERS': None,  # Processer der renderer i print_labels/generate_qr_codes (None = antal CPU-kerner, 0 = ingen pulje)
+}
+
+# Billedbehandling (assets/image_processing.py): kører i baggrunden efter upload
+IMAGE_PROCESSING = {
+    'MAX_DIMENSION': 2048,  # Længste side på det gemte billede
+    'FORMAT': 'JPEG',       # 'JPEG' eller 'WEBP'
+    'QUALITY': 82,
+    'THUMBNAIL_SIZE': 320,  # Længste side på miniaturer (bruges i lister)
+}
+
+# Mekanikernes live-kø (assets/live.py): server-sent events, kræver at sitet kører under ASGI
+LIVE_QUEUE = {
+    'KEEPALIVE': 25,     # Sekunder mellem keepalive-kommentarer på en tom forbindelse
+    'QUEUE_SIZE': 100,   # Ventende hændelser pr. forbindelse før klienten bedes hente siden forfra
+    'RETRY_MS': 5000,    # Browserens pause før den genforbinder
+}
+
+# VPID -> aktiv for indkomne rapporter (assets/resolver.py); indekset ligger i processens hukommelse
+VPID_RESOLVER = {
+    'MAX_AGE': 300,      # Sekunder før indekset altid indlæses igen
+    'MISS_RELOAD': 30,   # Mindste pause mellem genindlæsninger udløst af ukendte VPID'er
+}
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -110,3 +163,45 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/accounts/login/'  # ← Standard login-URL (matchede path'et i urls.py)
 LOGIN_REDIRECT_URL = '/'         # Hvor brugeren sendes hen efter login
 LOGOUT_REDIRECT_URL = '/'        # Hvor brugeren sendes hen efter logout
+
+# Oversættelse (translator.py)
+TRANSLATOR_PRELOAD = True  # Indlæs Argos-modellerne ved opstart i stedet for ved første rapport
+TRANSLATION_CACHE = {
+    'LRU_SIZE': 2048,          # Antal oversættelser i hukommelsen pr. proces
+    'LRU_MAX_AGE': 24 * 3600,  # Sekunder før en LRU-post udløber
+    'MAX_ENTRIES': 50000,      # Maks. rækker i cache-tabellen
+    'MAX_AGE_DAYS': 180,       # Rækker der ikke er brugt i så mange dage slettes
+}
+TRANSLATION_MEMORY = {
+    'ENABLED': True,
+    'THRESHOLD': 0.9,      # Jaccard-lighed (tegn-trigrammer) før en gammel oversættelse genbruges
+    'MAX_ENTRIES': 50000,  # Maks. antal par i hukommelsen pr. proces
+}
+LIBRETRANSLATE = {
+    'URL': os.environ.get('LIBRETRANSLATE_URL', 'https://translate.argosopentech.com/'),
+    'API_KEY': os.environ.get('LIBRETRANSLATE_API_KEY'),
+    'CONNECT_TIMEOUT': 2.0,   # Sekunder
+    'READ_TIMEOUT': 5.0,      # Sekunder
+    'FAILURE_THRESHOLD': 3,   # Fejl i træk før backuppen springes over
+    'COOL_DOWN': 60,          # Sekunder backuppen springes over
+}
+TRANSLATION_WORKER = {
+    'ASYNC': True,        # Oversæt i baggrunden, så /api/reports/ svarer med det samme
+    'MAX_ATTEMPTS': 3,    # Forsøg før en rapport markeres som fejlet
+    'RETRY_DELAY': 30,    # Sekunder mellem forsøg
+    'CLAIM_TIMEOUT': 600,  # Sekunder før en anden worker må overtage en rapport, der er under oversættelse
+    # Start workeren ved første request; TRANSLATION_WORKER_AUTOSTART=0 når en anden proces står for oversættelsen
+    'AUTOSTART': os.environ.get('TRANSLATION_WORKER_AUTOSTART', '1') != '0',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'translator': {'handlers': ['console'], 'level': 'INFO'},
+        'assets': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -5,12 +5,18 @@ from django.contrib.auth import views as auth_views
 from assets.views import (
     index,
     asset_list_api,
+    asset_changes_api,
     submit_report,
+    submit_report_batch,
+    report_translation_status,
     mechanic_view,
+    mechanic_events,
     update_report_status,
+    bulk_update_report_status,
+    dashboard_api,
     edit_asset,
 )
-from assets.qr_utils import print_qr_view
+from assets.qr_utils import print_labels_view, print_qr_view, qr_image_view
 
 urlpatterns = [
   
@@ -23,7 +29,14 @@ urlpatterns = [
 
     # API-endpoints (ikke-sprogafhængige)
     path('api/assets/', asset_list_api, name='asset_list_api'),
+    path('api/assets/changes/', asset_changes_api, name='asset_changes_api'),
     path('api/reports/', submit_report, name='submit_report'),
+    path('api/reports/batch/', submit_report_batch, name='submit_report_batch'),  # Offline-kø fra tablets
+    path('api/reports/<int:report_id>/status/', report_translation_status, name='report_translation_status'),
+    path('api/reports/bulk-status/', bulk_update_report_status, name='bulk_update_report_status'),
+    path('api/dashboard/', dashboard_api, name='dashboard_api'),
+    path('api/mechanic/events/', mechanic_events, name='mechanic_events'),  # SSE til live-køen (ASGI)
+    path('qr/<int:asset_id>.<str:fmt>', qr_image_view, name='qr_image'),  # QR-billeder (cachebare)
 ]
 
 # Sprogafhængige URLs (brug i18n_patterns)
@@ -37,4 +50,5 @@ urlpatterns += i18n_patterns(
 
     # QR-print (sprogafhængig)
     path('print_qr/<int:asset_id>/', print_qr_view, name='print_qr'),
+    path('print_qr/labels/', print_labels_view, name='print_qr_labels'),
 )